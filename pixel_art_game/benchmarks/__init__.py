@@ -0,0 +1,4 @@
+# benchmarks/__init__.py
+
+# Scripts that time the hot paths; run from pixel_art_game with
+# "python -m benchmarks.<name>".
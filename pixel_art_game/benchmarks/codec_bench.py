@@ -0,0 +1,69 @@
+# benchmarks/codec_bench.py
+
+"""Time encode_message and decode_message for the binary and JSON codecs.
+
+    python -m benchmarks.codec_bench --enemies 200
+
+Covers the messages the binary codec exists for: a client's move and a
+world update, as a keyframe and as a typical delta.
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from common.codec import encode_message, decode_message, FRAME_HEADER
+
+def sample_messages(enemies, rng):
+    players = {}
+    for index in range(8):
+        player_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        players[player_id] = {"id": player_id, "name": f"player{index}", "avatar": "Warrior",
+                              "x": rng.uniform(0, 4000), "y": rng.uniform(0, 4000),
+                              "health": 100, "max_health": 100, "mana": 50, "max_mana": 50,
+                              "hero_class": "warrior", "inventory": [{"type": "potion", "id": "item_3"}],
+                              "effects": [], "move_seq": 1200 + index}
+    enemy_list = [{"id": f"enemy_{index}", "type": rng.choice(["goblin", "skeleton", "orc"]),
+                   "x": rng.uniform(0, 4000), "y": rng.uniform(0, 4000), "health": 100,
+                   "speed": 1.5, "damage": 5} for index in range(enemies)]
+    keyframe = {"type": "update_state", "data": {"seq": 1000, "keyframe": True, "time": time.time(),
+                                                 "players": players, "enemies": enemy_list,
+                                                 "items": [{"id": "item_3", "type": "coin",
+                                                            "x": 10.5, "y": 20.25}]}}
+    changed = {enemy["id"]: {"x": enemy["x"] + 1.5, "y": enemy["y"] - 0.75}
+               for enemy in enemy_list[:enemies // 5]}
+    delta = {"type": "update_state", "data": {"seq": 1001, "baseline": 1000, "time": time.time(),
+                                              "players": {"added": {}, "changed": {}, "removed": []},
+                                              "enemies": {"added": {}, "changed": changed, "removed": []},
+                                              "items": {"added": {}, "changed": {}, "removed": ["item_3"]}}}
+    move = {"type": "move", "data": {"dx": 5, "dy": -5, "seq": 1201}}
+    return [("move", move), ("delta", delta), ("keyframe", keyframe)]
+
+def per_call(function, seconds):
+    """Seconds one call of function takes, averaged over about the given time"""
+    start = time.perf_counter()
+    calls = 0
+    while time.perf_counter() - start < seconds:
+        function()
+        calls += 1
+    return (time.perf_counter() - start) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=0.5, help="time spent on each measurement")
+    options = parser.parse_args()
+
+    print(f"{'message':<10}{'codec':<8}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    for name, message in sample_messages(options.enemies, random.Random(1)):
+        for codec in ("binary", "json"):
+            encoded = encode_message(message, codec)
+            binary = codec == "binary"
+            frame = bytearray(encoded[FRAME_HEADER.size:] if binary else encoded)
+            encode = per_call(lambda: encode_message(message, codec), options.seconds)
+            decode = per_call(lambda: decode_message(frame, binary), options.seconds)
+            print(f"{name:<10}{codec:<8}{len(encoded):>8}{encode * 1e6:>12.1f}{decode * 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    main()
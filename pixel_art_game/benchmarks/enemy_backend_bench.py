@@ -0,0 +1,117 @@
+# benchmarks/enemy_backend_bench.py
+
+"""Time update_enemies with the python and numpy backends, and compare them.
+
+    python -m benchmarks.enemy_backend_bench --enemies 1000 5000 10000
+
+Both backends get the same world: a square map walled round its edge,
+with --walls of the tiles inside walled too, the same enemies and the
+same players. They are first stepped side by side on a fixed clock,
+enemies hitting players as they reach them, and must end up in the same
+state; then each is timed on its own.
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+from unittest import mock
+
+from common.tilemap import ChunkedMap
+from server import game_state as game_state_module
+from server.config import FLOW_FIELD_CACHE, FLOW_FIELD_RADIUS, LOS_CACHE_SOURCES
+from server.enemy_arrays import EnemyArrays
+from server.game_state import GameState, IMPASSABLE_TILE_IDS
+from server.pathfinding import FlowFields
+from server.visibility import VisibilityCache
+
+WALL = 8
+
+def build_state(backend, enemies, players, size, walls=0.1, damage=0, health=10 ** 9, seed=1):
+    """A GameState on a size x size tile map with the given enemy backend"""
+    rng = random.Random(seed)
+    state = GameState()
+    for enemy in list(state.enemies):
+        state.remove_enemy(enemy["id"])
+    layout = [[WALL if x in (0, size - 1) or y in (0, size - 1) or rng.random() < walls else 0
+               for x in range(size)] for y in range(size)]
+    state.map = ChunkedMap.from_layout(layout, IMPASSABLE_TILE_IDS)
+    state.width = state.height = size
+    state.visibility = VisibilityCache(state.map.is_passable, size, size,
+                                       state.visibility.radius, LOS_CACHE_SOURCES)
+    state.flow_fields = FlowFields(state.map.is_passable, size, size, FLOW_FIELD_RADIUS, FLOW_FIELD_CACHE)
+    state.enemy_arrays = EnemyArrays(state.tile_size, state.map) if backend == "numpy" else None
+
+    far = (size - 1) * state.tile_size
+    for index in range(enemies):
+        state.add_enemy({"id": f"enemy_{index + 1000}", "type": "orc",
+                         "x": rng.uniform(state.tile_size, far), "y": rng.uniform(state.tile_size, far),
+                         "speed": rng.uniform(1.0, 2.5), "health": 100, "damage": damage,
+                         "last_hit_time": 0})
+    for index in range(players):
+        player_id = f"player_{index}"
+        state.add_player(player_id, player_id, "Warrior")
+        player = state.players[player_id]
+        player["x"] = rng.uniform(state.tile_size, far)
+        player["y"] = rng.uniform(state.tile_size, far)
+        player["health"] = health
+    return state
+
+def run_ticks(state, ticks, dt=1 / 30, start=1000.0):
+    """Step the enemies on a clock of their own, so attack times repeat"""
+    clock = [start]
+    with mock.patch.object(game_state_module.time, "time", lambda: clock[0]), \
+            contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(ticks):
+            clock[0] += dt
+            state.update_enemies(dt)
+
+def outcome(state):
+    """Where every enemy is and when it last hit, and every player's health"""
+    enemies = {enemy["id"]: (enemy["x"], enemy["y"], enemy["last_hit_time"]) for enemy in state.enemies}
+    players = {player_id: player["health"] for player_id, player in state.players.items()}
+    return enemies, players
+
+def largest_difference(first, second):
+    """Largest difference between two outcomes' enemy fields; players must match"""
+    enemies, players = first
+    other_enemies, other_players = second
+    assert enemies.keys() == other_enemies.keys(), "different enemies left"
+    assert players == other_players, "players differ"
+    return max((abs(a - b) for enemy_id in enemies for a, b in zip(enemies[enemy_id], other_enemies[enemy_id])),
+               default=0.0)
+
+def per_tick(state, ticks):
+    with contextlib.redirect_stdout(io.StringIO()):
+        state.update_enemies(1 / 30)  # the first tick builds caches
+        start = time.perf_counter()
+        for _ in range(ticks):
+            state.update_enemies(1 / 30)
+    return (time.perf_counter() - start) / ticks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=15, help="ticks timed per run")
+    parser.add_argument("--check-ticks", type=int, default=200, help="ticks the backends are compared over")
+    parser.add_argument("--walls", type=float, default=0.0, help="share of the tiles inside that are walls")
+    options = parser.parse_args()
+
+    python, numpy = (build_state(backend, 1000, 20, 60, walls=0.15, damage=5) for backend in ("python", "numpy"))
+    run_ticks(python, options.check_ticks)
+    run_ticks(numpy, options.check_ticks)
+    print(f"1000 enemies, 20 players, 15% walls, {options.check_ticks} ticks: largest difference "
+          f"{largest_difference(outcome(python), outcome(numpy))}")
+
+    print(f"update_enemies per tick with {options.players} players, python -> numpy")
+    for label, size in [("most enemies active (60x60 tiles)", 60), ("most dormant (300x300 tiles)", 300)]:
+        for count in options.enemies:
+            times = [per_tick(build_state(backend, count, options.players, size, options.walls),
+                              options.ticks) * 1000
+                     for backend in ("python", "numpy")]
+            print(f"  {label}, {count:>6} enemies: {times[0]:8.2f} ms -> {times[1]:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
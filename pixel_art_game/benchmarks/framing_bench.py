@@ -0,0 +1,78 @@
+# benchmarks/framing_bench.py
+
+"""Time FrameDecoder.feed on a stream of mixed binary and JSON messages.
+
+    python -m benchmarks.framing_bench --messages 300
+
+The same stream is fed in reads of several sizes, from a socket's worth
+at a time down to a few bytes, and must come out as the same frames
+whichever way it is cut.
+"""
+
+import argparse
+import random
+import time
+
+from common.codec import encode_message
+from common.framing import FrameDecoder, RECV_SIZE
+
+def world_update(seq):
+    players = {f"p{index}": {"id": f"p{index}", "x": index * 1.5, "y": 3.0, "health": 100,
+                             "name": f"player{index}",
+                             "inventory": [{"type": "potion", "id": f"item_{slot}"} for slot in range(20)]}
+               for index in range(12)}
+    return {"type": "update_state", "data": {"seq": seq, "keyframe": True, "players": players,
+                                             "enemies": [], "items": []}}
+
+def build_stream(count, rng):
+    messages = []
+    for seq in range(count):
+        roll = rng.random()
+        if roll < 0.2:
+            message = world_update(seq)
+        elif roll < 0.6:
+            message = {"type": "move", "data": {"dx": 5, "dy": 0, "seq": seq}}
+        else:
+            message = {"type": "pickup_result", "data": {"success": True, "item_type": "coin"}}
+        messages.append(encode_message(message, rng.choice(["binary", "json"])))
+    return b"".join(messages)
+
+def feed(stream, sizes):
+    """Every frame from stream, fed to a new decoder in reads of the given sizes in turn"""
+    decoder = FrameDecoder()
+    frames = []
+    position = 0
+    index = 0
+    while position < len(stream):
+        size = sizes[index % len(sizes)]
+        index += 1
+        frames += decoder.feed(stream[position:position + size])
+        position += size
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=0.5, help="time spent on each read size")
+    options = parser.parse_args()
+    rng = random.Random(1)
+
+    stream = build_stream(options.messages, rng)
+    print(f"{len(stream)} bytes in {options.messages} messages")
+    reference = feed(stream, [len(stream)])
+    for label, sizes in [("1 B reads", [1]),
+                         ("random 1-9000 B reads", [rng.randint(1, 9000) for _ in range(1000)])]:
+        assert feed(stream, sizes) == reference, label
+
+    for label, sizes in [("whole stream", [len(stream)]), (f"{RECV_SIZE // 1024} KiB reads", [RECV_SIZE]),
+                         ("4 KiB reads", [4096]), ("100 B reads", [100])]:
+        start = time.perf_counter()
+        runs = 0
+        while time.perf_counter() - start < options.seconds:
+            feed(stream, sizes)
+            runs += 1
+        seconds = (time.perf_counter() - start) / runs
+        print(f"{label:>14}: {len(stream) / seconds / 1e6:8.1f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/hud_bench.py
+
+"""Time the retained HUD against drawing it from scratch every frame.
+
+    python -m benchmarks.hud_bench --frames 600
+
+Drawing from scratch is what Game.render_hud did before client/hud.py:
+look the font up, render every label, scan the items for ones in reach
+and print the inventory, on every frame. The retained HUD looks for
+nearby items once per state update, taken here as every third frame
+(20 Hz updates at 60 fps), and only redraws its layer when a value
+changes. The two are also compared pixel by pixel over the grass.
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # no window needed
+import pygame
+
+from client.hud import Hud
+from client.item import create_item
+
+SCREEN_SIZE = (1100, 600)
+PICKUP_RANGE = 50
+FRAMES_PER_UPDATE = 3
+
+def nearby_items(items, player):
+    return [item for item in items if math.hypot(item.x - player['x'], item.y - player['y']) < PICKUP_RANGE]
+
+def draw_from_scratch(screen, weapon_type, player, items):
+    """render_hud as it was, apart from its items coming in as an argument"""
+    font = pygame.font.SysFont(None, 24)
+    text = font.render(f"Weapon: {weapon_type}", True, (255, 255, 255))
+    screen.blit(text, (10, 10))
+    if not player:
+        return
+    bar_width = 200
+    bar_height = 20
+    health_ratio = player['health'] / player['max_health']
+    pygame.draw.rect(screen, (255, 0, 0), (10, 10, bar_width, bar_height), border_radius=5)
+    pygame.draw.rect(screen, (0, 255, 0), (10, 10, bar_width * health_ratio, bar_height), border_radius=5)
+    mana_ratio = player['mana'] / player['max_mana']
+    pygame.draw.rect(screen, (0, 0, 60), (10, 40, bar_width, bar_height), border_radius=5)
+    pygame.draw.rect(screen, (0, 100, 255), (10, 40, bar_width * mana_ratio, bar_height), border_radius=5)
+    nearby = nearby_items(items, player)
+    if nearby:
+        screen.blit(font.render("Nearby items:", True, (255, 255, 255)), (10, 60))
+        for i, item in enumerate(nearby[:3]):
+            screen.blit(font.render(f"{i+1}. {item.type} ({item.value})", True, (255, 255, 255)), (10, 85 + i*25))
+            screen.blit(font.render("[E]", True, (255, 255, 0)), (200, 85 + i*25))
+    screen.blit(font.render("Inventory:", True, (255, 255, 255)), (10, 160))
+    for i, item in enumerate(player.get('inventory', [])):
+        screen.blit(font.render(f"{i+1}. {item['type']}", True, (255, 255, 255)), (10, 185 + i*25))
+    print("Inventory Data:", player.get('inventory', []))
+
+def make_items(count, player, rng):
+    """count items scattered about, the first three within the player's reach"""
+    types = ["potion", "mana_potion", "shield", "sword", "coin"]
+    items = []
+    for index in range(count):
+        if index < 3:
+            x, y = player['x'] + 10 * index, player['y']
+        else:
+            x, y = rng.uniform(0, 4000), rng.uniform(0, 4000)
+        items.append(create_item({"id": f"item_{index}", "type": types[index % len(types)],
+                                  "x": x, "y": y, "value": round(rng.uniform(0.1, 1.0), 1)}))
+    return items
+
+def time_frames(draw, frames, player, changing):
+    """Seconds per frame of draw(frame), with the player's health changing if asked"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for frame in range(frames):
+            if changing and player and frame % FRAMES_PER_UPDATE == 0:
+                player['health'] = 50 + frame // FRAMES_PER_UPDATE % 100
+            draw(frame)
+        return (time.perf_counter() - start) / frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--items", type=int, default=200, help="items on the map")
+    options = parser.parse_args()
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    grass = pygame.transform.scale(pygame.image.load("client/assets/map/terrain/grass.png").convert(), SCREEN_SIZE)
+
+    def player_state():
+        return {"x": 100, "y": 100, "health": 73, "max_health": 150, "mana": 41, "max_mana": 80,
+                "inventory": [{"type": "potion"}, {"type": "coin"}]}
+
+    for label, player, changing in [("no player yet", None, False),
+                                    ("player, nothing changing", player_state(), False),
+                                    ("player, health changing each update", player_state(), True)]:
+        items = make_items(options.items, player or player_state(), random.Random(1))
+        hud = Hud()
+        nearby = []
+
+        def retained(frame):
+            nonlocal nearby
+            if player and frame % FRAMES_PER_UPDATE == 0:
+                nearby = nearby_items(items, player)
+            hud.draw(screen, "sword", player, nearby)
+
+        screen.blit(grass, (0, 0))
+        with contextlib.redirect_stdout(io.StringIO()):
+            draw_from_scratch(screen, "sword", player, items)
+        before = pygame.image.tobytes(screen, "RGB")
+        screen.blit(grass, (0, 0))
+        retained(0)
+        after = pygame.image.tobytes(screen, "RGB")
+        differences = [abs(a - b) for a, b in zip(before, after) if a != b]
+
+        scratch = time_frames(lambda frame: draw_from_scratch(screen, "sword", player, items),
+                              options.frames, player, changing)
+        kept = time_frames(retained, options.frames, player, changing)
+        print(f"{label}: from scratch {scratch * 1000:.3f} ms, retained {kept * 1000:.3f} ms per frame, "
+              f"{hud.redraws} redraws in {options.frames + 1} frames; "
+              f"{len(differences)} channels differ, by at most {max(differences, default=0)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/render_bench.py
+
+"""Count blits and time Map.draw against drawing every tile each frame.
+
+    python -m benchmarks.render_bench --frames 300
+
+The view pans across each map as a walking player's would. Drawing tile
+by tile is what Map.draw did before it kept pre-rendered blocks; both
+must put the same pixels on the screen.
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # no window needed
+import pygame
+
+from client.map import Map
+from common.tilemap import ChunkedMap
+from server.config import MAP_FILE
+from server.game_state import IMPASSABLE_TILE_IDS
+
+SCREEN_SIZE = (1100, 600)
+
+class CountingScreen:
+    """Passes blits through to a surface, counting them"""
+    def __init__(self, surface):
+        self.surface = surface
+        self.blits = 0
+
+    def blit(self, *args, **kwargs):
+        self.blits += 1
+        return self.surface.blit(*args, **kwargs)
+
+    def get_size(self):
+        return self.surface.get_size()
+
+def draw_tiles(game_map, screen, view_x, view_y):
+    """Map.draw as it was: grass under every visible tile, then the rest"""
+    tile_size = game_map.tile_size
+    screen_width, screen_height = screen.get_size()
+    start_x = max(0, view_x // tile_size)
+    start_y = max(0, view_y // tile_size)
+    end_x = min(game_map.width, (view_x + screen_width) // tile_size + 1)
+    end_y = min(game_map.height, (view_y + screen_height) // tile_size + 1)
+    for y in range(start_y, end_y):
+        for x in range(start_x, end_x):
+            screen.blit(game_map.grass_texture, (x * tile_size - view_x, y * tile_size - view_y))
+    for y in range(start_y, end_y):
+        for x in range(start_x, end_x):
+            tile_id = game_map.tile(x, y)
+            if tile_id and tile_id in game_map.tile_textures:
+                screen.blit(game_map.tile_textures[tile_id], (x * tile_size - view_x, y * tile_size - view_y))
+
+def random_world(size, seed=1):
+    rng = random.Random(seed)
+    layout = [[rng.choice([0] * 6 + list(range(1, 13))) for _ in range(size)] for _ in range(size)]
+    return ChunkedMap.from_layout(layout, IMPASSABLE_TILE_IDS)
+
+def client_map(world):
+    """A client Map holding every chunk of world, as if all had arrived"""
+    game_map = Map()
+    game_map.load_info(world.info_message())
+    for chunk_y in range(world.chunks_y):
+        for chunk_x in range(world.chunks_x):
+            game_map.load_chunk(world.chunk_message(chunk_x, chunk_y))
+    return game_map
+
+def pan(world, frames):
+    """View positions for each frame, walking about the map"""
+    max_x = max(1, world.width * 64 - SCREEN_SIZE[0])
+    max_y = max(1, world.height * 64 - SCREEN_SIZE[1])
+    return [(int(max_x / 2 + max_x / 2 * math.sin(frame / 40)), (100 + frame * 2) % max_y)
+            for frame in range(frames)]
+
+def per_frame(draw, views):
+    """(blits, seconds) per frame of draw(screen, view_x, view_y)"""
+    screen = CountingScreen(pygame.display.get_surface())
+    draw(screen, *views[0])  # anything built on first use is not counted
+    screen.blits = 0
+    start = time.perf_counter()
+    for view_x, view_y in views:
+        draw(screen, view_x, view_y)
+    return screen.blits / len(views), (time.perf_counter() - start) / len(views)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    options = parser.parse_args()
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE)
+
+    for name, world in [("default map", ChunkedMap.open(MAP_FILE, IMPASSABLE_TILE_IDS)),
+                        ("random 256x256", random_world(256))]:
+        game_map = client_map(world)
+        views = pan(world, options.frames)
+        before = pygame.Surface(SCREEN_SIZE)
+        after = pygame.Surface(SCREEN_SIZE)
+        for view_x, view_y in views[::37]:
+            before.fill((0, 0, 0))
+            after.fill((0, 0, 0))
+            draw_tiles(game_map, before, view_x, view_y)
+            game_map.draw(after, view_x, view_y)
+            assert pygame.image.tobytes(before, "RGB") == pygame.image.tobytes(after, "RGB"), (view_x, view_y)
+
+        tile_blits, tile_time = per_frame(lambda *args: draw_tiles(game_map, *args), views)
+        block_blits, block_time = per_frame(game_map.draw, views)
+        print(f"{name} ({world.width}x{world.height}): tile by tile {tile_blits:.0f} blits, "
+              f"{tile_time * 1000:.2f} ms per frame; blocks {block_blits:.1f} blits, "
+              f"{block_time * 1000:.2f} ms per frame")
+
+if __name__ == "__main__":
+    main()
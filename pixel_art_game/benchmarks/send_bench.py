@@ -0,0 +1,80 @@
+# benchmarks/send_bench.py
+
+"""Time send_updates with many clients and entities, without the network.
+
+    python -m benchmarks.send_bench --clients 200 --groups 20 --enemies 2000
+
+Players stand in groups spread over a large area, so clients in the same
+group see the same entities. Every client acknowledges each update, as a
+real client would, and what is queued for it is thrown away.
+"""
+
+import argparse
+import random
+import socket
+import time
+
+from server import network
+from server.network import ClientConnection, clients, game_state, send_updates, tick_stats
+
+def tcp_pair(listener):
+    """Two ends of a loopback TCP connection, as the server's sockets are"""
+    other = socket.create_connection(listener.getsockname())
+    sock, _ = listener.accept()
+    return sock, other
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--enemies", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=8000, help="pixels across the area used")
+    parser.add_argument("--sends", type=int, default=100)
+    options = parser.parse_args()
+    rng = random.Random(1)
+
+    for index in range(options.enemies):
+        game_state.add_enemy({"id": f"bench_{index}", "type": "goblin",
+                              "x": rng.uniform(0, options.size), "y": rng.uniform(0, options.size),
+                              "speed": 1.0, "health": 100, "damage": 5, "last_hit_time": 0})
+    groups = [(rng.uniform(0, options.size), rng.uniform(0, options.size))
+              for _ in range(options.groups)]
+    listener = socket.create_server(("127.0.0.1", 0))
+    sockets = []
+    for index in range(options.clients):
+        sock, other = tcp_pair(listener)
+        sockets.append(other)
+        client = ClientConnection(sock, ("bench", index))
+        client.codec = "binary"
+        clients.append(client)
+        game_state.add_player(client.player_id, f"bench{index}", "Warrior")
+        player = game_state.players[client.player_id]
+        player["x"], player["y"] = groups[index % options.groups]
+
+    enemies = list(game_state.enemies)
+    durations = []
+    payloads = 0
+    for _ in range(options.sends):
+        # Some enemies move every tick, so the deltas have something in them
+        for enemy in rng.sample(enemies, len(enemies) // 10):
+            enemy["x"] += rng.uniform(-5, 5)
+            enemy["y"] += rng.uniform(-5, 5)
+            game_state.enemies.update(enemy)
+        start = time.perf_counter()
+        send_updates()
+        durations.append(time.perf_counter() - start)
+        payloads += tick_stats["payloads"]
+        for client in clients:
+            while client.outbox.take():
+                pass  # until it reports empty, as a writer that keeps up would
+            client.replication.acknowledge(tick_stats["tick"])
+
+    durations.sort()
+    print(f"{options.clients} clients in {options.groups} groups, {len(enemies)} enemies: "
+          f"send_updates p50 {durations[len(durations) // 2] * 1000:.2f} ms, "
+          f"p99 {durations[int(len(durations) * 0.99)] * 1000:.2f} ms, "
+          f"{payloads / options.sends:.1f} payloads encoded per send "
+          f"(AOI {'on' if network.AOI_ENABLED else 'off'})")
+
+if __name__ == "__main__":
+    main()
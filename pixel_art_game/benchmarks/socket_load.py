@@ -0,0 +1,137 @@
+# benchmarks/socket_load.py
+
+"""Hold hundreds of connections on a running server and measure its updates.
+
+    python -m server.main --mode asyncio &
+    python -m benchmarks.socket_load --sockets 300 --duration 30
+
+Each socket joins and, if --spread is given, walks off in a direction of
+its own for that long, so the players are not all in each other's view.
+Then it stands still and only reads: it acknowledges every update_state,
+as a client does, so the server keeps sending deltas. One of them pings
+once a second for the server's own tick numbers. Unlike client.bot
+nothing moves while measuring, so the load is the connections, not the
+game. The sockets ask for the JSON codec, which decodes in C: with the
+binary one a single load process spends its time decoding, not reading.
+
+Run the server on a machine, or at least a core, of its own; sharing
+one with this script roughly halves what it can send.
+"""
+
+import argparse
+import math
+import random
+import selectors
+import socket
+import time
+
+from client.bot import BOT_SPEED, BOT_TICK, percentile
+from client.network import HOST, PORT
+from common.codec import encode_message, decode_message
+from common.framing import FrameDecoder
+
+class LoadSocket:
+    def __init__(self, index, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.decoder = FrameDecoder()
+        self.codec = "json"
+        self.updates = []  # arrival times of update_state messages
+        self.move_seq = 0
+        self.pong = None
+        self.send({"type": "join", "data": {"name": f"load{index}", "avatar": "Warrior",
+                                            "hero_class": "warrior", "codecs": ["json"]}})
+
+    def send(self, message):
+        self.sock.sendall(encode_message(message, self.codec))
+
+    def walk(self, angle):
+        self.move_seq += 1
+        self.send({"type": "move", "data": {"dx": round(math.cos(angle) * BOT_SPEED * BOT_TICK),
+                                            "dy": round(math.sin(angle) * BOT_SPEED * BOT_TICK),
+                                            "seq": self.move_seq}})
+
+    def receive(self, now):
+        """Handle what has arrived; False once the server has closed the connection"""
+        try:
+            frames = self.decoder.recv_from(self.sock)
+            if frames is None:
+                return False
+            for binary, frame in frames:
+                message = decode_message(frame, binary)
+                message_type = message["type"]
+                data = message["data"]
+                if message_type == "update_state":
+                    self.updates.append(now)
+                    self.send({"type": "state_ack", "data": {"seq": data["seq"]}})
+                elif message_type == "join_ack":
+                    self.codec = data.get("codec", "json")
+                elif message_type == "pong":
+                    self.pong = data
+        except ConnectionError:
+            return False
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--sockets", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to measure once all are in")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which the sockets connect")
+    parser.add_argument("--spread", type=float, default=0.0, help="seconds spent walking apart after that")
+    options = parser.parse_args()
+    rng = random.Random(1)
+
+    selector = selectors.DefaultSelector()
+    sockets = []
+    walking = []  # (socket, direction) of the ones still open
+    began = now = time.monotonic()
+    connect_interval = options.ramp / options.sockets
+    stop_walking = began + options.ramp + options.spread
+    # Let the last moves and keyframes settle before measuring
+    start = stop_walking + 2.0
+    end = start + options.duration
+    next_step = 0
+    next_ping = start
+    closed = 0
+    while now < end:
+        # Keep reading while connecting, or the first sockets fall behind
+        while len(sockets) < options.sockets and now >= began + connect_interval * len(sockets):
+            load = LoadSocket(len(sockets), options.host, options.port)
+            selector.register(load.sock, selectors.EVENT_READ, load)
+            sockets.append(load)
+            walking.append((load, rng.uniform(0, 2 * math.pi)))
+        if now < stop_walking and now >= next_step:
+            for load, angle in walking:
+                load.walk(angle)
+            next_step = now + BOT_TICK
+        if now >= next_ping:
+            sockets[0].send({"type": "ping", "data": {"time": now}})
+            next_ping = now + 1.0
+        for key, _ in selector.select(timeout=BOT_TICK):
+            if not key.data.receive(now):
+                selector.unregister(key.fileobj)
+                walking = [(load, angle) for load, angle in walking if load is not key.data]
+                closed += 1
+        now = time.monotonic()
+
+    gaps = []
+    rates = []
+    for load in sockets:
+        arrivals = [arrival for arrival in load.updates if arrival >= start]
+        gaps += [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+        rates.append(len(arrivals) / options.duration)
+        load.sock.close()
+    rates.sort()
+    print(f"{options.sockets} sockets, {closed} closed by the server, over {options.duration:.0f} s")
+    print(f"Updates per socket: p50 {percentile(rates, 50):.1f}/s, lowest {rates[0]:.1f}/s; "
+          f"gap p50 {percentile(gaps, 50) * 1000:.1f} ms, p99 {percentile(gaps, 99) * 1000:.1f} ms, "
+          f"max {max(gaps, default=0) * 1000:.0f} ms")
+    pong = sockets[0].pong
+    if pong:
+        print(f"Server ticks: p50 {pong['tick_p50']:.2f} ms, p99 {pong['tick_p99']:.2f} ms, "
+              f"{pong['overruns']} overruns, {pong['skipped']} skipped, {pong['clients']} clients")
+
+if __name__ == "__main__":
+    main()
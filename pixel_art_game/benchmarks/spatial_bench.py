@@ -0,0 +1,97 @@
+# benchmarks/spatial_bench.py
+
+"""Time SpatialHash lookups against scanning a list, as GameState used to.
+
+    python -m benchmarks.spatial_bench --enemies 1000 5000 20000
+
+Enemies are spread at random over a square of --tiles tiles a side. Each
+query is checked to give the same answer both ways before it is timed.
+"""
+
+import argparse
+import math
+import random
+import time
+
+from server.spatial import SpatialHash
+
+TILE_SIZE = 64
+
+def scan_get(entities, entity_id):
+    for entity in entities:
+        if entity["id"] == entity_id:
+            return entity
+    return None
+
+def scan_radius(entities, x, y, radius):
+    return [entity for entity in entities if math.hypot(entity["x"] - x, entity["y"] - y) <= radius]
+
+def scan_nearest(entities, x, y):
+    return min(entities, key=lambda entity: math.hypot(entity["x"] - x, entity["y"] - y))
+
+def per_query(function, queries, seconds):
+    """Seconds per call of function(*query), cycling through queries"""
+    start = time.perf_counter()
+    calls = 0
+    while time.perf_counter() - start < seconds:
+        for query in queries:
+            function(*query)
+        calls += len(queries)
+    return (time.perf_counter() - start) / calls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--enemies", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--tiles", type=int, default=300, help="tiles along each side of the area")
+    parser.add_argument("--radius", type=float, default=100, help="as a fireball's")
+    parser.add_argument("--seconds", type=float, default=0.3, help="time spent on each measurement")
+    options = parser.parse_args()
+    size = options.tiles * TILE_SIZE
+
+    print(f"{options.tiles}x{options.tiles} tiles, microseconds per query, list scan -> SpatialHash")
+    for count in options.enemies:
+        rng = random.Random(count)
+        entities = [{"id": f"enemy_{index}", "x": rng.uniform(0, size), "y": rng.uniform(0, size)}
+                    for index in range(count)]
+        grid = SpatialHash(TILE_SIZE)
+        for entity in entities:
+            grid.add(entity)
+
+        ids = [(rng.choice(entities)["id"],) for _ in range(200)]
+        points = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(200)]
+        radius_queries = [(x, y, options.radius) for x, y in points]
+        for (entity_id,) in ids:
+            assert grid.get(entity_id) is scan_get(entities, entity_id)
+        for x, y, radius in radius_queries:
+            assert ({entity["id"] for entity in grid.query_radius(x, y, radius)} ==
+                    {entity["id"] for entity in scan_radius(entities, x, y, radius)})
+        for x, y in points:
+            found = grid.nearest(x, y)
+            expected = scan_nearest(entities, x, y)
+            assert math.isclose(math.hypot(found["x"] - x, found["y"] - y),
+                                math.hypot(expected["x"] - x, expected["y"] - y))
+
+        results = []
+        for scan, indexed, queries in [(lambda entity_id: scan_get(entities, entity_id), grid.get, ids),
+                                       (lambda x, y, radius: scan_radius(entities, x, y, radius),
+                                        grid.query_radius, radius_queries),
+                                       (lambda x, y: scan_nearest(entities, x, y), grid.nearest, points)]:
+            results.append((per_query(scan, queries, options.seconds) * 1e6,
+                            per_query(indexed, queries, options.seconds) * 1e6))
+
+        # What update_enemies pays to keep the grid current as enemies move
+        moves = [(rng.choice(entities), rng.uniform(-3, 3), rng.uniform(-3, 3)) for _ in range(1000)]
+        start = time.perf_counter()
+        for entity, dx, dy in moves:
+            entity["x"] += dx
+            entity["y"] += dy
+            grid.update(entity)
+        update = (time.perf_counter() - start) / len(moves) * 1e6
+
+        (id_scan, id_grid), (radius_scan, radius_grid), (nearest_scan, nearest_grid) = results
+        print(f"{count:>7} enemies: id {id_scan:.1f} -> {id_grid:.2f}, "
+              f"radius({options.radius:g}) {radius_scan:.0f} -> {radius_grid:.1f}, "
+              f"nearest {nearest_scan:.0f} -> {nearest_grid:.0f}, update after a move {update:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,60 @@
 # animation.py
 import pygame
 
-class Animation:
-    def __init__(self, spritesheet, frame_width, frame_height, frame_count, frame_duration):
-        self.frames = []
-        self.frame_duration = frame_duration
-        self.elapsed_time = 0
-        self.current_frame = 0
-        
-        sheet_width = spritesheet.get_width()
-        sheet_height = spritesheet.get_height()
-        
-        max_frames = min(frame_count, sheet_width // frame_width)
-        
-        if max_frames == 0:
-            print(f"Warning: Frame width {frame_width} exceeds sheet width {sheet_width}")
-            # Create a dummy frame to avoid crashes
-            self.frames.append(pygame.Surface((frame_width, frame_height), pygame.SRCALPHA))
-        else:
-            for i in range(max_frames):
-                # Ensure we don't exceed sheet boundaries
-                if (i * frame_width) + frame_width <= sheet_width:
-                    frame = spritesheet.subsurface((i * frame_width, 0, frame_width, frame_height))
-                    self.frames.append(frame)
-                else:
-                    print(f"Warning: Frame {i} exceeds sheet boundaries")
-        
-        if not self.frames:
-            self.frames.append(pygame.Surface((frame_width, frame_height), pygame.SRCALPHA))
-
-    def update(self, dt):
-        self.elapsed_time += dt
-        if self.elapsed_time >= self.frame_duration:
-            self.current_frame = (self.current_frame + 1) % len(self.frames)
-            self.elapsed_time = 0
-
-    def get_frame(self):
-        return self.frames[self.current_frame]
\ No newline at end of file
+FRAME_WIDTH = 150
+FRAME_HEIGHT = 150
+# Frames in the sprite sheet of each animation state
+STATE_FRAMES = {
+    "idle": 4,
+    "run": 8,
+    "attack": 8,
+    "death": 4,
+}
+
+def cut_frames(spritesheet, frame_width, frame_height, frame_count):
+    """Copy the frames of a one row sprite sheet into their own surfaces"""
+    frames = []
+    sheet_width = spritesheet.get_width()
+    max_frames = min(frame_count, sheet_width // frame_width)
+
+    if max_frames == 0:
+        print(f"Warning: Frame width {frame_width} exceeds sheet width {sheet_width}")
+    for i in range(max_frames):
+        frames.append(spritesheet.subsurface((i * frame_width, 0, frame_width, frame_height)).copy())
+
+    if not frames:
+        # A blank frame so drawing never fails
+        frames.append(pygame.Surface((frame_width, frame_height), pygame.SRCALPHA))
+    return frames
+
+class FrameBank:
+    """Animation frames shared by every hero and enemy.
+
+    Frames are keyed by (sprite base path, state, flip) and cut from
+    "<sprite base path>/<state>.png" the first time they are asked for;
+    flipped frames are mirrored once from the unflipped ones. Entities only
+    keep a frame index and timer, so drawing one is a lookup and a blit.
+    Needs a display mode to be set, since sheets are converted for it.
+    """
+    def __init__(self):
+        self.frames = {}  # (sprite base path, state, flip) -> [Surface]
+
+    def get(self, sprite_base_path, state, flip=False):
+        key = (sprite_base_path, state, flip)
+        frames = self.frames.get(key)
+        if frames is None:
+            if flip:
+                frames = [pygame.transform.flip(frame, True, False)
+                          for frame in self.get(sprite_base_path, state)]
+            else:
+                path = f"{sprite_base_path}/{state}.png"
+                try:
+                    sheet = pygame.image.load(path).convert_alpha()
+                except Exception as e:
+                    print(f"Failed to load {path}: {e}")
+                    sheet = pygame.Surface((0, FRAME_HEIGHT), pygame.SRCALPHA)
+                frames = cut_frames(sheet, FRAME_WIDTH, FRAME_HEIGHT, STATE_FRAMES[state])
+            self.frames[key] = frames
+        return frames
+
+frame_bank = FrameBank()
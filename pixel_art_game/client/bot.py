@@ -0,0 +1,251 @@
+# client/bot.py
+
+"""Headless bots and a load generator for the game server.
+
+    python -m client.bot --bots 100 --processes 4 --duration 60
+
+Each bot is a NetworkClient with no window: it joins, wanders about,
+attacks enemies in reach and picks up items, and pings the server once
+a second. At the end the bots' numbers are added up and printed.
+"""
+
+import argparse
+import math
+import multiprocessing
+import random
+import time
+
+from .network import NetworkClient, SnapshotHistory, HOST, PORT
+
+BOT_TICK = 1 / 30  # seconds between bot steps, and so between move messages
+BOT_SPEED = 300  # pixels per second, as a player holding an arrow key at 60 fps
+TURN_TIME = (1.0, 3.0)  # seconds a bot keeps to one direction, at random in between
+ATTACK_RANGE = 50
+ATTACK_DAMAGE = 20
+ATTACK_INTERVAL = 1.25  # a sword's cooldown
+PICKUP_RANGE = 50  # as checked by the server
+PING_INTERVAL = 1.0
+HERO_CLASSES = ["warrior", "mage", "archer"]
+
+class BotMap:
+    """Takes the map messages for a bot; bots leave collisions to the server"""
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.chunks = 0
+
+    def load_info(self, data):
+        self.width = data["width"]
+        self.height = data["height"]
+
+    def load_chunk(self, data):
+        self.chunks += 1
+
+class Bot:
+    def __init__(self, name, hero_class, host=HOST, port=PORT):
+        self.player = None  # no hero of our own to keep up to date
+        self.map = BotMap()
+        self.snapshots = SnapshotHistory()
+        self.world = None
+        self.direction = (0, 0)
+        self.next_turn = 0
+        self.next_attack = 0
+        self.next_ping = 0
+        self.move_seq = 0
+        self.pickups_sent = set()  # item ids, so each is asked for once
+        self.items_picked = 0
+        self.last_update = None
+        self.update_gaps = []  # seconds between update_state arrivals
+        self.started = time.monotonic()
+        self.network = NetworkClient(host, port, self, name, hero_class.capitalize(), hero_class)
+
+    def update_state(self, data):
+        world = self.snapshots.apply(data)
+        if world is None:
+            return False
+        self.world = world
+        now = self.network.received_at
+        if self.last_update is not None:
+            self.update_gaps.append(now - self.last_update)
+        self.last_update = now
+        return True
+
+    def picked_up(self, item_type):
+        self.items_picked += 1
+
+    def step(self, now, dt):
+        """Handle what has arrived, then act once"""
+        network = self.network
+        while not network.message_queue.empty():
+            network.handle_message(*network.message_queue.get())
+        if now >= self.next_ping:
+            network.ping()
+            self.next_ping = now + PING_INTERVAL
+
+        if self.world is None:
+            return
+        player = self.world["players"].get(network.player_id)
+        if player is None or player.get("state") == "dead":
+            return
+        self.wander(now, dt)
+        self.attack(now, player)
+        self.pickup(player)
+
+    def wander(self, now, dt):
+        if now >= self.next_turn:
+            if random.random() < 0.2:
+                self.direction = (0, 0)
+            else:
+                angle = random.uniform(0, 2 * math.pi)
+                self.direction = (math.cos(angle), math.sin(angle))
+            self.next_turn = now + random.uniform(*TURN_TIME)
+        dx = round(self.direction[0] * BOT_SPEED * dt)
+        dy = round(self.direction[1] * BOT_SPEED * dt)
+        if dx or dy:
+            self.move_seq += 1
+            self.network.send({"type": "move", "data": {"dx": dx, "dy": dy, "seq": self.move_seq}})
+
+    def attack(self, now, player):
+        if now < self.next_attack:
+            return
+        target = nearest(self.world["enemies"].values(), player, ATTACK_RANGE)
+        if target is not None:
+            self.network.send({"type": "attack_enemy",
+                               "data": {"enemy_id": target["id"], "damage": ATTACK_DAMAGE}})
+            self.next_attack = now + ATTACK_INTERVAL
+
+    def pickup(self, player):
+        items = [item for item in self.world["items"].values() if item["id"] not in self.pickups_sent]
+        item = nearest(items, player, PICKUP_RANGE)
+        if item is not None:
+            self.pickups_sent.add(item["id"])
+            self.network.send({"type": "pickup", "data": {"item_id": item["id"]}})
+
+    def report(self):
+        """What this bot saw, in plain types so it can go between processes"""
+        network = self.network
+        return {
+            "connected": network.player_id is not None,
+            "seconds": time.monotonic() - self.started,
+            "bytes": network.decoder.received,
+            "stats": dict(network.stats),
+            "rtts": list(network.rtts),
+            "update_gaps": self.update_gaps,
+            "server": network.server_stats,
+            "items_picked": self.items_picked,
+        }
+
+def nearest(entities, player, reach):
+    """The entity closest to the player within reach, or None"""
+    best = None
+    best_distance = reach
+    for entity in entities:
+        distance = math.hypot(entity["x"] - player["x"], entity["y"] - player["y"])
+        if distance <= best_distance:
+            best = entity
+            best_distance = distance
+    return best
+
+def run_bots(first, count, options, results):
+    """Run bots first..first+count-1 in this process and put their reports on results"""
+    start = time.monotonic()
+    join_interval = options.ramp / max(1, count)
+    end = start + options.ramp + options.duration
+    waiting = list(range(first, first + count))
+    bots = []
+
+    last = start
+    while True:
+        now = time.monotonic()
+        if now >= end:
+            break
+        # Bots join one at a time over the ramp while the others carry on
+        if waiting and now >= start + join_interval * (count - len(waiting)):
+            index = waiting.pop(0)
+            try:
+                bots.append(Bot(f"bot{index}", HERO_CLASSES[index % len(HERO_CLASSES)],
+                                options.host, options.port))
+            except OSError as e:
+                print(f"bot{index} could not connect: {e}")
+        for bot in bots:
+            bot.step(now, now - last)
+        last = now
+        time.sleep(max(0.0, now + BOT_TICK - time.monotonic()))
+
+    for bot in bots:
+        bot.network.close()
+    results.put([bot.report() for bot in bots])
+
+def percentile(samples, point):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * point / 100))]
+
+def summarize(reports, options):
+    connected = [report for report in reports if report["connected"]]
+    print(f"Bots: {len(connected)} of {options.bots} joined, over {options.duration:.0f} s "
+          f"after a {options.ramp:.0f} s ramp")
+    if not connected:
+        return
+
+    # The latest pong has the server's most recent view of its ticks
+    server = max((report["server"] for report in connected),
+                 key=lambda stats: stats.get("ticks", 0))
+    if server:
+        print(f"Server ticks: p50 {server['tick_p50']:.2f} ms, p99 {server['tick_p99']:.2f} ms, "
+              f"{server['overruns']} overruns, {server['skipped']} skipped, "
+              f"{server['clients']} clients")
+
+    gaps = [gap for report in connected for gap in report["update_gaps"]]
+    updates = sum(report["stats"]["updates"] for report in connected)
+    seconds = sum(report["seconds"] for report in connected)
+    print(f"Updates: {updates / seconds:.1f}/s per bot, gap p50 {percentile(gaps, 50) * 1000:.1f} ms, "
+          f"p99 {percentile(gaps, 99) * 1000:.1f} ms, max {max(gaps, default=0) * 1000:.0f} ms")
+
+    rtts = [rtt for report in connected for rtt in report["rtts"]]
+    unanswered = sum(report["stats"]["pings"] - report["stats"]["pongs"] for report in connected)
+    print(f"Round trip: p50 {percentile(rtts, 50) * 1000:.1f} ms, p99 {percentile(rtts, 99) * 1000:.1f} ms, "
+          f"{unanswered} pings unanswered at exit")
+
+    received = sum(report["bytes"] for report in connected)
+    longest = max(report["seconds"] for report in connected)
+    print(f"Received: {received / longest / 1e6:.2f} MB/s in all, "
+          f"{received / seconds / 1e3:.1f} KB/s per bot")
+
+    missed = sum(report["stats"]["updates_missed"] for report in connected)
+    rejected = sum(report["stats"]["updates_rejected"] for report in connected)
+    print(f"Dropped: {missed} updates skipped by the server, {rejected} deltas without a baseline "
+          f"({updates} received)")
+    print(f"Items picked up: {sum(report['items_picked'] for report in connected)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the game server with headless bots")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--bots", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run once all bots are in")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which the bots join")
+    options = parser.parse_args()
+
+    results = multiprocessing.Queue()
+    processes = []
+    per_process, extra = divmod(options.bots, options.processes)
+    first = 0
+    for index in range(options.processes):
+        count = per_process + (index < extra)
+        process = multiprocessing.Process(target=run_bots, args=(first, count, options, results))
+        process.start()
+        processes.append(process)
+        first += count
+
+    reports = []
+    for _ in processes:
+        reports.extend(results.get())
+    for process in processes:
+        process.join()
+    summarize(reports, options)
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,16 @@ import pygame
 import random
 import math
 
-from .animation import Animation
-
-_enemy_animation_cache = {}
+from .animation import frame_bank
 
 class Enemy:
+    # Seconds each frame of an animation state is shown
+    frame_durations = {
+        "idle": 0.2,
+        "run": 0.1,
+        "attack": 0.05,
+    }
+
     def __init__(self, enemy_data):
         self.id = enemy_data['id']
         self.type = enemy_data['type']
@@ -24,47 +29,18 @@ class Enemy:
         self.is_moving = False
         self.last_damage_time = 0
         self.damage_flash_duration = 0.2
-        self.animations = {}
         self.flip = False
-        self.current_animation = None
+        self.frame_index = 0
+        self.frame_time = 0
         if not hasattr(self, 'sprite_base_path'):
             self.sprite_base_path = "client/assets/enemies/goblin"
-        self._init_animations()
-        self.change_state("idle")
-
-    def _init_animations(self):
-        anim_paths = {
-            "idle": f"{self.sprite_base_path}/idle.png",
-            "run": f"{self.sprite_base_path}/run.png",
-            "attack": f"{self.sprite_base_path}/attack.png",
-        }
-
-        animation_specs = {
-            "idle": (4, 0.2),
-            "run": (8, 0.1),
-            "attack": (8, 0.05),
-        }
-
-        for state, path in anim_paths.items():
-            try:
-                sprite_sheet = _enemy_animation_cache.get(path)
-                if not sprite_sheet:
-                    sprite_sheet = pygame.image.load(path).convert_alpha()
-                    _enemy_animation_cache[path] = sprite_sheet
-            except Exception as e:
-                print(f"Failed to load {path}: {e}")
-                sprite_sheet = pygame.Surface((64, 64), pygame.SRCALPHA)
-            
-            frames, duration = animation_specs[state]
-            self.animations[state] = Animation(sprite_sheet, 150, 150, frames, duration)
 
     def change_state(self, new_state):
-        if new_state in self.animations:
+        if new_state in self.frame_durations:
             if self.state != new_state:
                 self.state = new_state
-                self.current_animation = self.animations[new_state]
-                self.current_animation.current_frame = 0
-                self.current_animation.elapsed_time = 0
+                self.frame_index = 0
+                self.frame_time = 0
         else:
             print(f"Warning: Missing animation state {new_state} for {self.type}")
 
@@ -76,17 +52,17 @@ class Enemy:
             self.change_state("run")
         elif not self.has_moved and self.state != "idle":
             self.change_state("idle")
-        if self.current_animation:
-            self.current_animation.update(dt)
+        self.frame_time += dt
+        if self.frame_time >= self.frame_durations[self.state]:
+            frame_count = len(frame_bank.get(self.sprite_base_path, self.state))
+            self.frame_index = (self.frame_index + 1) % frame_count
+            self.frame_time = 0
 
     def draw(self, screen, view_x=0, view_y=0):
         screen_x = self.x - view_x
         screen_y = self.y - view_y
-        current_frame = self.animations[self.state].get_frame()
-        if self.flip:
-            current_frame = pygame.transform.flip(current_frame, True, False)
+        current_frame = frame_bank.get(self.sprite_base_path, self.state, self.flip)[self.frame_index]
         screen.blit(current_frame, (screen_x, screen_y))
-        sprite_height = current_frame.get_height()
         self.draw_health_bar(screen, screen_x + 30, screen_y + 40)
 
     def draw_health_bar(self, screen, x, y):
@@ -1,108 +1,29 @@
 # client/game.py
 
 import pygame
-import socket
 import threading
-import json
 import math
 import time
-import queue
+from collections import deque
 
+from common.movement import apply_move
+from .network import NetworkClient, SnapshotHistory, HOST, PORT
 from .map import Map
 from .weapon import Weapon
 from .item import create_item
 from .enemy import create_enemy
 from .hero import create_hero
-
-HOST = '127.0.0.1'
-PORT = 5555
-
-class NetworkClient:
-    def __init__(self, host, port, game, username, avatar, hero_class):
-        self.host = host
-        self.port = port
-        self.game = game
-        self.username = username
-        self.avatar = avatar
-        self.player_id = None
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.connect((self.host, self.port))
-        self.running = True
-        self.message_queue = queue.Queue()
-        threading.Thread(target=self.receive_loop, daemon=True).start()
-        self.hero_class = hero_class
-        self.send({"type": "join", "data": {"name": self.username, "avatar": self.avatar, "hero_class": self.hero_class}})
-
-    def send(self, message):
-        if not self.sock or self.sock.fileno() == -1:
-            return
-        try:
-            self.sock.sendall((json.dumps(message) + "\n").encode())
-        except (BrokenPipeError, OSError) as e:
-            print("Connection closed:", e)
-            self.close()
-
-    def receive_loop(self):
-        try:
-            while self.running:
-                data = self.sock.recv(4096)
-                if not data:
-                    break
-                messages = data.decode().split('\n')
-                for msg in messages:
-                    if msg.strip():
-                        self.message_queue.put(msg.strip())
-        except (ConnectionResetError, TimeoutError) as e:
-            print(f"Connection error: {e}")
-        except Exception as e:
-            print(f"Receive error: {e}")
-        finally:
-            self.close()
-
-    def handle_message(self, message):
-        message_type = message.get("type")
-        data = message.get("data", {})
-
-        if message_type == "health_update":
-            player_id = data['player_id']
-            new_health = data['health']
-            update_source = data.get("source", "damage")
-            
-            if player_id == self.player_id and self.game.player:
-                prev_health = self.game.player.health
-                
-                self.game.player.health = new_health    
-                                
-        if message_type == "update_state":
-            self.game.update_state(data)
-
-        elif message_type == "pickup_result": 
-            if data.get("success"):
-                item_type = message['data'].get('item_type')
-                print(f"Successfully picked up {item_type}!")
-                
-                player = self.game.state['players'].get(self.player_id)
-                if player:
-                    from .item import create_item
-                    item_data = {"type": item_type, "id": "", "x": 0, "y": 0, "value": 0.5}
-                    item = create_item(item_data)
-                    result = item.use(player)
-                    print(f"Item use result: {result}")
-                    print(f"Player health after use: {player.get('health')}")
-
-        elif message_type == "join_ack":
-            self.player_id = data.get("player_id")
-            print(f"Received player ID: {self.player_id}")
-
-        elif message_type == "special_result":
-            success = data.get("success", False)   
-            message_text = data.get("message", "")
-            print(f"Special ability used: {message_text} (Success: {success})")
-
-    def close(self):
-        self.running = False
-        self.send({"type": "leave", "data": {}})
-        self.sock.close()
+from .hud import Hud
+from .interpolation import SnapshotBuffer
+
+# Seconds players and enemies are drawn behind the newest server state, so
+# there is a later state to move towards; at least the server's update
+# interval plus some jitter
+INTERPOLATION_DELAY = 0.1
+MOVE_SPEED = 5  # pixels per frame an arrow key is held
+# Seconds between move messages; each carries the movement of every frame
+# since the last one. Matches the server tick; 0 sends one every frame.
+MOVE_SEND_INTERVAL = 1 / 30
 
 class Game:
     def __init__(self, username, avatar, hero_class):
@@ -113,6 +34,7 @@ class Game:
         self.clock = pygame.time.Clock()
         self.running = True
         self.state = {"players": {}, "enemies": [], "items": []}
+        self.snapshots = SnapshotHistory()
         self.username = username
         self.avatar = avatar
         self.hero_class = hero_class
@@ -124,8 +46,20 @@ class Game:
         self.view_y = 0
         self.weapon = Weapon("sword")
         self.items = []
+        self.nearby_items = []  # items in pickup range, found once per update
         self.enemies = []
         self.players = {}
+        self.hud = Hud()
+        self.interpolation = SnapshotBuffer(INTERPOLATION_DELAY)
+        self.positions = {}  # (category, id) -> interpolated (x, y) for this frame
+        # Our own moves are applied as they are sent and replayed on top of
+        # each state from the server until it has applied them too
+        self.move_seq = 0
+        self.pending_moves = deque()  # (seq, dx, dy) not yet in a server state
+        self.unsent_dx = 0  # movement of the frames since the last move message
+        self.unsent_dy = 0
+        self.next_move_send = 0
+        self.predicted = None  # our position with the pending moves applied
 
         self.last_attack_time = 0
         self.attack_cooldown = 1.0  
@@ -135,24 +69,39 @@ class Game:
         
     def process_network_messages(self):
         while not self.network.message_queue.empty():
-            msg = self.network.message_queue.get()
-            message = json.loads(msg)
-            self.network.handle_message(message)
+            received_at, message = self.network.message_queue.get()
+            self.network.handle_message(received_at, message)
             
+    def picked_up(self, item_type):
+        print(f"Successfully picked up {item_type}!")
+
+        player = self.state['players'].get(self.network.player_id)
+        if player:
+            item_data = {"type": item_type, "id": "", "x": 0, "y": 0, "value": 0.5}
+            item = create_item(item_data)
+            result = item.use(player)
+            print(f"Item use result: {result}")
+            print(f"Player health after use: {player.get('health')}")
+
     def update_state(self, state):
+        """Apply an update_state message; returns True if it was applied"""
         with self.lock:
-            self.state["players"] = state.get("players", {})
+            world = self.snapshots.apply(state)
+            if world is None:
+                return False
+            self.state["players"] = world["players"]
+            # When it arrived, not when the queue was drained, which waits for a frame
+            self.interpolation.add(state.get("time"), world, self.network.received_at)
+            self.reconcile()
 
             # Efficiently update enemies without recreating each frame
             enemy_dict = {enemy.id: enemy for enemy in self.enemies}
             updated_enemies = []
 
-            for enemy_data in state.get("enemies", []):
+            for enemy_data in world["enemies"].values():
                 enemy_id = enemy_data["id"]
                 if enemy_id in enemy_dict:
                     enemy = enemy_dict[enemy_id]
-                    enemy.x = enemy_data["x"]
-                    enemy.y = enemy_data["y"]
                     enemy.health = enemy_data["health"]
                     updated_enemies.append(enemy)
                 else:
@@ -164,7 +113,7 @@ class Game:
             item_dict = {item.id: item for item in self.items}
             updated_items = []
 
-            for item_data in state.get("items", []):
+            for item_data in world["items"].values():
                 item_id = item_data["id"]
                 if item_id in item_dict:
                     item = item_dict[item_id]
@@ -175,18 +124,25 @@ class Game:
                     updated_items.append(create_item(item_data))
 
             self.items = updated_items
-            
+            if self.state["players"].get(self.network.player_id):
+                self.nearby_items = self.get_nearby_items()
+            else:
+                self.nearby_items = []
+            return True
+
     def process_events(self):
         current_time = time.time()
         keys = pygame.key.get_pressed()
+        dx, dy = 0, 0
         if keys[pygame.K_UP]:
-            self.network.send({"type": "move", "data": {"direction": "up", "speed": 5}})
+            dy -= MOVE_SPEED
         if keys[pygame.K_DOWN]:
-            self.network.send({"type": "move", "data": {"direction": "down", "speed": 5}})
+            dy += MOVE_SPEED
         if keys[pygame.K_LEFT]:
-            self.network.send({"type": "move", "data": {"direction": "left", "speed": 5}})
+            dx -= MOVE_SPEED
         if keys[pygame.K_RIGHT]:
-            self.network.send({"type": "move", "data": {"direction": "right", "speed": 5}})
+            dx += MOVE_SPEED
+        self.move(dx, dy)
 
         for event in pygame.event.get():
             self.player.handle_event(event)
@@ -207,20 +163,73 @@ class Game:
                 elif event.key == pygame.K_e:
                     self.try_pickup_item()
                 
+    def move(self, dx, dy):
+        """Apply this frame's movement to our own hero straight away.
+
+        The server gets one move message per MOVE_SEND_INTERVAL, with the
+        movement of all the frames since the previous one.
+        """
+        if dx or dy:
+            self.unsent_dx += dx
+            self.unsent_dy += dy
+            if self.predicted is not None:
+                self.predicted = apply_move(self.map.is_passable, *self.predicted, dx, dy)
+
+        now = time.monotonic()
+        if (self.unsent_dx or self.unsent_dy) and now >= self.next_move_send:
+            self.move_seq += 1
+            self.network.send({"type": "move", "data": {"dx": self.unsent_dx, "dy": self.unsent_dy,
+                                                        "seq": self.move_seq}})
+            self.pending_moves.append((self.move_seq, self.unsent_dx, self.unsent_dy))
+            self.unsent_dx = 0
+            self.unsent_dy = 0
+            # Keep to the interval on average even though frames don't line up with it
+            self.next_move_send += MOVE_SEND_INTERVAL
+            if self.next_move_send < now:  # after standing still, or a long frame
+                self.next_move_send = now + MOVE_SEND_INTERVAL
+
+    def reconcile(self):
+        """Replay the moves the server hasn't applied yet onto where it has us"""
+        player = self.state["players"].get(self.network.player_id)
+        if player is None or player.get("state") == "dead":
+            self.pending_moves.clear()
+            self.predicted = None
+            return
+        acked = player.get("move_seq", 0)
+        while self.pending_moves and self.pending_moves[0][0] <= acked:
+            self.pending_moves.popleft()
+        x, y = player["x"], player["y"]
+        for _, dx, dy in self.pending_moves:
+            x, y = apply_move(self.map.is_passable, x, y, dx, dy)
+        self.predicted = apply_move(self.map.is_passable, x, y, self.unsent_dx, self.unsent_dy)
+
     def update(self):
         dt = self.clock.get_time() / 1000.0  # Get delta time in seconds
+        self.positions = self.interpolation.sample(time.monotonic())
+        if self.predicted is not None:
+            # Our own hero is drawn where we predict it, not in the past
+            self.positions = {**self.positions, ("players", self.network.player_id): self.predicted}
         
         if self.network.player_id:
             player_data = self.state['players'].get(self.network.player_id)
             if player_data:
-                self.player.update(player_data, dt)
+                self.player.update(self.interpolated("players", self.network.player_id, player_data), dt)
         for enemy in self.enemies:
+            enemy.x, enemy.y = self.positions.get(("enemies", enemy.id), (enemy.x, enemy.y))
             enemy.update(dt)
 
+    def interpolated(self, category, entity_id, data):
+        """A copy of an entity's state with its position for this frame"""
+        position = self.positions.get((category, entity_id))
+        if position is None:
+            return data
+        return {**data, "x": position[0], "y": position[1]}
+
     def update_viewport(self):
         SCREEN_WIDTH, SCREEN_HEIGHT = self.screen.get_size()
         player = self.state["players"].get(self.network.player_id)
         if player:
+            player = self.interpolated("players", self.network.player_id, player)
             # Calculate map boundaries in pixels
             map_pixel_width = self.map.width * self.map.tile_size
             map_pixel_height = self.map.height * self.map.tile_size
@@ -256,6 +265,8 @@ class Game:
             for player_id, info in self.state["players"].items():
                 if info.get('state') == 'dead' and time.time() - info.get('death_time', 0) > 1:
                     continue
+                if info.get('state') != 'dead':
+                    info = self.interpolated("players", player_id, info)
                 if player_id not in self.players:
                     hero = create_hero(
                         info.get("hero_class", "warrior"),
@@ -274,8 +285,8 @@ class Game:
                     if player_data.get('state') == 'dead' and time.time() - player_data.get('death_time', 0) > 1:
                         continue
                     if player_data.get('state') != 'dead':
-                        hero.x = player_data['x']
-                        hero.y = player_data['y']
+                        hero.x, hero.y = self.positions.get(
+                            ("players", player_id), (player_data['x'], player_data['y']))
                     
                     hero.health = player_data['health']
                     hero.mana = player_data['mana']
@@ -357,64 +368,8 @@ class Game:
         })
 
     def render_hud(self):
-        font = pygame.font.SysFont(None, 24)
-        weapon_text = f"Weapon: {self.weapon.type}"
-        text = font.render(weapon_text, True, (255, 255, 255))
-        self.screen.blit(text, (10, 10))
-
         player = self.state['players'].get(self.network.player_id)
-
-        if player:
-            bar_width = 200
-            bar_height = 20
-            padding = 10
-            corner_radius = 5
-
-            health_x = 10
-            health_y = 10
-            health_ratio = player['health'] / player['max_health']
-            
-            pygame.draw.rect(self.screen, (255, 0, 0), 
-                            (health_x, health_y, bar_width, bar_height), 
-                            border_radius=corner_radius)
-            pygame.draw.rect(self.screen, (0, 255, 0), 
-                            (health_x, health_y, bar_width * health_ratio, bar_height),
-                            border_radius=corner_radius)
-
-            mana_y = health_y + bar_height + padding
-            mana_ratio = player['mana'] / player['max_mana']
-            
-            pygame.draw.rect(self.screen, (0, 0, 60), 
-                            (health_x, mana_y, bar_width, bar_height), 
-                            border_radius=corner_radius)
-            pygame.draw.rect(self.screen, (0, 100, 255), 
-                            (health_x, mana_y, bar_width * mana_ratio, bar_height),
-                            border_radius=corner_radius)
-            nearby = self.get_nearby_items()
-            if nearby:
-                text = font.render("Nearby items:", True, (255, 255, 255))
-                self.screen.blit(text, (10, 60))
-                
-                for i, item in enumerate(nearby[:3]):
-                    item_text = f"{i+1}. {item.type} ({item.value})"
-                    text = font.render(item_text, True, (255, 255, 255))
-                    self.screen.blit(text, (10, 85 + i*25))
-                    
-                    # Show key to press (E)
-                    key_text = f"[E]"
-                    text = font.render(key_text, True, (255, 255, 0))
-                    self.screen.blit(text, (200, 85 + i*25))
-            
-            # Show inventory
-            text = font.render("Inventory:", True, (255, 255, 255))
-            self.screen.blit(text, (10, 160))
-    
-            for i, item in enumerate(player.get('inventory', [])):
-                item_text = f"{i+1}. {item['type']}"
-                text = font.render(item_text, True, (255, 255, 255))
-                self.screen.blit(text, (10, 185 + i*25))
-
-            print("Inventory Data:", player.get('inventory', []))
+        self.hud.draw(self.screen, self.weapon.type, player, self.nearby_items)
          
     def get_nearby_items(self):
         """Return items within pickup range of the player"""
@@ -2,12 +2,18 @@ import pygame
 import math
 import time
 from .weapon import Weapon
-from .animation import Animation
-
-_animation_cache = {}
+from .animation import frame_bank
 
 class Hero:
     """Base hero class that all specific hero types will inherit from"""
+    # Seconds each frame of an animation state is shown
+    frame_durations = {
+        "idle": 0.2,
+        "run": 0.05,
+        "attack": 0.05,
+        "death": 0.15,
+    }
+
     def __init__(self, x, y, username="", avatar=""):
         self.x = x
         self.y = y
@@ -37,6 +43,8 @@ class Hero:
         self.is_dead = False
         self.prev_x = x 
         self.prev_y = y
+        self.frame_index = 0
+        self.frame_time = 0
 
         # Animation timings
         self.attack_start_time = 0
@@ -48,43 +56,6 @@ class Hero:
         if not hasattr(self, 'sprite_base_path'):
             self.sprite_base_path = "client/assets/enemies/goblin"
         
-        self._init_animations()
-        
-    def _init_animations(self):
-        """Initialize animations with caching"""
-        anim_paths = {
-            "idle": f"{self.sprite_base_path}/idle.png",
-            "run": f"{self.sprite_base_path}/run.png",
-            "attack": f"{self.sprite_base_path}/attack.png",
-            "death": f"{self.sprite_base_path}/death.png" 
-        }
-        
-        animation_specs = {
-            "idle": (4, 0.2),
-            "run": (8, 0.05),
-            "attack": (8, 0.05),
-            "death": (4, 0.15)
-        }
-        
-        self.animations = {}
-        for state, path in anim_paths.items():
-            sprite_sheet = _animation_cache.get(path)
-            if sprite_sheet is None:
-                try:
-                    sprite_sheet = pygame.image.load(path).convert_alpha()
-                    _animation_cache[path] = sprite_sheet
-                    print(f"Successfully loaded {path}")
-                except Exception as e:
-                    print(f"Failed to load {path}: {e}")
-                    if hasattr(self, 'create_fallback'):
-                        sprite_sheet = self.create_fallback(state)
-                        print(f"Created fallback surface for {path}")
-                    else:
-                        continue
-                    
-            frames, duration = animation_specs[state]
-            self.animations[state] = Animation(sprite_sheet, 150, 150, frames, duration)
-        
     def add_item(self, item):
         self.inventory.append(item)
         
@@ -94,7 +65,7 @@ class Hero:
     
     def draw(self, screen, view_x=0, view_y=0):
         """Draw the hero with health and mana bars"""
-        current_frame = self.animations[self.state].get_frame()
+        current_frame = frame_bank.get(self.sprite_base_path, self.state)[self.frame_index]
         screen_x = self.x - view_x
         screen_y = self.y - view_y
         
@@ -133,16 +104,23 @@ class Hero:
         self._update_death_state()
 
         if self.is_dead:
-            self.state = "death"
+            state = "death"
         elif self.is_attacking:
-            self.state = "attack"
+            state = "attack"
         elif self.is_moving:
-            self.state = "run"
+            state = "run"
         else:
-            self.state = "idle"
+            state = "idle"
+        if state != self.state:
+            self.state = state
+            self.frame_index = 0
+            self.frame_time = 0
 
-        if self.state in self.animations:
-            self.animations[self.state].update(dt)
+        self.frame_time += dt
+        if self.frame_time >= self.frame_durations[self.state]:
+            frame_count = len(frame_bank.get(self.sprite_base_path, self.state))
+            self.frame_index = (self.frame_index + 1) % frame_count
+            self.frame_time = 0
 
     def _detect_movement(self, player_data):
         """Check if player has moved since last update"""
@@ -177,9 +155,8 @@ class Hero:
         if not self.is_attacking and not self.is_dead:
             self.is_attacking = True
             self.attack_start_time = time.time()
-            if "attack" in self.animations:
-                self.animations["attack"].current_frame = 0
-                self.animations["attack"].last_update = 0 
+            self.frame_index = 0
+            self.frame_time = 0
 
     def handle_event(self, event):
         """Handle animation-related events"""
@@ -240,13 +217,6 @@ class Archer(Hero):
         self.weapon = Weapon("bow")
         self.special_cooldown = 12.0
     
-    def create_fallback(self, state):
-        """Create a fallback surface for failed image loads"""
-        if state == "idle" or state == "take_hit" or state == "death":
-            return pygame.Surface((150*4, 150), pygame.SRCALPHA)
-        else:
-            return pygame.Surface((150*8, 150), pygame.SRCALPHA)
- 
     def use_special_ability(self, current_time, enemies=None):
         """Archer's Volley - shoots multiple arrows at the nearest 3 enemies"""
         result = super().use_special_ability(current_time, enemies)
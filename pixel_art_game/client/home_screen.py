@@ -4,6 +4,8 @@ import pygame
 import sys
 import os
 
+from .item import item_sprites
+
 class HomeScreen:
     def __init__(self, screen_width=800, screen_height=600):
         pygame.init()
@@ -12,6 +14,7 @@ class HomeScreen:
         self.screen = pygame.display.set_mode((screen_width, screen_height))
         pygame.display.set_caption("Adventure Game - Character Setup")
         self.background_image = self.load_background_image()
+        item_sprites.preload()
         self.title_font = pygame.font.Font(None, 72)
         self.subtitle_font = pygame.font.Font(None, 48)
         self.font = pygame.font.Font(None, 36)
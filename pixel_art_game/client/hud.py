@@ -0,0 +1,104 @@
+# client/hud.py
+
+import pygame
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 128  # rendered strings kept for reuse
+WHITE = (255, 255, 255)
+YELLOW = (255, 255, 0)
+
+_fonts = {}
+
+def get_font(name, size):
+    """A system font, looked up once for each name and size"""
+    font = _fonts.get((name, size))
+    if font is None:
+        font = _fonts[(name, size)] = pygame.font.SysFont(name, size)
+    return font
+
+class Hud:
+    """The heads-up display, kept on its own surface between frames.
+
+    The surface is only redrawn when something it shows changes; other
+    frames just blit it. Everything on it is drawn with premultiplied
+    alpha, so it blends onto the screen the same as drawing straight onto
+    the screen would.
+    """
+    def __init__(self):
+        self.font = get_font(None, 24)
+        self.texts = OrderedDict()  # (text, color) -> rendered Surface
+        self.layer = None
+        self.shown = None  # values the layer was drawn from
+        self.redraws = 0
+
+    def text(self, text, color):
+        key = (text, color)
+        surface = self.texts.get(key)
+        if surface is None:
+            surface = self.texts[key] = self.font.render(text, True, color).convert_alpha().premul_alpha()
+            if len(self.texts) > TEXT_CACHE_SIZE:
+                self.texts.popitem(last=False)
+        else:
+            self.texts.move_to_end(key)
+        return surface
+
+    def draw(self, screen, weapon_type, player, nearby):
+        if player:
+            shown = (
+                weapon_type,
+                player['health'], player['max_health'],
+                player['mana'], player['max_mana'],
+                tuple((item.type, item.value) for item in nearby[:3]),
+                tuple(item['type'] for item in player.get('inventory', [])),
+            )
+        else:
+            shown = (weapon_type,)
+        if shown != self.shown:
+            self.shown = shown
+            self.layer = self._redraw(weapon_type, player, nearby)
+            self.redraws += 1
+        screen.blit(self.layer, (0, 0), special_flags=pygame.BLEND_PREMULTIPLIED)
+
+    def _redraw(self, weapon_type, player, nearby):
+        # Work out what goes where first, so the layer is only as big as that
+        texts = [(self.text(f"Weapon: {weapon_type}", WHITE), (10, 10))]
+        bars = []
+        if player:
+            bar_width = 200
+            bar_height = 20
+            padding = 10
+
+            health_x = 10
+            health_y = 10
+            health_ratio = player['health'] / player['max_health']
+            bars.append(((255, 0, 0), (health_x, health_y, bar_width, bar_height)))
+            bars.append(((0, 255, 0), (health_x, health_y, bar_width * health_ratio, bar_height)))
+
+            mana_y = health_y + bar_height + padding
+            mana_ratio = player['mana'] / player['max_mana']
+            bars.append(((0, 0, 60), (health_x, mana_y, bar_width, bar_height)))
+            bars.append(((0, 100, 255), (health_x, mana_y, bar_width * mana_ratio, bar_height)))
+
+            if nearby:
+                texts.append((self.text("Nearby items:", WHITE), (10, 60)))
+                for i, item in enumerate(nearby[:3]):
+                    texts.append((self.text(f"{i+1}. {item.type} ({item.value})", WHITE), (10, 85 + i*25)))
+                    texts.append((self.text("[E]", YELLOW), (200, 85 + i*25)))
+
+            texts.append((self.text("Inventory:", WHITE), (10, 160)))
+            for i, item in enumerate(player.get('inventory', [])):
+                texts.append((self.text(f"{i+1}. {item['type']}", WHITE), (10, 185 + i*25)))
+
+        width = max([x + surface.get_width() for surface, (x, y) in texts] +
+                    [rect[0] + rect[2] for color, rect in bars])
+        height = max([y + surface.get_height() for surface, (x, y) in texts] +
+                     [rect[1] + rect[3] for color, rect in bars])
+        layer = pygame.Surface((int(width) + 1, int(height) + 1), pygame.SRCALPHA)
+
+        # Same order as drawing onto the screen: text, then bars over it
+        layer.blit(texts[0][0], texts[0][1], special_flags=pygame.BLEND_PREMULTIPLIED)
+        for color, rect in bars:
+            pygame.draw.rect(layer, color, rect, border_radius=5)
+        for surface, position in texts[1:]:
+            layer.blit(surface, position, special_flags=pygame.BLEND_PREMULTIPLIED)
+        return layer
@@ -0,0 +1,60 @@
+# client/interpolation.py
+
+import bisect
+from collections import deque
+
+class SnapshotBuffer:
+    """Recent server positions, played back a little in the past.
+
+    Every update_state carries the server's simulation time in
+    milliseconds. Positions are shown as they were `delay` seconds before
+    the newest state that could have arrived by now, blending the two
+    states either side of that moment, so movement stays smooth between
+    updates. The server clock is lined up with ours by the smallest gap
+    between the two seen over the buffered states; a late state only
+    makes its own gap bigger and so never moves playback.
+    """
+    def __init__(self, delay, size=32):
+        self.delay = delay
+        self.times = deque(maxlen=size)      # server time of each state, in seconds
+        self.offsets = deque(maxlen=size)    # our clock minus the server's, per state
+        self.positions = deque(maxlen=size)  # (category, id) -> (x, y), per state
+
+    def add(self, server_time, world, now):
+        """Buffer the positions in a world state received at local time now"""
+        server_time = now if server_time is None else server_time / 1000
+        if self.times and server_time <= self.times[-1]:
+            return  # out of order or repeated; nothing to add
+        positions = {}
+        for category in ("players", "enemies"):
+            for entity_id, entity in world[category].items():
+                positions[(category, entity_id)] = (entity["x"], entity["y"])
+        self.times.append(server_time)
+        self.offsets.append(now - server_time)
+        self.positions.append(positions)
+
+    def sample(self, now):
+        """Positions of every buffered entity at local time now"""
+        if not self.times:
+            return {}
+        render_time = now - min(self.offsets) - self.delay
+        index = bisect.bisect_right(self.times, render_time)
+        if index == 0:
+            return self.positions[0]
+        if index == len(self.times):
+            return self.positions[-1]  # out of states; hold the newest
+
+        start = self.times[index - 1]
+        end = self.times[index]
+        older = self.positions[index - 1]
+        newer = self.positions[index]
+        t = (render_time - start) / (end - start)
+        blended = {}
+        for key, (x1, y1) in newer.items():
+            previous = older.get(key)
+            if previous is None:
+                blended[key] = (x1, y1)
+            else:
+                x0, y0 = previous
+                blended[key] = (x0 + (x1 - x0) * t, y0 + (y1 - y0) * t)
+        return blended
@@ -3,6 +3,41 @@
 import pygame
 import random
 
+ITEM_SIZE = (24, 24)
+ITEM_SPRITE_PATHS = {
+    "potion": "client/assets/items/potion.png",
+    "mana_potion": "client/assets/items/mana_potion.png",
+    "shield": "client/assets/items/shield.png",
+    "sword": "client/assets/items/sword.png",
+    "coin": "client/assets/items/key.png",
+}
+
+class ItemSprites:
+    """Item images, each loaded and scaled once and shared by every item.
+
+    Needs a display mode to be set, since images are converted for it.
+    """
+    def __init__(self):
+        self.surfaces = {}  # item type -> Surface
+
+    def get(self, item_type):
+        surface = self.surfaces.get(item_type)
+        if surface is None:
+            path = ITEM_SPRITE_PATHS.get(item_type)
+            if path is None:
+                surface = pygame.Surface(ITEM_SIZE)
+            else:
+                surface = pygame.transform.scale(pygame.image.load(path).convert_alpha(), ITEM_SIZE)
+            self.surfaces[item_type] = surface
+        return surface
+
+    def preload(self):
+        """Load every item image now rather than when the first one spawns"""
+        for item_type in ITEM_SPRITE_PATHS:
+            self.get(item_type)
+
+item_sprites = ItemSprites()
+
 class Item:
     def __init__(self, item_data):
         self.id = item_data['id']
@@ -10,7 +45,7 @@ class Item:
         self.x = item_data['x']
         self.y = item_data['y']
         self.value = item_data.get('value', 0.5)
-        self.image = pygame.Surface((24, 24))
+        self.image = item_sprites.get(self.type)
         
     def use(self, player):
         """Base use method to be overridden by specific item types"""
@@ -25,15 +60,11 @@ class Item:
 class HealPotion(Item):
     def __init__(self, item_data):
         super().__init__(item_data)
-        self.image = pygame.transform.scale(
-    pygame.image.load("client/assets/items/potion.png").convert_alpha(),
-    (24, 24)
-)
         self.heal_amount = int(self.value * 50)
     
     def use(self, player):
             """Trigger healing through network"""
-            from .game import NetworkClient
+            from .network import NetworkClient
             
             # Find the NetworkClient instance to send message
             import inspect
@@ -56,9 +87,6 @@ class HealPotion(Item):
 class Shield(Item):
     def __init__(self, item_data):
         super().__init__(item_data)
-        self.image = pygame.transform.scale(
-            pygame.image.load("client/assets/items/shield.png").convert_alpha(),
-            (24, 24))
         self.defense_bonus = self.value * 10
     
     def use(self, player):
@@ -69,9 +97,6 @@ class Shield(Item):
 class Sword(Item):
     def __init__(self, item_data):
         super().__init__(item_data)
-        self.image = pygame.transform.scale(
-            pygame.image.load("client/assets/items/sword.png").convert_alpha(),
-            (24, 24))
         self.attack_bonus = int(self.value * 20)
     
     def use(self, player):
@@ -82,9 +107,6 @@ class Sword(Item):
 class Coin(Item):
     def __init__(self, item_data):
         super().__init__(item_data)
-        self.image = pygame.transform.scale(
-            pygame.image.load("client/assets/items/key.png").convert_alpha(),
-            (24, 24))
         self.coin_value = int(self.value * 100)
     
     def use(self, player):
@@ -97,14 +119,11 @@ class Coin(Item):
 class ManaPotion(Item):
     def __init__(self, item_data):
         super().__init__(item_data)
-        self.image = pygame.transform.scale(
-            pygame.image.load("client/assets/items/mana_potion.png").convert_alpha(),
-            (24, 24))
         self.mana_amount = int(item_data.get('value', 0.5) * 50)
     
     def use(self, player):
         """Trigger mana restoration through network"""
-        from .game import NetworkClient
+        from .network import NetworkClient
         
         # Find NetworkClient instance
         import inspect
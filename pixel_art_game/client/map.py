@@ -1,26 +1,24 @@
 import pygame
+from collections import OrderedDict
+
+from common.tilemap import TileGrid, unpack_tiles
+
+# The terrain is drawn once into square blocks of this many pixels, and
+# each frame only the blocks overlapping the screen are blitted
+RENDER_BLOCK_SIZE = 512
+RENDER_BLOCK_CACHE = 48  # blocks kept, about 1 MB each
 
 class Map:
     def __init__(self, tile_size=64):
         self.tile_size = tile_size
-        self.layout = [
-            [8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8],
-            [8,0,0,0,0,4,0,0,12,0,0,0,4,0,0,4,0,0,0,8],
-            [8,0,1,1,0,4,0,7,0,0,12,0,0,7,0,4,0,3,0,8],
-            [8,0,1,1,0,4,0,0,0,0,0,0,0,0,0,4,0,3,0,8],
-            [8,0,0,1,0,0,0,0,5,5,0,5,5,0,0,0,0,3,0,8],
-            [8,0,12,0,0,0,7,0,0,0,0,0,0,0,0,0,0,0,0,8],
-            [8,0,10,10,10,0,0,7,0,0,12,0,0,7,0,0,10,10,10,8],
-            [8,0,10,10,10,0,0,0,0,0,0,0,0,0,0,0,10,10,10,8],
-            [8,0,0,0,0,0,0,0,4,0,4,0,0,0,0,0,0,0,0,8],
-            [8,0,0,0,0,5,0,0,0,0,0,0,0,0,6,0,0,0,0,8],
-            [8,0,0,7,0,0,0,4,0,0,0,0,4,0,0,0,0,0,0,8],
-            [8,0,0,0,0,0,0,0,0,0,0,0,0,0,0,12,0,0,0,8],
-            [8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8,8]
-        ]
-    
-        self.width = len(self.layout[0])
-        self.height = len(self.layout)
+        # Filled in by the server: map_info gives the size of the map, and
+        # map_chunk messages the tiles around the player as it moves
+        self.width = 0
+        self.height = 0
+        self.chunk_size = 32
+        self.impassable = ()
+        self.chunks = {}  # (chunk_x, chunk_y) -> TileGrid
+        self.blocks = OrderedDict()  # (block_x, block_y) -> Surface, least recently drawn first
         
         self.tile_definitions = {
             0: {"type": "grass", "passable": True},
@@ -38,25 +36,54 @@ class Map:
             12: {"type": "bush", "passable": False},
         }
 
-        self.tiles = self.initialize_tiles()
         self.grass_texture = None
 
         self.load_textures()
 
-    def initialize_tiles(self):
-        """Create tile grid with proper properties"""
-        tiles = []
-        for row in self.layout:
-            tile_row = []
-            for tile_id in row:
-                tile_data = self.tile_definitions.get(tile_id, {"type": "unknown", "passable": False})
-                tile_row.append({
-                    "type": tile_data["type"],
-                    "passable": tile_data["passable"],
-                    "id": tile_id
-                })
-            tiles.append(tile_row)
-        return tiles
+    def load_info(self, data):
+        """Take the map size and chunk layout from a map_info message"""
+        self.width = data["width"]
+        self.height = data["height"]
+        self.chunk_size = data["chunk_size"]
+        self.impassable = data["impassable"]
+        self.chunks = {}
+        self.blocks.clear()
+
+    def load_chunk(self, data):
+        """Store the tiles of one chunk from a map_chunk message"""
+        chunk_x, chunk_y = data["x"], data["y"]
+        self.chunks[(chunk_x, chunk_y)] = TileGrid(
+            self.chunk_size, self.chunk_size, unpack_tiles(data["tiles"]), self.impassable)
+
+        # Blocks drawn before the chunk arrived only show grass there
+        chunk_pixels = self.chunk_size * self.tile_size
+        for block_y in range(chunk_y * chunk_pixels // RENDER_BLOCK_SIZE,
+                             -(-(chunk_y + 1) * chunk_pixels // RENDER_BLOCK_SIZE)):
+            for block_x in range(chunk_x * chunk_pixels // RENDER_BLOCK_SIZE,
+                                 -(-(chunk_x + 1) * chunk_pixels // RENDER_BLOCK_SIZE)):
+                self.blocks.pop((block_x, block_y), None)
+
+    def tile(self, tile_x, tile_y):
+        """Tile id at a tile position, or None until its chunk has arrived"""
+        chunk = self.chunks.get((tile_x // self.chunk_size, tile_y // self.chunk_size))
+        if chunk is None:
+            return None
+        return chunk.tile(tile_x % self.chunk_size, tile_y % self.chunk_size)
+
+    def is_passable(self, x, y):
+        """Check a pixel position the way the server does.
+
+        Off the map is blocked. Tiles whose chunk hasn't arrived yet count
+        as passable; the server corrects us if they weren't.
+        """
+        tile_x = int(x // self.tile_size)
+        tile_y = int(y // self.tile_size)
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return False
+        chunk = self.chunks.get((tile_x // self.chunk_size, tile_y // self.chunk_size))
+        if chunk is None:
+            return True
+        return chunk.is_passable(tile_x % self.chunk_size, tile_y % self.chunk_size)
     
     def load_textures(self):
         self.grass_texture = pygame.image.load("client/assets/map/terrain/grass.png").convert_alpha()
@@ -91,29 +118,46 @@ class Map:
                     for tex in self.tile_textures[key]
                 ]
 
-    def draw(self, screen, view_x, view_y):
-        screen_width, screen_height = screen.get_size()
-        
-        start_x = max(0, view_x // self.tile_size)
-        start_y = max(0, view_y // self.tile_size)
-        end_x = min(self.width, (view_x + screen_width) // self.tile_size + 1)
-        end_y = min(self.height, (view_y + screen_height) // self.tile_size + 1)
-        
-         # First draw grass base layer for all visible tiles
-        for y in range(start_y, end_y):
-            for x in range(start_x, end_x):
-                screen_x = x * self.tile_size - view_x
-                screen_y = y * self.tile_size - view_y
-                screen.blit(self.grass_texture, (screen_x, screen_y))
-        
+    def render_block(self, block_x, block_y):
+        """Draw the terrain of one block into a new surface"""
+        tiles_per_block = RENDER_BLOCK_SIZE // self.tile_size
+        start_x = block_x * tiles_per_block
+        start_y = block_y * tiles_per_block
+        end_x = min(self.width, start_x + tiles_per_block)
+        end_y = min(self.height, start_y + tiles_per_block)
+        surface = pygame.Surface(((end_x - start_x) * self.tile_size,
+                                  (end_y - start_y) * self.tile_size)).convert()
+
         for y in range(start_y, end_y):
             for x in range(start_x, end_x):
-                tile_id = self.layout[y][x]
-                if tile_id == 0:  # Skip grass tiles
-                    continue
-                
-                if tile_id in self.tile_textures:
-                    texture = self.tile_textures[tile_id]
-                    screen.blit(texture,
-                               (x * self.tile_size - view_x,
-                                y * self.tile_size - view_y))
\ No newline at end of file
+                position = ((x - start_x) * self.tile_size, (y - start_y) * self.tile_size)
+                surface.blit(self.grass_texture, position)
+                tile_id = self.tile(x, y)
+                if tile_id and tile_id in self.tile_textures:  # grass is already there
+                    surface.blit(self.tile_textures[tile_id], position)
+        return surface
+
+    def draw(self, screen, view_x, view_y):
+        screen_width, screen_height = screen.get_size()
+        view_x = int(view_x)
+        view_y = int(view_y)
+
+        blocks_x = -(-self.width * self.tile_size // RENDER_BLOCK_SIZE)
+        blocks_y = -(-self.height * self.tile_size // RENDER_BLOCK_SIZE)
+        start_x = max(0, view_x // RENDER_BLOCK_SIZE)
+        start_y = max(0, view_y // RENDER_BLOCK_SIZE)
+        end_x = min(blocks_x, (view_x + screen_width) // RENDER_BLOCK_SIZE + 1)
+        end_y = min(blocks_y, (view_y + screen_height) // RENDER_BLOCK_SIZE + 1)
+
+        for block_y in range(start_y, end_y):
+            for block_x in range(start_x, end_x):
+                key = (block_x, block_y)
+                block = self.blocks.get(key)
+                if block is None:
+                    block = self.blocks[key] = self.render_block(block_x, block_y)
+                    if len(self.blocks) > RENDER_BLOCK_CACHE:
+                        self.blocks.popitem(last=False)
+                else:
+                    self.blocks.move_to_end(key)
+                screen.blit(block, (block_x * RENDER_BLOCK_SIZE - view_x,
+                                    block_y * RENDER_BLOCK_SIZE - view_y))
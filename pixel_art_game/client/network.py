@@ -0,0 +1,196 @@
+# client/network.py
+
+import socket
+import threading
+import time
+import queue
+from collections import OrderedDict, deque
+
+from common.codec import encode_message, decode_message
+from common.framing import FrameDecoder
+
+HOST = '127.0.0.1'
+PORT = 5555
+SNAPSHOT_HISTORY = 64  # world states kept as baselines for server deltas
+RTT_SAMPLES = 1000  # round trip times kept from answered pings
+WIRE_CODECS = ["binary", "json"]  # offered to the server; use ["json"] to debug
+
+class SnapshotHistory:
+    """The world states the server may send deltas against, by seq"""
+    def __init__(self, size=SNAPSHOT_HISTORY):
+        self.size = size
+        self.worlds = OrderedDict()  # seq -> world state
+
+    def apply(self, data):
+        """Rebuild the world from a keyframe or from a delta and its baseline.
+
+        Returns None if the delta's baseline is no longer known; the server
+        falls back to a keyframe once our acknowledgements stop arriving.
+        """
+        if data.get("keyframe") or "baseline" not in data:
+            world = {
+                "players": dict(data.get("players", {})),
+                "enemies": {enemy["id"]: enemy for enemy in data.get("enemies", [])},
+                "items": {item["id"]: item for item in data.get("items", [])}
+            }
+        else:
+            baseline = self.worlds.get(data["baseline"])
+            if baseline is None:
+                return None
+            world = {}
+            for category in ("players", "enemies", "items"):
+                entities = dict(baseline[category])
+                delta = data.get(category, {})
+                entities.update(delta.get("added", {}))
+                for entity_id, fields in delta.get("changed", {}).items():
+                    if entity_id in entities:
+                        entities[entity_id] = {**entities[entity_id], **fields}
+                for entity_id in delta.get("removed", []):
+                    entities.pop(entity_id, None)
+                world[category] = entities
+
+            # The server never diffs against anything older than its baseline
+            for seq in [s for s in self.worlds if s < data["baseline"]]:
+                del self.worlds[seq]
+
+        seq = data.get("seq")
+        if seq is not None:
+            self.worlds[seq] = world
+            while len(self.worlds) > self.size:
+                self.worlds.popitem(last=False)
+        return world
+
+class NetworkClient:
+    """Connection to the server on behalf of a game.
+
+    Doesn't touch pygame, so the headless bots in client/bot.py use it as
+    the game does. The receive thread queues each message with the time
+    it arrived, and the game's own thread handles them through
+    handle_message, which calls back into the game: update_state(data),
+    picked_up(item_type), its map's load_info and load_chunk, and its
+    player's health when it has one.
+    """
+    def __init__(self, host, port, game, username, avatar, hero_class):
+        self.host = host
+        self.port = port
+        self.game = game
+        self.username = username
+        self.avatar = avatar
+        self.player_id = None
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.connect((self.host, self.port))
+        # Messages are small and wanted straight away, moves most of all
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.running = True
+        self.message_queue = queue.Queue()
+        self.codec = "json"  # until the server picks one in join_ack
+        self.decoder = FrameDecoder()
+        # What the connection has seen, for the load generator; the bytes
+        # received are counted by the decoder
+        self.stats = {
+            "messages": 0,
+            "updates": 0,
+            "updates_missed": 0,    # update seqs skipped, i.e. dropped by the server
+            "updates_rejected": 0,  # deltas whose baseline we no longer had
+            "pings": 0,
+            "pongs": 0,
+        }
+        self.last_seq = None
+        self.received_at = None  # when the message being handled arrived
+        self.rtts = deque(maxlen=RTT_SAMPLES)  # seconds
+        self.server_stats = {}  # from the latest pong
+        threading.Thread(target=self.receive_loop, daemon=True).start()
+        self.hero_class = hero_class
+        self.send({"type": "join", "data": {"name": self.username, "avatar": self.avatar,
+                                            "hero_class": self.hero_class, "codecs": WIRE_CODECS}})
+
+    def send(self, message):
+        if not self.sock or self.sock.fileno() == -1:
+            return
+        try:
+            self.sock.sendall(encode_message(message, self.codec))
+        except (BrokenPipeError, OSError) as e:
+            print("Connection closed:", e)
+            self.close()
+
+    def ping(self):
+        """Ask the server for a pong; its round trip lands in rtts"""
+        self.stats["pings"] += 1
+        self.send({"type": "ping", "data": {"time": time.monotonic()}})
+
+    def receive_loop(self):
+        try:
+            while self.running:
+                frames = self.decoder.recv_from(self.sock)
+                if frames is None:
+                    break
+                now = time.monotonic()
+                for binary, frame in frames:
+                    try:
+                        self.message_queue.put((now, decode_message(frame, binary)))
+                    except ValueError as e:
+                        print(f"Invalid message from server: {e}")
+        except (ConnectionResetError, TimeoutError) as e:
+            print(f"Connection error: {e}")
+        except Exception as e:
+            print(f"Receive error: {e}")
+        finally:
+            self.close()
+
+    def handle_message(self, received_at, message):
+        self.received_at = received_at
+        message_type = message.get("type")
+        data = message.get("data", {})
+        self.stats["messages"] += 1
+
+        if message_type == "health_update":
+            player_id = data['player_id']
+            new_health = data['health']
+            update_source = data.get("source", "damage")
+
+            if player_id == self.player_id and self.game.player:
+                prev_health = self.game.player.health
+
+                self.game.player.health = new_health
+
+        if message_type == "update_state":
+            self.stats["updates"] += 1
+            seq = data.get("seq")
+            if seq is not None:
+                if self.last_seq is not None and seq > self.last_seq + 1:
+                    self.stats["updates_missed"] += seq - self.last_seq - 1
+                self.last_seq = seq
+            if self.game.update_state(data):
+                self.send({"type": "state_ack", "data": {"seq": data["seq"]}})
+            else:
+                self.stats["updates_rejected"] += 1
+
+        elif message_type == "pickup_result":
+            if data.get("success"):
+                self.game.picked_up(message['data'].get('item_type'))
+
+        elif message_type == "join_ack":
+            self.player_id = data.get("player_id")
+            self.codec = data.get("codec", "json")
+            print(f"Received player ID: {self.player_id}")
+
+        elif message_type == "map_info":
+            self.game.map.load_info(data)
+
+        elif message_type == "map_chunk":
+            self.game.map.load_chunk(data)
+
+        elif message_type == "special_result":
+            success = data.get("success", False)
+            message_text = data.get("message", "")
+            print(f"Special ability used: {message_text} (Success: {success})")
+
+        elif message_type == "pong":
+            self.stats["pongs"] += 1
+            self.rtts.append(received_at - data.get("time", 0))
+            self.server_stats = data
+
+    def close(self):
+        self.running = False
+        self.send({"type": "leave", "data": {}})
+        self.sock.close()
@@ -0,0 +1,3 @@
+# common/__init__.py
+
+# Code shared by the client and the server.
\ No newline at end of file
@@ -0,0 +1,241 @@
+# common/codec.py
+
+import json
+import struct
+import uuid
+
+# Binary frames start with a zero byte, which never begins a JSON line,
+# followed by the payload length as a 4-byte big endian integer.
+FRAME_MARKER = 0
+FRAME_HEADER = struct.Struct(">BI")
+
+# Only the messages sent every frame or every tick get a binary form;
+# everything else stays JSON so it is easy to read in a packet capture.
+MESSAGE_CODES = {
+    "move": 1,
+    "update_state": 2,
+    "attack_enemy": 3,
+}
+MESSAGE_TYPES = {code: name for name, code in MESSAGE_CODES.items()}
+
+# Strings that appear in almost every message are sent as a one byte index
+SYMBOLS = [
+    "id", "type", "x", "y", "name", "avatar", "inventory", "health", "max_health",
+    "mana", "max_mana", "hero_class", "speed", "damage", "last_hit_time", "value",
+    "effects", "seq", "baseline", "keyframe", "players", "enemies", "items",
+    "added", "changed", "removed", "direction", "enemy_id", "effect", "duration",
+    "strength", "start_time", "up", "down", "left", "right", "goblin", "skeleton",
+    "orc", "sword", "shield", "potion", "coin", "mana_potion", "warrior", "archer",
+    "mage", "time", "move_seq", "dx", "dy",
+]
+SYMBOL_CODES = {symbol: code for code, symbol in enumerate(SYMBOLS)}
+
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STR = 5
+TAG_LIST = 6
+TAG_DICT = 7
+TAG_SYMBOL = 8
+TAG_ENEMY_ID = 9
+TAG_ITEM_ID = 10
+TAG_UUID = 11
+
+# Doubles, as JSON has: update times are epoch seconds, which a 32-bit float
+# would round to minutes
+FLOAT = struct.Struct(">d")
+
+def _write_varint(value, out):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def _handle(text, prefix):
+    """Integer part of ids like "enemy_12", or None if the id has another shape"""
+    number = text[len(prefix):]
+    if text.startswith(prefix) and number.isdigit() and str(int(number)) == number:
+        return int(number)
+    return None
+
+def _encode_str(text, out):
+    code = SYMBOL_CODES.get(text)
+    if code is not None:
+        out.append(TAG_SYMBOL)
+        out.append(code)
+        return
+
+    handle = _handle(text, "enemy_")
+    if handle is not None:
+        out.append(TAG_ENEMY_ID)
+        _write_varint(handle, out)
+        return
+    handle = _handle(text, "item_")
+    if handle is not None:
+        out.append(TAG_ITEM_ID)
+        _write_varint(handle, out)
+        return
+
+    # Player ids are UUIDs; send the 128-bit integer instead of 36 characters
+    if len(text) == 36:
+        try:
+            player_uuid = uuid.UUID(text)
+        except ValueError:
+            player_uuid = None
+        if player_uuid is not None and str(player_uuid) == text:
+            out.append(TAG_UUID)
+            out += player_uuid.bytes
+            return
+
+    encoded = text.encode()
+    out.append(TAG_STR)
+    _write_varint(len(encoded), out)
+    out += encoded
+
+def _encode_value(value, out):
+    value_type = type(value)
+    if value_type is str:
+        _encode_str(value, out)
+    elif value_type is int:
+        out.append(TAG_INT)
+        # zigzag so small negative numbers stay short
+        _write_varint(-value * 2 - 1 if value < 0 else value * 2, out)
+    elif value_type is float:
+        if value.is_integer() and abs(value) < 2 ** 53:
+            _encode_value(int(value), out)
+        else:
+            out.append(TAG_FLOAT)
+            out += FLOAT.pack(value)
+    elif value_type is dict:
+        out.append(TAG_DICT)
+        _write_varint(len(value), out)
+        for key, item in value.items():
+            _encode_str(str(key), out)
+            _encode_value(item, out)
+    elif value_type is list or value_type is tuple:
+        out.append(TAG_LIST)
+        _write_varint(len(value), out)
+        for item in value:
+            _encode_value(item, out)
+    elif value is None:
+        out.append(TAG_NONE)
+    elif value is True:
+        out.append(TAG_TRUE)
+    elif value is False:
+        out.append(TAG_FALSE)
+    else:
+        raise TypeError(f"Cannot encode {value_type.__name__} value {value!r}")
+
+def _decode_value(data, pos):
+    """(value, position after it) for the value encoded at pos.
+
+    Reading past the end raises IndexError, which decode_message reports
+    as a ValueError; fields taken as slices are checked here, since a
+    short slice would pass silently.
+    """
+    tag = data[pos]
+    pos += 1
+    if tag == TAG_SYMBOL:
+        return SYMBOLS[data[pos]], pos + 1
+    if tag == TAG_INT:
+        raw, pos = _read_varint(data, pos)
+        return (raw >> 1) ^ -(raw & 1), pos
+    if tag == TAG_FLOAT:
+        end = pos + FLOAT.size
+        if end > len(data):
+            raise ValueError(f"Truncated float at offset {pos}")
+        return FLOAT.unpack_from(data, pos)[0], end
+    if tag == TAG_DICT:
+        count, pos = _read_varint(data, pos)
+        result = {}
+        for _ in range(count):
+            key, pos = _decode_value(data, pos)
+            if type(key) is not str:
+                raise ValueError(f"Dict key {key!r} is not a string")
+            result[key], pos = _decode_value(data, pos)
+        return result, pos
+    if tag == TAG_LIST:
+        count, pos = _read_varint(data, pos)
+        result = []
+        for _ in range(count):
+            item, pos = _decode_value(data, pos)
+            result.append(item)
+        return result, pos
+    if tag == TAG_STR:
+        length, pos = _read_varint(data, pos)
+        end = pos + length
+        if end > len(data):
+            raise ValueError(f"Truncated string at offset {pos}")
+        return bytes(data[pos:end]).decode(), end
+    if tag == TAG_ENEMY_ID:
+        handle, pos = _read_varint(data, pos)
+        return f"enemy_{handle}", pos
+    if tag == TAG_ITEM_ID:
+        handle, pos = _read_varint(data, pos)
+        return f"item_{handle}", pos
+    if tag == TAG_UUID:
+        end = pos + 16
+        if end > len(data):
+            raise ValueError(f"Truncated uuid at offset {pos}")
+        return str(uuid.UUID(bytes=bytes(data[pos:end]))), end
+    if tag == TAG_NONE:
+        return None, pos
+    if tag == TAG_TRUE:
+        return True, pos
+    if tag == TAG_FALSE:
+        return False, pos
+    raise ValueError(f"Unknown tag {tag} at offset {pos - 1}")
+
+def encode_message(message, codec="json"):
+    """Encode a message as a frame ready to be written to a socket.
+
+    With the binary codec the hot message types are packed; all others, and
+    every message under the json codec, are sent as a JSON line.
+    """
+    code = MESSAGE_CODES.get(message.get("type"))
+    if codec != "binary" or code is None:
+        return (json.dumps(message) + "\n").encode()
+
+    body = bytearray(FRAME_HEADER.size)
+    body.append(code)
+    _encode_value(message.get("data", {}), body)
+    FRAME_HEADER.pack_into(body, 0, FRAME_MARKER, len(body) - FRAME_HEADER.size)
+    return bytes(body)
+
+def decode_message(frame, binary):
+    """Decode one frame returned by FrameDecoder (header already removed).
+
+    Raises ValueError for anything that is not a whole, well formed message.
+    """
+    if not binary:
+        message = json.loads(frame)
+        if type(message) is not dict:
+            raise ValueError(f"Message is a {type(message).__name__}, not an object")
+        return message
+    if not frame:
+        raise ValueError("Empty frame")
+    message_type = MESSAGE_TYPES.get(frame[0])
+    if message_type is None:
+        raise ValueError(f"Unknown message code {frame[0]}")
+    try:
+        data, end = _decode_value(frame, 1)
+    except IndexError:
+        raise ValueError("Truncated message") from None
+    except RecursionError:
+        raise ValueError("Message nested too deeply") from None
+    if end != len(frame):
+        raise ValueError(f"{len(frame) - end} bytes left over after the message")
+    return {"type": message_type, "data": data}
@@ -0,0 +1,63 @@
+# common/framing.py
+
+from .codec import FRAME_MARKER, FRAME_HEADER
+
+RECV_SIZE = 64 * 1024  # most bytes read from a socket at once
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # longest frame or line accepted
+
+class FrameDecoder:
+    """Splits a received byte stream into JSON lines and binary frames.
+
+    Received bytes are appended to one buffer that is kept between reads.
+    Frames are found by moving an offset through it, and the consumed
+    bytes are dropped once per read, so each byte is copied into the
+    buffer once and out again as part of its frame.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self.chunk = bytearray(RECV_SIZE)  # reused by recv_from
+        self.chunk_view = memoryview(self.chunk)
+        self.received = 0  # bytes read by recv_from
+
+    def recv_from(self, sock):
+        """Read from a socket; returns its complete frames, or None once it closes"""
+        count = sock.recv_into(self.chunk)
+        if not count:
+            return None
+        self.received += count
+        return self.feed(self.chunk_view[:count])
+
+    def feed(self, data):
+        """Add received bytes; returns the complete frames as (binary, payload).
+
+        Payloads are bytearrays of their own, not views of the buffer.
+        """
+        buffer = self.buffer
+        buffer += data
+        size = len(buffer)
+        start = 0
+        frames = []
+        while start < size:
+            if buffer[start] == FRAME_MARKER:
+                if size - start < FRAME_HEADER.size:
+                    break
+                _, length = FRAME_HEADER.unpack_from(buffer, start)
+                if length > MAX_FRAME_SIZE:
+                    raise ValueError(f"frame of {length} bytes is too long")
+                end = start + FRAME_HEADER.size + length
+                if size < end:
+                    break
+                frames.append((True, buffer[start + FRAME_HEADER.size:end]))
+                start = end
+            else:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    if size - start > MAX_FRAME_SIZE:
+                        raise ValueError(f"line of over {MAX_FRAME_SIZE} bytes")
+                    break
+                line = buffer[start:end].strip()
+                start = end + 1
+                if line:
+                    frames.append((False, line))
+        del buffer[:start]
+        return frames
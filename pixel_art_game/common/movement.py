@@ -0,0 +1,38 @@
+# common/movement.py
+
+# Players collide as the corners of a box this many pixels across, measured
+# from their x, y. Shared by the server and the client's prediction so both
+# agree on every step.
+PLAYER_SIZE = 32
+
+def fits(is_passable, x, y):
+    """Whether a player can stand at x, y; is_passable takes pixel coordinates"""
+    return (is_passable(x, y) and is_passable(x + PLAYER_SIZE, y) and
+            is_passable(x, y + PLAYER_SIZE))
+
+def try_move(is_passable, x, y, dx, dy):
+    """Where a player at x, y ends up after a step of dx, dy along one axis.
+
+    The player stops at the last whole pixel before anything impassable,
+    so one long step ends up where several short ones in a row would.
+    """
+    if abs(dx) + abs(dy) <= PLAYER_SIZE and fits(is_passable, x + dx, y + dy):
+        # Too short to cross a tile, so nothing in between can block it
+        return x + dx, y + dy
+    step_x = (dx > 0) - (dx < 0)
+    step_y = (dy > 0) - (dy < 0)
+    for _ in range(int(abs(dx) + abs(dy))):
+        if not fits(is_passable, x + step_x, y + step_y):
+            break
+        x += step_x
+        y += step_y
+    return x, y
+
+def apply_move(is_passable, x, y, dx, dy):
+    """Where a player at x, y ends up after one movement of dx, dy.
+
+    The vertical part is stepped first and then the horizontal one, so a
+    diagonal movement into a wall still slides along it.
+    """
+    x, y = try_move(is_passable, x, y, 0, dy)
+    return try_move(is_passable, x, y, dx, 0)
@@ -0,0 +1,173 @@
+# common/tilemap.py
+
+import base64
+import io
+import mmap
+import struct
+import zlib
+
+# A map file is a header followed by square chunks of tile ids, one byte a
+# tile. Chunks are stored row after row of chunks, and the tiles in each
+# chunk row after row; chunks past the map's right or bottom edge are
+# padded with zeros.
+MAP_MAGIC = b"PXMAP1"
+MAP_HEADER = struct.Struct(">6sIIH")  # magic, width, height, chunk size
+CHUNK_SIZE = 32  # tiles along each side of a chunk; a power of two
+
+def pack_tiles(tiles):
+    """Tile id bytes as compressed, base64 encoded text for a JSON message"""
+    return base64.b64encode(zlib.compress(bytes(tiles))).decode("ascii")
+
+def unpack_tiles(text):
+    return zlib.decompress(base64.b64decode(text))
+
+def layout_chunks(layout, chunk_size=CHUNK_SIZE):
+    """Yield the chunks of a list of rows of tile ids in map file order"""
+    width = len(layout[0])
+    height = len(layout)
+    for chunk_y in range(0, height, chunk_size):
+        for chunk_x in range(0, width, chunk_size):
+            chunk = bytearray()
+            for y in range(chunk_y, chunk_y + chunk_size):
+                row = layout[y][chunk_x:chunk_x + chunk_size] if y < height else []
+                chunk += bytes(row).ljust(chunk_size, b"\0")
+            yield chunk
+
+def _write_map(out, width, height, chunks, chunk_size):
+    out.write(MAP_HEADER.pack(MAP_MAGIC, width, height, chunk_size))
+    for chunk in chunks:
+        if len(chunk) != chunk_size * chunk_size:
+            raise ValueError(f"chunk of {len(chunk)} tiles, expected {chunk_size * chunk_size}")
+        out.write(chunk)
+
+def write_map(path, width, height, chunks, chunk_size=CHUNK_SIZE):
+    """Save a map file from its chunks, given in map file order"""
+    with open(path, "wb") as f:
+        _write_map(f, width, height, chunks, chunk_size)
+
+class TileGrid:
+    """Tile ids in one flat bytearray, row after row.
+
+    Whether a tile id can be walked on comes from a 256 entry lookup
+    table. Looking it up for every tile gives the passability bytearray,
+    which is kept in step with the tiles so a passability check is a
+    bounds check and one index.
+    """
+
+    def __init__(self, width, height, tiles=None, impassable=()):
+        self.width = width
+        self.height = height
+        self.tiles = bytearray(width * height) if tiles is None else bytearray(tiles)
+        if len(self.tiles) != width * height:
+            raise ValueError(f"{len(self.tiles)} tiles for a {width}x{height} map")
+        self.impassable = set(impassable)
+        self.lookup = bytes(0 if tile_id in self.impassable else 1 for tile_id in range(256))
+        self.passability = bytearray(self.tiles.translate(self.lookup))
+
+    def tile(self, tile_x, tile_y):
+        return self.tiles[tile_y * self.width + tile_x]
+
+    def set_tile(self, tile_x, tile_y, tile_id):
+        index = tile_y * self.width + tile_x
+        self.tiles[index] = tile_id
+        self.passability[index] = self.lookup[tile_id]
+
+    def is_passable(self, tile_x, tile_y):
+        """Check if a tile is on the map and passable (in tile coordinates)"""
+        return (0 <= tile_x < self.width and 0 <= tile_y < self.height and
+                self.passability[tile_y * self.width + tile_x] == 1)
+
+class ChunkedMap:
+    """A map held as map file bytes, usually memory mapped from disk.
+
+    Tiles are read straight out of the file's bytes, so the operating
+    system only pages in the chunks that are actually looked at. Files
+    are mapped copy on write: set_tile changes the map in memory and
+    never the file.
+    """
+
+    def __init__(self, data, impassable=()):
+        magic, width, height, chunk_size = MAP_HEADER.unpack_from(data)
+        if magic != MAP_MAGIC:
+            raise ValueError("not a map file")
+        if chunk_size & (chunk_size - 1):
+            raise ValueError(f"chunk size {chunk_size} is not a power of two")
+        self.data = data
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.chunk_bits = chunk_size.bit_length() - 1
+        self.chunk_mask = chunk_size - 1
+        self.chunks_x = -(-width // chunk_size)
+        self.chunks_y = -(-height // chunk_size)
+        expected = MAP_HEADER.size + self.chunks_x * self.chunks_y * chunk_size * chunk_size
+        if len(data) < expected:
+            raise ValueError(f"map file is {len(data)} bytes, expected {expected}")
+        self.impassable = set(impassable)
+        self.lookup = bytes(0 if tile_id in self.impassable else 1 for tile_id in range(256))
+        self.chunk_messages = {}  # (chunk_x, chunk_y) -> map_chunk payload
+
+    @classmethod
+    def open(cls, path, impassable=()):
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        return cls(data, impassable)
+
+    @classmethod
+    def from_layout(cls, layout, impassable=(), chunk_size=CHUNK_SIZE):
+        """Build a map in memory from a list of rows of tile ids"""
+        out = io.BytesIO()
+        _write_map(out, len(layout[0]), len(layout), layout_chunks(layout, chunk_size), chunk_size)
+        return cls(bytearray(out.getvalue()), impassable)
+
+    def _index(self, tile_x, tile_y):
+        bits = self.chunk_bits
+        mask = self.chunk_mask
+        chunk = (tile_y >> bits) * self.chunks_x + (tile_x >> bits)
+        return MAP_HEADER.size + ((chunk << bits | tile_y & mask) << bits | tile_x & mask)
+
+    def tile(self, tile_x, tile_y):
+        return self.data[self._index(tile_x, tile_y)]
+
+    def set_tile(self, tile_x, tile_y, tile_id):
+        self.data[self._index(tile_x, tile_y)] = tile_id
+        self.chunk_messages.pop((tile_x >> self.chunk_bits, tile_y >> self.chunk_bits), None)
+
+    def is_passable(self, tile_x, tile_y):
+        """Check if a tile is on the map and passable (in tile coordinates)"""
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return False
+        bits = self.chunk_bits
+        mask = self.chunk_mask
+        chunk = (tile_y >> bits) * self.chunks_x + (tile_x >> bits)
+        return self.lookup[self.data[MAP_HEADER.size + ((chunk << bits | tile_y & mask) << bits | tile_x & mask)]] == 1
+
+    def has_chunk(self, chunk_x, chunk_y):
+        return 0 <= chunk_x < self.chunks_x and 0 <= chunk_y < self.chunks_y
+
+    def chunk(self, chunk_x, chunk_y):
+        """The tile ids of one chunk, row after row"""
+        size = self.chunk_size * self.chunk_size
+        start = MAP_HEADER.size + (chunk_y * self.chunks_x + chunk_x) * size
+        return bytes(self.data[start:start + size])
+
+    def info_message(self):
+        """map_info payload: everything a client needs before any chunk"""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "chunk_size": self.chunk_size,
+            "impassable": sorted(self.impassable),
+        }
+
+    def chunk_message(self, chunk_x, chunk_y):
+        """map_chunk payload for one chunk, compressed once and reused"""
+        key = (chunk_x, chunk_y)
+        message = self.chunk_messages.get(key)
+        if message is None:
+            message = self.chunk_messages[key] = {
+                "x": chunk_x,
+                "y": chunk_y,
+                "tiles": pack_tiles(self.chunk(chunk_x, chunk_y)),
+            }
+        return message
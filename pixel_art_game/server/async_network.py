@@ -0,0 +1,93 @@
+# server/async_network.py
+
+import asyncio
+
+from .game_state import game_state
+from .network import clients, handle_message, receive_messages, scheduler, start_metrics, ClientConnection
+from .config import HOST, PORT, ASYNC_BACKLOG, ASYNC_READ_LIMIT
+
+class AsyncClientConnection(ClientConnection):
+    """Client served by the event loop; its outbox is drained by a task"""
+    def __init__(self, reader, writer):
+        super().__init__(writer.get_extra_info("socket"), writer.get_extra_info("peername"))
+        self.reader = reader
+        self.writer = writer
+        self.writable = asyncio.Event()
+        self.writer_task = None
+
+    def send(self, data, reliable=True):
+        replaced = super().send(data, reliable)
+        self.writable.set()
+        return replaced
+
+    def start_writer(self):
+        self.writer_task = asyncio.create_task(self.write_loop())
+
+    async def write_loop(self):
+        try:
+            while True:
+                data = self.outbox.take()
+                if data is None:
+                    break
+                if not data:
+                    self.writable.clear()
+                    await self.writable.wait()
+                    continue
+                self.writer.write(data)
+                await self.writer.drain()
+        except ConnectionError as e:
+            if not self.outbox.closed:
+                print(f"Write error to {self}: {e}")
+        finally:
+            self.close()
+
+    def close(self):
+        self.outbox.close()
+        self.writable.set()
+        self.writer.close()
+
+async def client_handler(reader, writer):
+    client = AsyncClientConnection(reader, writer)
+    player_id = client.player_id
+    client.start_writer()
+    clients.append(client)
+    print(f"Client {player_id} connected from {client.address}")
+
+    try:
+        while True:
+            data = await reader.read(ASYNC_READ_LIMIT)
+            if not data:
+                break
+
+            for message in receive_messages(client, data):
+                handle_message(client, player_id, message)
+
+    except (ConnectionError, ValueError) as e:
+        print(f"Connection error with {player_id}: {e}")
+    finally:
+        game_state.submit(game_state.remove_player, player_id)
+        if client in clients:
+            clients.remove(client)
+        client.close()
+        print(f"Client {player_id} disconnected")
+
+async def update_loop():
+    while True:
+        await asyncio.sleep(scheduler.step())
+
+async def serve():
+    server = await asyncio.start_server(
+        client_handler, HOST, PORT,
+        backlog=ASYNC_BACKLOG, limit=ASYNC_READ_LIMIT
+    )
+    print(f"Server listening on {HOST}:{PORT} (asyncio)")
+    start_metrics()
+    tick_task = asyncio.create_task(update_loop())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        tick_task.cancel()
+
+def start_async_server():
+    asyncio.run(serve())
@@ -1,9 +1,70 @@
 # server/config.py
 
+import os
+
 HOST = '127.0.0.1'
 PORT = 5555
 MAX_CLIENTS = 10
-UPDATE_INTERVAL = 0.05  # seconds between state updates
+UPDATE_INTERVAL = 0.05  # seconds between state updates sent to clients
+SIM_TICK_INTERVAL = 1 / 30  # fixed simulation timestep in seconds
+MAX_CATCH_UP_TICKS = 5  # ticks run back to back before dropping the backlog
+TICK_SAMPLE_SIZE = 600  # recent tick durations kept for percentiles
+ENEMY_SPEED_SCALE = 20  # enemy "speed" is in pixels per 1/20 s
+PLAYER_SPEED = 300  # pixels per second; the client moves 5 px a frame at 60 fps
+# Most ticks of movement a player may make in one tick, as move messages
+# from uneven frames can arrive bunched up; anything beyond is cut off
+MOVE_ALLOWANCE_TICKS = 3
+# "python" moves enemies one dict at a time, "numpy" keeps their positions
+# and stats in arrays and steps them all at once (needs numpy installed)
+ENEMY_BACKEND = "python"
+LOS_CACHE_SOURCES = 4096  # tiles whose line of sight bitsets are kept
+FLOW_FIELD_RADIUS = 12  # tiles searched around a player for routes to them
+FLOW_FIELD_CACHE = 256  # flow fields kept, one per goal tile
+STATS_LOG_INTERVAL = 0  # print serialization stats every N ticks (0 = off)
+
+# Tick phase timings, message counts and lock waits (see server/metrics.py)
+# are served as text at http://METRICS_HOST:METRICS_PORT/metrics, and as
+# JSON at /metrics.json; port 0 turns this off. With METRICS_LOG_FILE set
+# they are also written there every METRICS_LOG_INTERVAL seconds, keeping
+# METRICS_LOG_BACKUPS old files of METRICS_LOG_SIZE bytes.
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 5556
+METRICS_LOG_FILE = None
+METRICS_LOG_INTERVAL = 10.0
+METRICS_LOG_SIZE = 1024 * 1024
+METRICS_LOG_BACKUPS = 3
+
+# Codecs offered to clients in order of preference. "binary" packs the hot
+# messages; drop it to force JSON everywhere when debugging.
+WIRE_CODECS = ["binary", "json"]
+
+KEYFRAME_INTERVAL = 100  # ticks between full snapshots sent to a client
+REPLICATION_HISTORY = 32  # unacknowledged snapshots kept per client
+
+# Area of interest: clients only receive entities near their own player
+AOI_ENABLED = True
+AOI_RADIUS = 700  # pixels; covers the 1100x600 client view
+AOI_HYSTERESIS = 100  # extra distance before an entity leaves the view
+AOI_CELL_SIZE = 256  # pixels per cell of the grid the view is looked up in
+
+# "threaded" starts one thread per client, "asyncio" serves every client
+# from a single event loop
+SERVER_MODE = "threaded"
+ASYNC_BACKLOG = 512  # pending connections queued by the asyncio listener
+ASYNC_READ_LIMIT = 64 * 1024  # most bytes read from a client at once
+
+# Each client has its own queue of outgoing messages, drained by a writer of
+# its own. Only the newest update_state waits in it; a client is dropped once
+# everything else queued for it passes OUTBOX_LIMIT bytes, or when it hasn't
+# caught up for SLOW_CLIENT_TIMEOUT seconds.
+OUTBOX_LIMIT = 1024 * 1024
+SLOW_CLIENT_TIMEOUT = 5.0
+
+# The world is read from a chunked map file (see common/tilemap.py), made
+# with "python -m server.make_map". Without one hardcoded_layout is used.
+# Found next to this file, wherever the server is started from.
+MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps", "world.map")
+MAP_STREAM_RADIUS = 1  # chunks around a player's chunk streamed to its client
 
 RECONNECT_ATTEMPTS = 3
 RECONNECT_DELAY = 2
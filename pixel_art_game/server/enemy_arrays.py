@@ -0,0 +1,113 @@
+# server/enemy_arrays.py
+
+from common.tilemap import MAP_HEADER
+
+try:
+    import numpy as np
+except ImportError:  # optional: only the "numpy" enemy backend needs it
+    np = None
+
+# Enemy fields the simulation reads every tick, with the values the dict
+# based code falls back to when an enemy has no such key
+FIELDS = {
+    "x": 0,
+    "y": 0,
+    "speed": 2,
+    "health": 100,
+    "damage": 10,
+    "last_hit_time": 0,
+}
+TARGET_BLOCK = 4096  # enemies per distance table in EnemyArrays.targets
+
+class EnemyArrays:
+    """Enemy fields stored as NumPy columns, one row per enemy.
+
+    The enemy dicts stay the copy everything else reads and changes. Rows
+    are kept in step with them through add, remove and sync, and the
+    simulation writes back whatever it changes.
+    """
+
+    def __init__(self, tile_size, world_map, capacity=64):
+        self.tile_size = tile_size
+        self.width = world_map.width
+        self.height = world_map.height
+        self.chunk_size = world_map.chunk_size
+        # A view of the map's own bytes, so tile changes show up here too
+        self.tiles = np.frombuffer(
+            world_map.data, dtype=np.uint8, offset=MAP_HEADER.size,
+            count=world_map.chunks_y * world_map.chunks_x * self.chunk_size ** 2,
+        ).reshape(world_map.chunks_y, world_map.chunks_x, self.chunk_size, self.chunk_size)
+        self.passable_ids = np.frombuffer(world_map.lookup, dtype=np.uint8).astype(bool)
+        self.columns = {field: np.zeros(capacity) for field in FIELDS}
+        self.enemies = []  # row -> enemy dict
+        self.rows = {}  # enemy id -> row
+
+    def __len__(self):
+        return len(self.enemies)
+
+    def add(self, enemy):
+        row = len(self.enemies)
+        if row == len(self.columns["x"]):
+            for field, column in self.columns.items():
+                self.columns[field] = np.concatenate((column, np.zeros(len(column))))
+        self.enemies.append(enemy)
+        self.rows[enemy["id"]] = row
+        self.sync(enemy)
+
+    def remove(self, enemy_id):
+        """Drop an enemy's row, moving the last row into its place"""
+        row = self.rows.pop(enemy_id, None)
+        if row is None:
+            return
+        last = self.enemies.pop()
+        if row < len(self.enemies):
+            for column in self.columns.values():
+                column[row] = column[len(self.enemies)]
+            self.enemies[row] = last
+            self.rows[last["id"]] = row
+
+    def sync(self, enemy):
+        """Copy an enemy dict's fields into its row after it changed"""
+        row = self.rows.get(enemy["id"])
+        if row is None:
+            return
+        for field, default in FIELDS.items():
+            self.columns[field][row] = enemy.get(field, default)
+
+    def is_passable(self, x, y):
+        """GameState.is_passable for whole arrays of pixel coordinates"""
+        tile_x = np.floor_divide(x, self.tile_size).astype(np.intp)
+        tile_y = np.floor_divide(y, self.tile_size).astype(np.intp)
+        inside = (tile_x >= 0) & (tile_x < self.width) & (tile_y >= 0) & (tile_y < self.height)
+        tile_x = np.where(inside, tile_x, 0)
+        tile_y = np.where(inside, tile_y, 0)
+        size = self.chunk_size
+        tile_ids = self.tiles[tile_y // size, tile_x // size, tile_y % size, tile_x % size]
+        return inside & self.passable_ids[tile_ids]
+
+    def targets(self, player_x, player_y, offset_x, offset_y, radius):
+        """Find each enemy's nearest player and the way to its chase point.
+
+        The chase point is the player's position minus the offset. Only
+        enemies within radius of their chase point are returned, as arrays
+        of (rows, player indexes, dx, dy, distance).
+        """
+        count = len(self.enemies)
+        x = self.columns["x"][:count]
+        y = self.columns["y"][:count]
+        player_x = np.asarray(player_x, dtype=float)
+        player_y = np.asarray(player_y, dtype=float)
+        nearest = np.empty(count, dtype=np.intp)
+        # Enemy by player distance tables, a block of enemies at a time so
+        # memory stays bounded however many there are
+        for start in range(0, count, TARGET_BLOCK):
+            block_x = x[start:start + TARGET_BLOCK, np.newaxis]
+            block_y = y[start:start + TARGET_BLOCK, np.newaxis]
+            distance_sq = (player_x - block_x) ** 2 + (player_y - block_y) ** 2
+            nearest[start:start + TARGET_BLOCK] = distance_sq.argmin(axis=1)
+
+        dx = player_x[nearest] - offset_x - x
+        dy = player_y[nearest] - offset_y - y
+        distance = np.hypot(dx, dy)
+        rows = np.flatnonzero(distance <= radius)
+        return rows, nearest[rows], dx[rows], dy[rows], distance[rows]
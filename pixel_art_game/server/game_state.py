@@ -1,28 +1,91 @@
-import threading
 import math
 import time
 import random
 import json
-
-from .config import hardcoded_layout
+import os
+from collections import deque
+
+from common.movement import apply_move
+from common.tilemap import ChunkedMap
+from .config import (hardcoded_layout, UPDATE_INTERVAL, ENEMY_SPEED_SCALE, ENEMY_BACKEND,
+                     LOS_CACHE_SOURCES, FLOW_FIELD_RADIUS, FLOW_FIELD_CACHE, MAP_FILE,
+                     PLAYER_SPEED, SIM_TICK_INTERVAL, MOVE_ALLOWANCE_TICKS)
+from .enemy_arrays import EnemyArrays, np
+from .metrics import metrics, TimedLock
+from .pathfinding import FlowFields
+from .spatial import SpatialHash
+from .visibility import VisibilityCache
+
+ACTIVATION_RADIUS = 300
+AGGRO_RANGE = 200
+ATTACK_DISTANCE = 64
+CHASE_SPEED_MULTIPLIER = 1.5
+# Enemies chase a point up and to the left of the player so the sprites line up
+TARGET_OFFSET_X = 30
+TARGET_OFFSET_Y = 80
+TARGET_OFFSET_DISTANCE = math.hypot(TARGET_OFFSET_X, TARGET_OFFSET_Y)
+ENEMY_WIDTH = 32
+ENEMY_HEIGHT = 32
+IMPASSABLE_TILE_IDS = {4, 5, 6, 7, 8, 9, 10, 11}  # trees, rocks, walls, fences and water
+# Largest fireball a client may ask for; its heroes cast them at 100
+MAX_FIREBALL_RADIUS = 150
+# Furthest a player moves along each axis in one tick
+MAX_MOVE_PER_TICK = PLAYER_SPEED * SIM_TICK_INTERVAL * MOVE_ALLOWANCE_TICKS
+
+def _is_number(value):
+    """Whether a value from a client is a finite int or float"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value))
+
+def _clamp(value, limit):
+    return max(-limit, min(limit, value))
+
+def _copy_entity(entity):
+    """Copy an entity dict along with any lists it holds (e.g. effects)"""
+    return {key: list(value) if isinstance(value, list) else value
+            for key, value in entity.items()}
 
 class GameState:
     def __init__(self):
         self.players = {}
-        self.enemies = []
-        self.items = []
-        self.lock = threading.RLock()
+        self.lock = TimedLock()
         self.next_item_id = 1
         self.next_enemy_id = 1
         self.player_attacks = {}
+        # Enemies that followed a flow field last tick keep chasing beyond
+        # the aggro range, as the way round can lead away from the player
+        self.pursuing = set()
+        # Client commands waiting for the simulation thread, and the last
+        # snapshot it published for everyone else to read
+        self.commands = deque()
+        self.move_intents = {}  # player_id -> [dx, dy, seq] to apply this tick
+        self.snapshot = {"players": {}, "enemies": {}, "items": {}}
         self.tile_size = 64
-        self.width = len(hardcoded_layout[0])
-        self.height = len(hardcoded_layout)
-        impassable_tile_ids = {4, 5, 6, 7, 8, 9, 10, 11}
-        self.map = [
-            [{'passable': tile not in impassable_tile_ids} for tile in row]
-            for row in hardcoded_layout
-        ]
+        # Indexed by position (one grid cell per tile) and by id
+        self.enemies = SpatialHash(self.tile_size)
+        self.items = SpatialHash(self.tile_size)
+        if os.path.exists(MAP_FILE):
+            self.map = ChunkedMap.open(MAP_FILE, IMPASSABLE_TILE_IDS)
+        else:
+            print(f"No map file at {MAP_FILE}, using the built-in layout")
+            self.map = ChunkedMap.from_layout(hardcoded_layout, IMPASSABLE_TILE_IDS)
+        self.width = self.map.width
+        self.height = self.map.height
+        # Line of sight is only asked about between an enemy and a player
+        # it may chase, so bitsets only cover tiles that close
+        los_radius = int((ACTIVATION_RADIUS + TARGET_OFFSET_DISTANCE) // self.tile_size) + 1
+        self.visibility = VisibilityCache(
+            self.map.is_passable, self.width, self.height, los_radius, LOS_CACHE_SOURCES)
+        # Routes to each player's tile for enemies that can't go straight
+        self.flow_fields = FlowFields(
+            self.map.is_passable, self.width, self.height, FLOW_FIELD_RADIUS, FLOW_FIELD_CACHE)
+        # Column copy of the enemies for the "numpy" backend
+        self.enemy_arrays = None
+        if ENEMY_BACKEND == "numpy":
+            if np is None:
+                print("NumPy is not installed, using the python enemy backend")
+            else:
+                self.enemy_arrays = EnemyArrays(self.tile_size, self.map)
 
         with self.lock:
             self._initialize_enemies()
@@ -48,7 +111,7 @@ class GameState:
                     self.is_passable(x, y + 32) and
                     math.hypot(x - 100, y - 100) > 200):
                     
-                    self.enemies.append({
+                    self.add_enemy({
                         "id": f"enemy_{self.next_enemy_id}",
                         "type": random.choice(enemy_types),
                         "x": x,
@@ -79,7 +142,7 @@ class GameState:
                     self.is_passable(x + 24, y) and 
                     self.is_passable(x, y + 24)):
                     
-                    self.items.append({
+                    self.items.add({
                         "id": f"item_{self.next_item_id}",
                         "type": random.choice(item_types),
                         "x": x,
@@ -91,6 +154,31 @@ class GameState:
                     
                 attempts += 1
 
+    def submit(self, command, *args):
+        """Queue command(*args) to run at the start of the next tick.
+
+        Connection threads call this instead of changing the state
+        themselves, so only the simulation thread ever writes to it.
+        """
+        self.commands.append((command, args))
+
+    def process_commands(self):
+        """Run every command queued before this call, in arrival order"""
+        for _ in range(len(self.commands)):
+            command, args = self.commands.popleft()
+            try:
+                command(*args)
+            except Exception as e:
+                print(f"Command {command.__name__} failed: {e}")
+
+    def publish_snapshot(self):
+        """Replace self.snapshot with a fresh copy of the state.
+
+        The published snapshot is never modified afterwards, so readers on
+        other threads can use it without taking the lock.
+        """
+        self.snapshot = self.get_snapshot()
+
     def add_player(self, player_id, name, avatar, hero_class="warrior"):
         with self.lock:
             base_stats = {
@@ -143,39 +231,90 @@ class GameState:
         tile_x = int(x // self.tile_size)
         tile_y = int(y // self.tile_size)
         
-        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
-            return False
-            
-        return self.map[tile_y][tile_x]['passable']
+        return self.map.is_passable(tile_x, tile_y)
+
+    def is_box_passable(self, x, y, width=ENEMY_WIDTH, height=ENEMY_HEIGHT):
+        """Check all four corners of a box whose top left is at x, y"""
+        return (self.is_passable(x, y) and
+                self.is_passable(x + width, y) and
+                self.is_passable(x, y + height) and
+                self.is_passable(x + width, y + height))
+
+    def set_tile(self, tile_x, tile_y, tile_id):
+        """Change a tile, dropping whatever was cached about it"""
+        with self.lock:
+            self.map.set_tile(tile_x, tile_y, tile_id)
+            self.visibility.invalidate(tile_x, tile_y)
+            self.flow_fields.invalidate(tile_x, tile_y)
     
-    def move_player(self, player_id, dx, dy):
+    def queue_move(self, player_id, dx, dy, seq=None):
+        """Add to the movement a player makes on this tick.
+
+        Runs on the simulation thread. Moves that arrive together are
+        summed, so each player moves at most once per tick, and no further
+        than MAX_MOVE_PER_TICK along each axis. Returns False, ignoring the
+        move, unless dx and dy are finite numbers and seq an int or None.
+        """
+        if not (_is_number(dx) and _is_number(dy)):
+            return False
+        if seq is not None and (not isinstance(seq, int) or isinstance(seq, bool)):
+            return False
+        intent = self.move_intents.get(player_id)
+        if intent is None:
+            intent = self.move_intents[player_id] = [0, 0, None]
+        intent[0] = _clamp(intent[0] + dx, MAX_MOVE_PER_TICK)
+        intent[1] = _clamp(intent[1] + dy, MAX_MOVE_PER_TICK)
+        if seq is not None:
+            intent[2] = seq
+        return True
+
+    def apply_moves(self):
+        """Move every player by their queued movement, under one lock"""
         with self.lock:
-            player = self.players.get(player_id)
-            if player:
-                new_x = player["x"] + dx
-                new_y = player["y"] + dy
-                
-                if self.is_passable(new_x, new_y) and self.is_passable(new_x + 32, new_y) and self.is_passable(new_x, new_y + 32):
-                    player["x"] = new_x
-                    player["y"] = new_y
+            for player_id, (dx, dy, seq) in self.move_intents.items():
+                player = self.players.get(player_id)
+                if not player:
+                    continue
+                try:
+                    player["x"], player["y"] = apply_move(self.is_passable, player["x"], player["y"], dx, dy)
+                except Exception as e:
+                    # One player's move must never stop the tick for everyone
+                    print(f"Move for {player_id} failed: {e}")
+                    continue
+                if seq is not None:
+                    # Tells the client which of its predicted moves this state includes
+                    player["move_seq"] = seq
+            self.move_intents.clear()
 
     def remove_player(self, player_id):
         with self.lock:
             self.players.pop(player_id, None)
 
+    def add_enemy(self, enemy):
+        with self.lock:
+            self.enemies.add(enemy)
+            if self.enemy_arrays is not None:
+                self.enemy_arrays.add(enemy)
+
+    def remove_enemy(self, enemy_id):
+        with self.lock:
+            if self.enemy_arrays is not None:
+                self.enemy_arrays.remove(enemy_id)
+            return self.enemies.remove(enemy_id)
+
     def pickup_item(self, player_id, item_id):
         with self.lock:
             player = self.players.get(player_id)
             if not player:
                 return False
-            for i, item in enumerate(self.items):
-                if item['id'] == item_id:
-                    distance = math.hypot(player['x'] - item['x'], player['y'] - item['y'])
-                    if distance <= 50:
-                        player['inventory'].append(item)
-                        del self.items[i]
-                        return True
-                    return False
+            item = self.items.get(item_id)
+            if item is None:
+                return False
+            distance = math.hypot(player['x'] - item['x'], player['y'] - item['y'])
+            if distance <= 50:
+                player['inventory'].append(item)
+                self.items.remove(item_id)
+                return True
             return False
 
     def get_picked_item_type(self, player_id, item_id):
@@ -197,7 +336,7 @@ class GameState:
             item = player['inventory'].pop(item_index)
             item['x'] = player['x']
             item['y'] = player['y']
-            self.items.append(item)
+            self.items.add(item)
             return True
 
     def get_state(self):
@@ -214,11 +353,29 @@ class GameState:
                         "max_health": p["max_health"],  
                         "mana": p["mana"], 
                         "max_mana": p["max_mana"],  
-                        "hero_class": p["hero_class"]  
+                        "hero_class": p["hero_class"],
+                        "move_seq": p.get("move_seq", 0)
                     } for pid, p in self.players.items()
                 },
-                "enemies": self.enemies,
-                "items": self.items
+                "enemies": list(self.enemies),
+                "items": list(self.items)
+            }
+
+    def get_snapshot(self):
+        """Copy of the replicated state with every entity keyed by id.
+
+        Unlike get_state nothing in the result is shared with the live game,
+        so it can be kept around and diffed against later snapshots.
+        """
+        with self.lock:
+            state = self.get_state()
+            return {
+                "players": {
+                    pid: dict(p, inventory=list(p["inventory"]))
+                    for pid, p in state["players"].items()
+                },
+                "enemies": {e["id"]: _copy_entity(e) for e in state["enemies"]},
+                "items": {i["id"]: _copy_entity(i) for i in state["items"]}
             }
 
     def update_effects(self):
@@ -235,94 +392,257 @@ class GameState:
 
     def handle_enemy_attack(self, player_id, enemy_id, damage, effect=None):
         with self.lock:
+            enemy = self.enemies.get(enemy_id)
+            if enemy is None:
+                return False
 
-            for i, enemy in enumerate(self.enemies):
-                if enemy['id'] == enemy_id:
-                    if effect:
-                        self.apply_effect(enemy_id, {
-                            "type": effect,
-                            "duration": 3.0,
-                            "strength": 1.0
-                        })
-                    # Reduce enemy health
-                    enemy['health'] = enemy.get('health', 100) - damage
-                    
-                    if enemy['health'] <= 0:
-                        self.enemies.pop(i)
-                        if random.random() < 0.3:
-                            self.generate_item(x=enemy['x'], y=enemy['y'])
-                    
-                    return True
-            return False
+            if effect:
+                self.apply_effect(enemy_id, {
+                    "type": effect,
+                    "duration": 3.0,
+                    "strength": 1.0
+                })
+            # Reduce enemy health
+            enemy['health'] = enemy.get('health', 100) - damage
+            if self.enemy_arrays is not None:
+                self.enemy_arrays.sync(enemy)
+
+            if enemy['health'] <= 0:
+                self.remove_enemy(enemy_id)
+                if random.random() < 0.3:
+                    self.generate_item(x=enemy['x'], y=enemy['y'])
+
+            return True
         
-    def update_enemies(self):
+    def _enemies_near_players(self, reach):
+        """Pair every enemy that may have a living player within reach with
+        the players it has to check.
+
+        Players are bucketed once per tick into coarse cells one reach plus
+        one tile wide. Any player within reach of an enemy grid cell stands
+        in the 3x3 coarse cells around it, so enemy cells with nobody there
+        are skipped without looking at their enemies. Whichever is smaller
+        is walked: all occupied enemy cells, or the enemy cells inside the
+        coarse cells that have players nearby.
+        """
+        tile = self.tile_size
+        coarse = reach + tile
+        player_cells = {}
+        for pid, p in self.players.items():
+            if p.get('state') != 'dead':
+                cell = (int(p['x'] // coarse), int(p['y'] // coarse))
+                player_cells.setdefault(cell, []).append((pid, p))
+
+        nearby = {}  # coarse cell -> players in the 3x3 block around it
+        for (coarse_x, coarse_y), group in player_cells.items():
+            for neighbour_x in (coarse_x - 1, coarse_x, coarse_x + 1):
+                for neighbour_y in (coarse_y - 1, coarse_y, coarse_y + 1):
+                    nearby.setdefault((neighbour_x, neighbour_y), []).extend(group)
+
+        cells = self.enemies.cells
+        span = int(coarse // tile) + 1
+        pairs = []
+        if len(cells) <= len(nearby) * span * span:
+            for (cell_x, cell_y), bucket in cells.items():
+                players = nearby.get((cell_x * tile // coarse, cell_y * tile // coarse))
+                if players:
+                    for enemy in bucket.values():
+                        pairs.append((enemy, players))
+        else:
+            for (coarse_x, coarse_y), players in nearby.items():
+                for cell_x in range(math.ceil(coarse_x * coarse / tile),
+                                    math.ceil((coarse_x + 1) * coarse / tile)):
+                    for cell_y in range(math.ceil(coarse_y * coarse / tile),
+                                        math.ceil((coarse_y + 1) * coarse / tile)):
+                        bucket = cells.get((cell_x, cell_y))
+                        if bucket:
+                            for enemy in bucket.values():
+                                pairs.append((enemy, players))
+        return pairs
+
+    def update_enemies(self, dt=UPDATE_INTERVAL):
+        """Move and attack with every enemy for a timestep of dt seconds"""
         with self.lock:
             if not self.players:
                 return
-                
-            ACTIVATION_RADIUS = 300
-            AGGRO_RANGE = 200
-            ATTACK_DISTANCE = 64
-            CHASE_SPEED_MULTIPLIER = 1.5
+
             current_time = time.time()
-            
-            for enemy in self.enemies:
-                alive_players = [
-                (pid, p) for pid, p in self.players.items() 
-                if p.get('state') != 'dead'
-                ]
+            pursuing = set()
+            if self.enemy_arrays is not None:
+                self._update_enemies_bulk(dt, current_time, pursuing)
+            else:
+                # An enemy further than this from every player is outside the
+                # activation radius of its target, so it is skipped entirely
+                reach = ACTIVATION_RADIUS + TARGET_OFFSET_DISTANCE
+                for enemy, players in self._enemies_near_players(reach):
+                    self._step_enemy(enemy, players, reach * reach, dt, current_time, pursuing)
+            self.pursuing = pursuing
+
+    def _step_enemy(self, enemy, players, reach_sq, dt, current_time, pursuing):
+        """Chase and attack the nearest living player among (id, player) pairs.
+
+        Enemies that follow a flow field this tick are added to pursuing.
+        """
+        enemy_x = enemy['x']
+        enemy_y = enemy['y']
+        nearest_player_id = None
+        nearest_sq = reach_sq
+        for pid, p in players:
+            distance_sq = (p['x'] - enemy_x) ** 2 + (p['y'] - enemy_y) ** 2
+            if distance_sq <= nearest_sq and p.get('state') != 'dead':
+                nearest_player_id = pid
+                nearest_sq = distance_sq
+        if nearest_player_id is None:
+            return
+        nearest_player = self.players[nearest_player_id]
+
+        target_x = nearest_player['x'] - TARGET_OFFSET_X
+        target_y = nearest_player['y'] - TARGET_OFFSET_Y
+        
+        dx = target_x - enemy['x']
+        dy = target_y - enemy['y']
+        distance = math.hypot(dx, dy)
+
+        if distance > ACTIVATION_RADIUS:
+            return
+
+        sees_player = self.has_line_of_sight(enemy['x'], enemy['y'], nearest_player['x'], nearest_player['y'])
+
+        chasing = distance <= AGGRO_RANGE or enemy['id'] in self.pursuing
+        if chasing and distance > 0:
+            move_speed = enemy.get('speed', 2) * CHASE_SPEED_MULTIPLIER * ENEMY_SPEED_SCALE * dt
+            move_factor = move_speed / distance
+            new_x = enemy['x'] + dx * move_factor
+            new_y = enemy['y'] + dy * move_factor
+
+            # Straight at a player it can see while it keeps seeing them,
+            # otherwise around whatever is in the way
+            if (sees_player and self.is_box_passable(new_x, new_y) and
+                    self.has_line_of_sight(new_x, new_y, nearest_player['x'], nearest_player['y'])):
+                enemy['x'] = new_x
+                enemy['y'] = new_y
+                self.enemies.update(enemy)
+            elif self._follow_flow_field(enemy, nearest_player, move_speed):
+                pursuing.add(enemy['id'])
                 
-                if not alive_players:
-                    continue
+        if sees_player and distance < ATTACK_DISTANCE:
+            self._enemy_attack(enemy, nearest_player_id, target_x, target_y, current_time)
+
+    def _follow_flow_field(self, enemy, player, move_speed):
+        """Move an enemy move_speed pixels along the flow field to a player.
+
+        The enemy heads for the middle of the next tile on the way. If the
+        step clips an obstacle it slides along one axis instead. Returns
+        whether it moved.
+        """
+        tile = self.tile_size
+        field = self.flow_fields.field((int(player['x'] // tile), int(player['y'] // tile)))
+        here = (int((enemy['x'] + ENEMY_WIDTH / 2) // tile), int((enemy['y'] + ENEMY_HEIGHT / 2) // tile))
+        next_tile = field.next_tile.get(here)
+        if next_tile is None:
+            return False  # no way there within the field
+
+        dx = next_tile[0] * tile + (tile - ENEMY_WIDTH) / 2 - enemy['x']
+        dy = next_tile[1] * tile + (tile - ENEMY_HEIGHT) / 2 - enemy['y']
+        distance = math.hypot(dx, dy)
+        if distance == 0:
+            return False
+        move_factor = min(move_speed, distance) / distance
+        new_x = enemy['x'] + dx * move_factor
+        new_y = enemy['y'] + dy * move_factor
+
+        for x, y in ((new_x, new_y), (new_x, enemy['y']), (enemy['x'], new_y)):
+            if self.is_box_passable(x, y):
+                enemy['x'] = x
+                enemy['y'] = y
+                self.enemies.update(enemy)
+                return True
+        return False
+
+    def _enemy_attack(self, enemy, player_id, target_x, target_y, current_time):
+        """Hit a player unless the enemy already did within the last second"""
+        if current_time - enemy.get('last_hit_time', 0) > 1.0:
+            enemy['last_hit_time'] = current_time
+            metrics.count_event("enemy_hits")
+            
+            player = self.players[player_id]
+            player['health'] -= enemy.get('damage', 10)
+            
+            if player['health'] <= 0:
+                from .network import broadcast
+                broadcast(json.dumps({
+                    "type": "player_death",
+                    "data": {"player_id": player_id}
+                }), "player_death")
+                # Other enemies may still hold this player as a candidate
+                player['state'] = 'dead'
+                del self.players[player_id]
+
+    def _update_enemies_bulk(self, dt, current_time, pursuing):
+        """update_enemies for the "numpy" backend.
+
+        Nearest players, distances, chase steps and passability are worked
+        out for every enemy at once. Only enemies within the activation
+        radius are then visited in row order for line of sight, flow field
+        steps and attacks.
+        An enemy whose player was killed earlier in the tick is redone
+        with _step_enemy, as the dict based loop would have picked another.
+        """
+        arrays = self.enemy_arrays
+        living = [(pid, p) for pid, p in self.players.items() if p.get('state') != 'dead']
+        if not living or not len(arrays):
+            return
+
+        rows, targets, dx, dy, distance = arrays.targets(
+            [p['x'] for _, p in living], [p['y'] for _, p in living],
+            TARGET_OFFSET_X, TARGET_OFFSET_Y, ACTIVATION_RADIUS)
+        xs = arrays.columns['x']
+        ys = arrays.columns['y']
+        enemy_x = xs[rows]
+        enemy_y = ys[rows]
+
+        move_speed = arrays.columns['speed'][rows] * CHASE_SPEED_MULTIPLIER * ENEMY_SPEED_SCALE * dt
+        with np.errstate(divide='ignore', invalid='ignore'):
+            move_factor = move_speed / distance
+        new_x = enemy_x + dx * move_factor
+        new_y = enemy_y + dy * move_factor
+        chases = (distance <= AGGRO_RANGE) & (distance > 0)
+        clear = (arrays.is_passable(new_x, new_y) &
+                 arrays.is_passable(new_x + ENEMY_WIDTH, new_y) &
+                 arrays.is_passable(new_x, new_y + ENEMY_HEIGHT) &
+                 arrays.is_passable(new_x + ENEMY_WIDTH, new_y + ENEMY_HEIGHT))
+        attacks = distance < ATTACK_DISTANCE
+
+        reach_sq = (ACTIVATION_RADIUS + TARGET_OFFSET_DISTANCE) ** 2
+        for row, target, x, y, distance_now, moved_x, moved_y, speed, chases_now, clear_now, attacks_now in zip(
+                rows.tolist(), targets.tolist(), enemy_x.tolist(), enemy_y.tolist(), distance.tolist(),
+                new_x.tolist(), new_y.tolist(), move_speed.tolist(), chases.tolist(),
+                clear.tolist(), attacks.tolist()):
+            enemy = arrays.enemies[row]
+            player_id, player = living[target]
+            if player.get('state') == 'dead':
+                self._step_enemy(enemy, living, reach_sq, dt, current_time, pursuing)
+                arrays.sync(enemy)
+                continue
+
+            sees_player = self.has_line_of_sight(x, y, player['x'], player['y'])
+
+            if chases_now or (distance_now > 0 and enemy['id'] in self.pursuing):
+                if (sees_player and clear_now and
+                        self.has_line_of_sight(moved_x, moved_y, player['x'], player['y'])):
+                    enemy['x'] = xs[row] = moved_x
+                    enemy['y'] = ys[row] = moved_y
+                    self.enemies.update(enemy)
+                elif self._follow_flow_field(enemy, player, speed):
+                    xs[row] = enemy['x']
+                    ys[row] = enemy['y']
+                    pursuing.add(enemy['id'])
+
+            if sees_player and attacks_now:
+                self._enemy_attack(enemy, player_id, player['x'] - TARGET_OFFSET_X,
+                                   player['y'] - TARGET_OFFSET_Y, current_time)
+                arrays.columns['last_hit_time'][row] = enemy['last_hit_time']
 
-                nearest_player_id, nearest_player = min(
-                    ((pid, p) for pid, p in self.players.items()),
-                    key=lambda item: math.hypot(item[1]['x'] - enemy['x'], item[1]['y'] - enemy['y'])
-                )
-                
-                target_x = nearest_player['x'] - 30  # 20 blocks west
-                target_y = nearest_player['y'] - 80  # 60 blocks north
-                
-                dx = target_x - enemy['x']
-                dy = target_y - enemy['y']
-                distance = math.hypot(dx, dy)
-
-                if distance > ACTIVATION_RADIUS:
-                    continue 
-
-                if not self.has_line_of_sight(enemy['x'], enemy['y'], nearest_player['x'], nearest_player['y']):
-                    continue  # Enemy can't see player, won't chase
-
-                if distance <= AGGRO_RANGE and distance > 0:
-                    move_speed = enemy.get('speed', 2) * CHASE_SPEED_MULTIPLIER
-                    move_factor = move_speed / distance
-                    new_x = enemy['x'] + dx * move_factor
-                    new_y = enemy['y'] + dy * move_factor
-
-                    enemy_width = 32
-                    enemy_height = 32
-                    if (self.is_passable(new_x, new_y) and 
-                        self.is_passable(new_x + enemy_width, new_y) and 
-                        self.is_passable(new_x, new_y + enemy_height) and
-                        self.is_passable(new_x + enemy_width, new_y + enemy_height)):
-                        enemy['x'] = new_x
-                        enemy['y'] = new_y
-                        
-                if distance < ATTACK_DISTANCE:
-                    if current_time - enemy.get('last_hit_time', 0) > 1.0:
-                        enemy['last_hit_time'] = current_time
-                        print(f"Enemy attacking offset position at {target_x},{target_y}")
-                        
-                        nearest_player['health'] -= enemy.get('damage', 10)
-                        
-                        if nearest_player['health'] <= 0:
-                            from .network import broadcast
-                            broadcast(json.dumps({
-                                "type": "player_death",
-                                "data": {"player_id": nearest_player_id}
-                            }))
-                            del self.players[nearest_player_id]
-                            
     def generate_item(self, item_type=None, x=None, y=None):
         with self.lock:
             item_types = ["sword", "shield", "potion", "coin"]
@@ -333,7 +653,7 @@ class GameState:
                 "y": y if y is not None else random.randint(50, 550),
                 "value": round(random.uniform(0.1, 1.0), 1)
             }
-            self.items.append(item)
+            self.items.add(item)
             self.next_item_id += 1
             return item
     
@@ -394,20 +714,23 @@ class GameState:
                 target_y = ability_data.get("target_y", 0)
                 radius = ability_data.get("radius", 100)
                 damage = ability_data.get("damage", 30)
+                if not (_is_number(target_x) and _is_number(target_y)
+                        and _is_number(radius) and radius > 0):
+                    return {"success": False, "message": "Invalid fireball"}
+                radius = min(radius, MAX_FIREBALL_RADIUS)
 
-                print(f"Fireball used at ({target_x}, {target_y}) with radius {radius} and damage {damage}")
+                metrics.count_event("fireballs")
 
                 affected = []
-                for enemy in self.enemies:
+                for enemy in self.enemies.query_radius(target_x, target_y, radius):
                     distance = math.hypot(enemy["x"] - target_x, enemy["y"] - target_y)
                     if distance <= radius:
                         affected.append(enemy["id"])
                         distance_factor = 1 - (distance / radius)
                         actual_damage = int(damage * distance_factor)
-                        print(f"Enemy {enemy['id']} at ({enemy['x']}, {enemy['y']}) took {actual_damage} damage.")
                         self.handle_enemy_attack(player_id, enemy["id"], actual_damage)
 
-                print(f"Total enemies hit: {len(affected)}")
+                metrics.count_event("fireball_hits", len(affected))
 
                 return {
                     "success": True,
@@ -438,14 +761,14 @@ class GameState:
                 target["effects"].append(new_effect)
                 return True
                 
-            for enemy in self.enemies:
-                if enemy["id"] == target_id:
-                    if "effects" not in enemy:
-                        enemy["effects"] = []
-                        
-                    enemy["effects"].append(new_effect)
-                    return True
-            
+            enemy = self.enemies.get(target_id)
+            if enemy is not None:
+                if "effects" not in enemy:
+                    enemy["effects"] = []
+
+                enemy["effects"].append(new_effect)
+                return True
+
             return False
 
     def add_mana(self, player_id, mana_amount):
@@ -460,27 +783,8 @@ class GameState:
         return None
     
     def has_line_of_sight(self, x0, y0, x1, y1):
-        """Bresenham's line algorithm to check if there's a wall between two points"""
-        tile_x0, tile_y0 = int(x0 // self.tile_size), int(y0 // self.tile_size)
-        tile_x1, tile_y1 = int(x1 // self.tile_size), int(y1 // self.tile_size)
-
-        dx = abs(tile_x1 - tile_x0)
-        dy = abs(tile_y1 - tile_y0)
-        sx = 1 if tile_x0 < tile_x1 else -1
-        sy = 1 if tile_y0 < tile_y1 else -1
-        err = dx - dy
-
-        while tile_x0 != tile_x1 or tile_y0 != tile_y1:
-            if not (0 <= tile_x0 < self.width and 0 <= tile_y0 < self.height) or not self.map[tile_y0][tile_x0]['passable']:
-                return False
-            e2 = 2 * err
-            if e2 > -dy:
-                err -= dy
-                tile_x0 += sx
-            if e2 < dx:
-                err += dx
-                tile_y0 += sy
-
-        return True
+        """Check if there's a wall between two points (in pixel coordinates)"""
+        return self.visibility.visible(int(x0 // self.tile_size), int(y0 // self.tile_size),
+                                       int(x1 // self.tile_size), int(y1 // self.tile_size))
 
 game_state = GameState()
\ No newline at end of file
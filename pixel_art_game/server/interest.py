@@ -0,0 +1,101 @@
+# server/interest.py
+
+from .config import AOI_RADIUS, AOI_HYSTERESIS, AOI_CELL_SIZE
+from .replication import CATEGORIES
+
+class SnapshotGrid:
+    """A published snapshot's entities bucketed by position.
+
+    Built once per send, so each client only looks at the cells around
+    its player instead of every entity in the world. Clients that turn
+    out to see exactly the same entities are handed the same view object,
+    which lets send_updates encode their update once.
+    """
+    def __init__(self, snapshot, cell_size=AOI_CELL_SIZE):
+        self.snapshot = snapshot
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> [(category, entity_id, entity)]
+        self.views = {}  # frozenset of (category, entity_id) -> (that frozenset, view)
+        # (center x, center y, visible before) -> (visible, view); players
+        # standing on the same spot, as they do at spawn, are looked up once
+        self.filtered = {}
+        for category in CATEGORIES:
+            for entity_id, entity in snapshot[category].items():
+                cell = (int(entity["x"] // cell_size), int(entity["y"] // cell_size))
+                self.cells.setdefault(cell, []).append((category, entity_id, entity))
+
+    def near(self, x, y, radius):
+        """(category, entity_id, entity, distance_sq) of everything within radius"""
+        size = self.cell_size
+        radius_sq = radius * radius
+        found = []
+        cells = self.cells
+        for cell_x in range(int((x - radius) // size), int((x + radius) // size) + 1):
+            for cell_y in range(int((y - radius) // size), int((y + radius) // size) + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if not bucket:
+                    continue
+                for category, entity_id, entity in bucket:
+                    dx = entity["x"] - x
+                    dy = entity["y"] - y
+                    distance_sq = dx * dx + dy * dy
+                    if distance_sq <= radius_sq:
+                        found.append((category, entity_id, entity, distance_sq))
+        return found
+
+    def view(self, visible, entities):
+        """(visible, view) shared by every client with this visible set.
+
+        The view is built from entities the first time. The visible set
+        handed back is the first one seen, so equal sets are the same object
+        and compare at once when they are next used as a key.
+        """
+        shared = self.views.get(visible)
+        if shared is None:
+            view = {category: {} for category in CATEGORIES}
+            for category, entity_id, entity in entities:
+                view[category][entity_id] = entity
+            shared = self.views[visible] = (visible, view)
+        return shared
+
+class InterestSet:
+    """Entities close enough to one client's player to be replicated to it"""
+    def __init__(self):
+        self.center = None  # last known position of the client's player
+        self.visible = frozenset()  # (category, entity_id) sent last time
+
+    def filter_snapshot(self, grid, player_id):
+        """Return the part of the grid's snapshot this client can plausibly see.
+
+        Entities enter the view within AOI_RADIUS of the player and only leave
+        once they are AOI_HYSTERESIS further out, so anything moving along the
+        edge does not flicker in and out. Until the client has a player the
+        whole snapshot is returned unchanged.
+        """
+        snapshot = grid.snapshot
+        player = snapshot["players"].get(player_id)
+        if player is not None:
+            self.center = (player["x"], player["y"])
+        if self.center is None:
+            return snapshot
+
+        center_x, center_y = self.center
+        previous = self.visible
+        key = (center_x, center_y, previous)
+        shared = grid.filtered.get(key)
+        if shared is not None:
+            self.visible, view = shared
+            return view
+
+        enter_sq = AOI_RADIUS ** 2
+        kept = []
+        for category, entity_id, entity, distance_sq in grid.near(
+                center_x, center_y, AOI_RADIUS + AOI_HYSTERESIS):
+            # The client's own player is at the center, so always kept
+            if distance_sq <= enter_sq or (category, entity_id) in previous:
+                kept.append((category, entity_id, entity))
+
+        visible = frozenset((category, entity_id) for category, entity_id, _ in kept)
+        shared = grid.filtered[key] = grid.view(visible, kept)
+        self.visible, view = shared
+        return view
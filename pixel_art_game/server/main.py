@@ -1,6 +1,21 @@
 # server/main.py
 
+import argparse
+
+from .config import SERVER_MODE
 from .network import start_server
+from .async_network import start_async_server
+
+def main():
+    parser = argparse.ArgumentParser(description="2D pixel art game server")
+    parser.add_argument("--mode", choices=["threaded", "asyncio"], default=SERVER_MODE,
+                        help="how client connections are served")
+    args = parser.parse_args()
+
+    if args.mode == "asyncio":
+        start_async_server()
+    else:
+        start_server()
 
 if __name__ == "__main__":
-    start_server()
\ No newline at end of file
+    main()
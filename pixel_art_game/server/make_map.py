@@ -0,0 +1,52 @@
+# server/make_map.py
+
+import argparse
+import random
+
+from common.tilemap import CHUNK_SIZE, layout_chunks, write_map
+from .config import MAP_FILE, hardcoded_layout
+
+# Tile ids and how often each turns up on a generated map
+RANDOM_TILES = [0, 1, 2, 3, 4, 5, 6, 7, 10, 12]
+RANDOM_WEIGHTS = [70, 6, 4, 4, 3, 3, 2, 2, 4, 2]
+WALL_TILE = 8
+
+def random_chunks(width, height, chunk_size=CHUNK_SIZE):
+    """Yield the chunks of a random map walled in along its edges"""
+    for chunk_y in range(0, height, chunk_size):
+        for chunk_x in range(0, width, chunk_size):
+            chunk = bytearray(random.choices(RANDOM_TILES, RANDOM_WEIGHTS, k=chunk_size * chunk_size))
+            if 0 < chunk_x and chunk_x + chunk_size < width and 0 < chunk_y and chunk_y + chunk_size < height:
+                yield chunk
+                continue
+            for y in range(chunk_size):
+                for x in range(chunk_size):
+                    tile_x = chunk_x + x
+                    tile_y = chunk_y + y
+                    if tile_x >= width or tile_y >= height:
+                        chunk[y * chunk_size + x] = 0
+                    elif tile_x in (0, width - 1) or tile_y in (0, height - 1):
+                        chunk[y * chunk_size + x] = WALL_TILE
+            yield chunk
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a chunked map file for the server")
+    parser.add_argument("path", nargs="?", default=MAP_FILE,
+                        help="map file to write (default: the one the server reads, %(default)s)")
+    parser.add_argument("--random", nargs=2, type=int, metavar=("WIDTH", "HEIGHT"),
+                        help="generate a random map of this many tiles instead of "
+                             "saving the built-in layout")
+    parser.add_argument("--seed", type=int, help="seed for --random")
+    args = parser.parse_args()
+
+    if args.random:
+        width, height = args.random
+        random.seed(args.seed)
+        write_map(args.path, width, height, random_chunks(width, height))
+    else:
+        width, height = len(hardcoded_layout[0]), len(hardcoded_layout)
+        write_map(args.path, width, height, layout_chunks(hardcoded_layout))
+    print(f"Wrote a {width}x{height} map to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# server/map_stream.py
+
+from .config import MAP_STREAM_RADIUS
+
+class MapStream:
+    """The map chunks one client has been sent so far"""
+    def __init__(self):
+        self.center = None  # chunk the client's player was last seen in
+        self.sent = set()
+
+    def due_chunks(self, world_map, x, y, tile_size):
+        """Chunks to send now for a player at pixel position x, y.
+
+        Clients start without any of the map. Each time the player enters
+        a new chunk, the chunks within MAP_STREAM_RADIUS of it that the
+        client doesn't have yet are due, nearest first.
+        """
+        chunk_pixels = world_map.chunk_size * tile_size
+        center = (int(x // chunk_pixels), int(y // chunk_pixels))
+        if center == self.center:
+            return []
+        self.center = center
+
+        center_x, center_y = center
+        due = []
+        for chunk_y in range(center_y - MAP_STREAM_RADIUS, center_y + MAP_STREAM_RADIUS + 1):
+            for chunk_x in range(center_x - MAP_STREAM_RADIUS, center_x + MAP_STREAM_RADIUS + 1):
+                chunk = (chunk_x, chunk_y)
+                if chunk not in self.sent and world_map.has_chunk(chunk_x, chunk_y):
+                    due.append(chunk)
+        due.sort(key=lambda chunk: max(abs(chunk[0] - center_x), abs(chunk[1] - center_y)))
+        self.sent.update(due)
+        return due
@@ -0,0 +1,193 @@
+# server/metrics.py
+
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import TICK_SAMPLE_SIZE
+
+class TimedLock:
+    """A reentrant lock that keeps count of how long its users waited for it.
+
+    An acquire that succeeds straight away is only counted; the clock is
+    read just when somebody else holds the lock.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.acquisitions = 0
+        self.contended = 0  # acquisitions that had to wait
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def __enter__(self):
+        if not self.lock.acquire(blocking=False):
+            start = time.perf_counter()
+            self.lock.acquire()
+            wait = time.perf_counter() - start
+            self.contended += 1
+            self.wait_time += wait
+            self.max_wait = max(self.max_wait, wait)
+        self.acquisitions += 1  # counted while held, so no update is lost
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+    def stats(self):
+        return {
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "wait_ms": self.wait_time * 1000,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+class Metrics:
+    """Where the server's time goes, and what it was asked to do.
+
+    Each tick phase keeps its recent durations for percentiles plus a
+    running total. Messages are counted by type in both directions, and
+    events by name, in place of printing every one.
+    """
+    def __init__(self, size=TICK_SAMPLE_SIZE):
+        self.size = size
+        self.started = time.monotonic()
+        self.phases = {}  # name -> deque of recent durations in seconds
+        self.phase_totals = Counter()  # name -> seconds over the whole run
+        self.phase_runs = Counter()
+        self.received = Counter()  # message type -> count
+        self.sent = Counter()
+        self.events = Counter()
+        self.counter_lock = threading.Lock()  # connection threads count at once
+
+    @contextmanager
+    def phase(self, name):
+        """Time the body of a with block as one run of a tick phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, duration):
+        samples = self.phases.get(name)
+        if samples is None:
+            samples = self.phases[name] = deque(maxlen=self.size)
+        samples.append(duration)
+        self.phase_totals[name] += duration
+        self.phase_runs[name] += 1
+
+    def count_received(self, message_type):
+        with self.counter_lock:
+            self.received[message_type] += 1
+
+    def count_sent(self, message_type, count=1):
+        with self.counter_lock:
+            self.sent[message_type] += count
+
+    def count_event(self, name, count=1):
+        with self.counter_lock:
+            self.events[name] += count
+
+    def report(self):
+        """Everything measured so far as plain types, ready for JSON"""
+        phases = {}
+        for name, samples in list(self.phases.items()):
+            ordered = sorted(samples)
+            phases[name] = {
+                "runs": self.phase_runs[name],
+                "p50_ms": percentile(ordered, 50) * 1000,
+                "p99_ms": percentile(ordered, 99) * 1000,
+                "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+                "total_s": self.phase_totals[name],
+            }
+        with self.counter_lock:
+            received = dict(self.received)
+            sent = dict(self.sent)
+            events = dict(self.events)
+        return {
+            "uptime_s": time.monotonic() - self.started,
+            "phases": phases,
+            "received": received,
+            "sent": sent,
+            "events": events,
+        }
+
+def percentile(ordered, point):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * point / 100))]
+
+def format_report(report):
+    """A report as lines of text, for people and for the log"""
+    lines = [f"uptime {report['uptime_s']:.1f} s"]
+    for section in ("scheduler", "lock", "last_tick"):
+        if section in report:
+            values = ", ".join(f"{key} {format_value(value)}" for key, value in report[section].items())
+            lines.append(f"{section}: {values}")
+
+    lines.append(f"{'phase':<12}{'runs':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'total s':>10}")
+    for name, phase in report["phases"].items():
+        lines.append(f"{name:<12}{phase['runs']:>9}{phase['p50_ms']:>9.3f}{phase['p99_ms']:>9.3f}"
+                     f"{phase['max_ms']:>9.3f}{phase['total_s']:>10.2f}")
+
+    for section in ("received", "sent", "events"):
+        counts = sorted(report[section].items(), key=lambda item: -item[1])
+        lines.append(f"{section}: " + (", ".join(f"{name} {count}" for name, count in counts) or "none"))
+    return "\n".join(lines) + "\n"
+
+def format_value(value):
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+def serve_metrics(make_report, host, port):
+    """Serve make_report() over HTTP on a thread of its own.
+
+    GET /metrics gives the text report and /metrics.json the same as JSON.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics.json":
+                body = json.dumps(make_report()).encode()
+                content_type = "application/json"
+            elif self.path in ("/", "/metrics"):
+                body = format_report(make_report()).encode()
+                content_type = "text/plain; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # one line per scrape is just noise
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics at http://{host}:{port}/metrics")
+    return server
+
+def log_metrics(make_report, path, interval, max_bytes, backups):
+    """Append make_report() to a rotating log file every interval seconds"""
+    logger = logging.getLogger("server.metrics")
+    logger.propagate = False
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+    handler.setFormatter(logging.Formatter("%(asctime)s\n%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            logger.info(format_report(make_report()))
+
+    threading.Thread(target=run, daemon=True).start()
+
+metrics = Metrics()
@@ -1,25 +1,137 @@
 import socket
 import threading
-import json
 import time
 import uuid
+from common.codec import encode_message, decode_message
+from common.framing import FrameDecoder
 from .game_state import game_state
-from .config import HOST, PORT, MAX_CLIENTS, UPDATE_INTERVAL
+from .replication import ReplicationState, make_keyframe, make_delta
+from .interest import InterestSet, SnapshotGrid
+from .map_stream import MapStream
+from .metrics import metrics, serve_metrics, log_metrics
+from .outbox import Outbox
+from .scheduler import TickScheduler
+from .config import (HOST, PORT, MAX_CLIENTS, STATS_LOG_INTERVAL, AOI_ENABLED, WIRE_CODECS,
+                     METRICS_HOST, METRICS_PORT, METRICS_LOG_FILE, METRICS_LOG_INTERVAL,
+                     METRICS_LOG_SIZE, METRICS_LOG_BACKUPS)
 
 clients = []
 
-def broadcast(message):
-    """Safe broadcast with error handling"""
+# Serialization counters, reset at the start of every tick
+tick_stats = {
+    "tick": 0,
+    "encode_time": 0.0,  # seconds spent encoding this tick's updates
+    "payloads": 0,       # distinct update payloads encoded this tick
+    "payload_bytes": 0,  # total size of those payloads
+    "keyframes": 0,      # clients that were sent a full snapshot
+    "bytes_sent": 0,     # bytes queued for all clients this tick
+    "updates_dropped": 0,  # queued updates replaced before they went out
+    "clients": 0,
+}
+
+class ClientConnection:
+    """A connected client and the socket used to talk to it.
+
+    Everything sent goes through the client's Outbox, written out by a
+    thread of its own, so a slow client never holds up anyone else.
+    """
+    def __init__(self, sock, address):
+        self.sock = sock
+        # Writes are already batched by the outbox; don't hold them back further
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.address = address
+        self.player_id = str(uuid.uuid4())
+        self.replication = ReplicationState()
+        self.interest = InterestSet()
+        self.map_stream = MapStream()
+        self.codec = "json"  # switched once the client's join is negotiated
+        self.decoder = FrameDecoder()
+        self.outbox = Outbox()
+
+    def send(self, data, reliable=True):
+        """Queue bytes for the writer; returns True if a waiting update was replaced.
+
+        Unreliable sends are update_state snapshots, which are dropped when
+        a newer one is sent before they went out. Raises ConnectionError
+        (SlowConsumer) if the client has fallen too far behind.
+        """
+        return self.outbox.put(data, reliable)
+
+    def start_writer(self):
+        threading.Thread(target=self.write_loop, daemon=True).start()
+
+    def write_loop(self):
+        try:
+            while True:
+                data = self.outbox.take(wait=True)
+                if data is None:
+                    break
+                self.sock.sendall(data)
+        except OSError as e:
+            if not self.outbox.closed:
+                print(f"Write error to {self}: {e}")
+        finally:
+            self.close()
+
+    def close(self):
+        self.outbox.close()
+        try:
+            # Wakes the writer and reader if they are stuck on the socket
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __repr__(self):
+        return f"<ClientConnection {self.player_id} {self.address}>"
+
+def send_message(client, message):
+    try:
+        client.send(encode_message(message, client.codec))
+        metrics.count_sent(message["type"])
+    except ConnectionError as e:
+        print(f"Dropping {client}: {e}")
+        drop_clients([client])
+
+def receive_messages(client, data):
+    """Decode the complete messages in a chunk of received bytes"""
+    return decode_frames(client, client.decoder.feed(data))
+
+def decode_frames(client, frames):
+    messages = []
+    for binary, frame in frames:
+        try:
+            messages.append(decode_message(frame, binary))
+        except ValueError as e:
+            print(f"Invalid message from {client.player_id}: {e}")
+    return messages
+
+def broadcast(message, message_type):
+    """Safe broadcast with error handling.
+
+    The message is encoded once and the same buffer is sent to every client.
+    Pre-encoded bytes (ending in a newline) are sent as they are; either way
+    message_type says what it is, for the metrics.
+    """
     #print(f"Broadcasting message: {message}")
+    if isinstance(message, str):
+        payload = (message + "\n").encode()
+    else:
+        payload = message
 
     disconnected = []
     for client in clients:
         try:
-            client.sendall((message + "\n").encode())
+            client.send(payload)
+            tick_stats["bytes_sent"] += len(payload)
+            metrics.count_sent(message_type)
         except Exception as e:
             print(f"Broadcast error to {client}: {e}")
             disconnected.append(client)
-    
+
+    drop_clients(disconnected)
+
+def drop_clients(disconnected):
     for client in disconnected:
         if client in clients:
             clients.remove(client)
@@ -28,93 +140,123 @@ def broadcast(message):
             except Exception as ex:
                 print(f"Error closing client socket: {ex}")
 
-def client_handler(client_socket, address):
-    player_id = str(uuid.uuid4())
-    print(f"Client {player_id} connected from {address}")
+def client_handler(client):
+    player_id = client.player_id
+    print(f"Client {player_id} connected from {client.address}")
 
     try:
         while True:
-            data = client_socket.recv(4096)
-            if not data:
+            frames = client.decoder.recv_from(client.sock)
+            if frames is None:
                 break
-            
-            messages = data.decode().split('\n')
-            for msg in messages:
-                if msg.strip():
-                    try:
-                        message = json.loads(msg.strip())
-                        handle_message(client_socket, player_id, message)
-                    except json.JSONDecodeError:
-                        print(f"Invalid JSON from {player_id}: {msg}")
-            
+
+            for message in decode_frames(client, frames):
+                handle_message(client, player_id, message)
+
     except Exception as e:
         print(f"Connection error with {player_id}: {e}")
     finally:
-        game_state.remove_player(player_id)
-        if client_socket in clients:
-            clients.remove(client_socket)
-        client_socket.close()
+        game_state.submit(game_state.remove_player, player_id)
+        if client in clients:
+            clients.remove(client)
+        client.close()
         print(f"Client {player_id} disconnected")
 
-def handle_message(client_socket, player_id, message):
+# Messages that change the game state. They are queued and run by the
+# simulation thread, which is the only writer of GameState.
+COMMANDS = {"join", "attack_enemy", "move", "leave", "pickup", "drop", "use_item", "use_special"}
+# Everything a client may send; anything else is only counted, as "unknown",
+# so clients can't fill the metrics with names of their own
+MESSAGE_TYPES = COMMANDS | {"state_ack", "ping", "player_death"}
+
+def handle_message(client, player_id, message):
     message_type = message.get("type")
     data = message.get("data", {})
+    if type(message_type) is not str or message_type not in MESSAGE_TYPES:
+        metrics.count_received("unknown")
+        return
+    metrics.count_received(message_type)
 
-    if message_type == "join_ack":
-            client_socket.sendall(json.dumps({
-                "type": "map_data",
-                "data": game_state.map
-            }).encode() + b"\n")
+    if message_type == "state_ack":
+        ack = data.get("seq")
+        if type(ack) is int:  # the update loop compares and hashes it
+            client.replication.acknowledge(ack)
+        else:
+            metrics.count_event("invalid_acks")
+
+    elif message_type in COMMANDS:
+        game_state.submit(run_command, client, player_id, message)
+
+    elif message_type == "ping":
+        # Answered here rather than queued for the simulation, so the round
+        # trip is the connection's own; how the ticks are doing comes with it
+        p = scheduler.percentiles()
+        send_message(client, {
+            "type": "pong",
+            "data": {
+                "time": data.get("time"),
+                "tick_p50": p[50] * 1000,
+                "tick_p99": p[99] * 1000,
+                "ticks": scheduler.ticks,
+                "overruns": scheduler.overruns,
+                "skipped": scheduler.skipped_ticks,
+                "clients": len(clients)
+            }
+        })
+
+    elif message_type == "player_death":
+        print("Massage about dead:", data)
+        if data.get("player_id") == player_id:
+            print("You have died! Game over.")
+
+def run_command(client, player_id, message):
+    """Apply a queued client command; runs on the simulation thread"""
+    message_type = message.get("type")
+    data = message.get("data", {})
 
     if message_type == "join":
         name = data.get("name", "Anonymous")
         avatar = data.get("avatar", "Default")
         hero_class = data.get("hero_class", "warrior")
         game_state.add_player(player_id, name, avatar, hero_class=hero_class)
-        client_socket.sendall(json.dumps({
+        # Use the first codec in our preference order the client also speaks
+        offered = data.get("codecs", ["json"])
+        codec = next((c for c in WIRE_CODECS if c in offered), "json")
+        send_message(client, {
             "type": "join_ack",
-            "data": {"player_id": player_id}
-        }).encode() + b"\n")
+            "data": {"player_id": player_id, "codec": codec}
+        })
+        client.codec = codec
+        # The map itself follows in map_chunk messages as the player moves
+        send_message(client, {
+            "type": "map_info",
+            "data": dict(game_state.map.info_message(), tile_size=game_state.tile_size)
+        })
 
-    if message_type == "attack_enemy":
+    elif message_type == "attack_enemy":
         enemy_id = data.get("enemy_id")
         damage = data.get("damage", 10)
         
         if game_state.handle_enemy_attack(player_id, enemy_id, damage):
-            client_socket.sendall(json.dumps({
+            send_message(client, {
                 "type": "attack_result",
                 "data": {
                     "success": True, 
                     "enemy_id": enemy_id
                 }
-            }).encode() + b"\n")
+            })
         else:
-            client_socket.sendall(json.dumps({
+            send_message(client, {
                 "type": "attack_result",
                 "data": {
                     "success": False, 
                     "message": "Attack failed"
                 }
-            }).encode() + b"\n")
+            })
 
-    if message_type == "player_death":
-        print("Massage about dead:", data)
-        if data.get("player_id") == player_id:
-            print("You have died! Game over.")
-        
     elif message_type == "move":
-        direction = data.get("direction")
-        speed = data.get("speed", 5)
-        dx, dy = 0, 0
-        if direction == "up":
-            dy = -speed
-        elif direction == "down":
-            dy = speed
-        elif direction == "left":
-            dx = -speed
-        elif direction == "right":
-            dx = speed
-        game_state.move_player(player_id, dx, dy)
+        if not game_state.queue_move(player_id, data.get("dx", 0), data.get("dy", 0), data.get("seq")):
+            metrics.count_event("invalid_moves")
         
     elif message_type == "leave":
         game_state.remove_player(player_id)
@@ -123,28 +265,28 @@ def handle_message(client_socket, player_id, message):
         item_id = data.get("item_id")
         if game_state.pickup_item(player_id, item_id):
             item_type = game_state.get_picked_item_type(player_id, item_id)
-            client_socket.sendall(json.dumps({
+            send_message(client, {
                 "type": "pickup_result",
                 "data": {"success": True, "item_type": item_type}
-            }).encode() + b"\n")
+            })
         else:
-            client_socket.sendall(json.dumps({
+            send_message(client, {
                 "type": "pickup_result",
                 "data": {"success": False}
-            }).encode() + b"\n")
+            })
             
     elif message_type == "drop":
         item_index = data.get("item_index")
         if game_state.drop_item(player_id, item_index):
-            client_socket.sendall(json.dumps({
+            send_message(client, {
                 "type": "drop_result",
                 "data": {"success": True}
-            }).encode() + b"\n")
+            })
         else:
-            client_socket.sendall(json.dumps({
+            send_message(client, {
                 "type": "drop_result",
                 "data": {"success": False}
-            }).encode() + b"\n")   
+            })   
 
     elif message_type == "use_item":
             item_type = data.get("item_type")
@@ -153,53 +295,197 @@ def handle_message(client_socket, player_id, message):
                 new_health = game_state.heal_player(player_id, heal_amount)
                 
                 if new_health is not None:
-                    client_socket.sendall(json.dumps({
+                    send_message(client, {
                         "type": "health_update",
                         "data": {
                             "player_id": player_id,
                             "health": new_health,
                             "source": "heal"
                         }
-                    }).encode() + b"\n") 
+                    }) 
 
             elif item_type == "mana_potion": 
                     mana_amount = data.get("mana_amount", 25)
                     new_mana = game_state.add_mana(player_id, mana_amount)
                     
                     if new_mana is not None:
-                        client_socket.sendall(json.dumps({
+                        send_message(client, {
                             "type": "mana_update",
                             "data": {
                                 "player_id": player_id,
                                 "mana": new_mana
                             }
-                        }).encode() + b"\n")
+                        })
 
     elif message_type == "use_special":
             ability_data = message.get("data", {})
             result = game_state.use_special_ability(player_id, ability_data)
             
-            client_socket.sendall(json.dumps({
+            send_message(client, {
                 "type": "special_result",
                 "data": result
-            }).encode() + b"\n")
+            })
 
 def start_server():
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.bind((HOST, PORT))
     server_socket.listen(MAX_CLIENTS)
     print(f"Server listening on {HOST}:{PORT}")
+    start_metrics()
     threading.Thread(target=update_loop, daemon=True).start()
     while True:
         client_socket, address = server_socket.accept()
-        clients.append(client_socket)
-        threading.Thread(target=client_handler, args=(client_socket, address), daemon=True).start()
+        client = ClientConnection(client_socket, address)
+        client.start_writer()
+        clients.append(client)
+        threading.Thread(target=client_handler, args=(client,), daemon=True).start()
+
+def simulate(dt):
+    """Advance the simulation by one fixed timestep of dt seconds"""
+    with metrics.phase("commands"):
+        game_state.process_commands()
+    with metrics.phase("moves"):
+        game_state.apply_moves()
+    with metrics.phase("enemies"):
+        game_state.update_enemies(dt)
+    with metrics.phase("effects"):
+        game_state.update_effects()
+
+def send_updates():
+    """Send each client its update_state.
+
+    Clients get a delta against the last snapshot they acknowledged, or a
+    keyframe when they have no usable baseline. With AOI_ENABLED each client
+    only sees the entities around its player, found through a grid of the
+    snapshot built once per send. Clients that see the same entities share
+    one view object, so clients whose view and baseline are the same
+    objects share one encoded payload.
+    """
+    with metrics.phase("snapshot"):
+        game_state.publish_snapshot()
+    snapshot = game_state.snapshot
+
+    tick_stats["tick"] += 1
+    tick_stats["encode_time"] = 0.0
+    tick_stats["payloads"] = 0
+    tick_stats["payload_bytes"] = 0
+    tick_stats["keyframes"] = 0
+    tick_stats["bytes_sent"] = 0
+    tick_stats["updates_dropped"] = 0
+    tick_stats["clients"] = len(clients)
+    seq = tick_stats["tick"]
+    # Simulation time of the snapshot in milliseconds. It advances exactly
+    # one timestep per tick, so clients can interpolate without send jitter.
+    server_time = round(scheduler.ticks * scheduler.tick_interval * 1000)
+
+    grid = SnapshotGrid(snapshot) if AOI_ENABLED else None
+    # (codec, baseline seq or None for a keyframe, baseline, view) -> encoded
+    # update; baselines and views are kept alive meanwhile, so ids are unique
+    payloads = {}
+    disconnected = []
+    updates_sent = 0
+    chunks_sent = 0
+    fan_out_start = time.perf_counter()
+    for client in list(clients):
+        # Anything wrong with one client, down to an ack it sent, drops that
+        # client rather than stopping the update for everyone
+        try:
+            view = snapshot
+            if grid is not None:
+                view = client.interest.filter_snapshot(grid, client.player_id)
+
+            baseline_seq, baseline = client.replication.baseline(seq)
+            payload_key = (client.codec, baseline_seq, id(baseline), id(view))
+            payload = payloads.get(payload_key)
+            if payload is None:
+                start = time.perf_counter()
+                if baseline is None:
+                    data = make_keyframe(seq, view, server_time)
+                else:
+                    data = make_delta(seq, baseline_seq, baseline, view, server_time)
+                payload = encode_message({"type": "update_state", "data": data}, client.codec)
+                tick_stats["encode_time"] += time.perf_counter() - start
+                tick_stats["payloads"] += 1
+                tick_stats["payload_bytes"] += len(payload)
+                payloads[payload_key] = payload
+            if baseline is None:
+                tick_stats["keyframes"] += 1
+
+            player = snapshot["players"].get(client.player_id)
+            if player is not None:
+                for chunk in client.map_stream.due_chunks(
+                        game_state.map, player["x"], player["y"], game_state.tile_size):
+                    chunk_payload = encode_message({"type": "map_chunk",
+                                                    "data": game_state.map.chunk_message(*chunk)})
+                    client.send(chunk_payload)
+                    tick_stats["bytes_sent"] += len(chunk_payload)
+                    chunks_sent += 1
+            if client.send(payload, reliable=False):
+                tick_stats["updates_dropped"] += 1
+            tick_stats["bytes_sent"] += len(payload)
+            updates_sent += 1
+        except Exception as e:
+            print(f"Update error to {client}: {e}")
+            disconnected.append(client)
+            continue
+        client.replication.record(seq, view, keyframe=baseline is None)
+
+    drop_clients(disconnected)
+    # Encoding happens inside the loop; "broadcast" is everything else in it
+    metrics.record("encode", tick_stats["encode_time"])
+    metrics.record("broadcast", time.perf_counter() - fan_out_start - tick_stats["encode_time"])
+    metrics.count_sent("update_state", updates_sent)
+    if chunks_sent:
+        metrics.count_sent("map_chunk", chunks_sent)
+
+    if STATS_LOG_INTERVAL and tick_stats["tick"] % STATS_LOG_INTERVAL == 0:
+        print(f"Tick {tick_stats['tick']}: encoded {tick_stats['payloads']} payloads "
+              f"({tick_stats['payload_bytes']} bytes) in {tick_stats['encode_time'] * 1000:.2f} ms, "
+              f"sent {tick_stats['bytes_sent']} bytes to {tick_stats['clients']} clients "
+              f"({tick_stats['keyframes']} keyframes, {tick_stats['updates_dropped']} stale updates dropped)")
+        p = scheduler.percentiles()
+        print(f"Simulation: {scheduler.ticks} ticks, p50 {p[50] * 1000:.2f} ms, "
+              f"p90 {p[90] * 1000:.2f} ms, p99 {p[99] * 1000:.2f} ms, "
+              f"{scheduler.overruns} overruns, {scheduler.late_ticks} late, "
+              f"{scheduler.skipped_ticks} skipped")
+        los = game_state.visibility.stats()
+        print(f"Line of sight cache: {los['sources']} source tiles, {los['bytes']} bytes, "
+              f"{los['hits']} hits, {los['misses']} misses, {los['evictions']} evictions")
+
+scheduler = TickScheduler(simulate, send_updates)
+
+def metrics_report():
+    """The metrics along with the scheduler's and the last tick's numbers"""
+    report = metrics.report()
+    p = scheduler.percentiles()
+    report["scheduler"] = {
+        "ticks": scheduler.ticks,
+        "sends": scheduler.sends,
+        "tick_p50_ms": p[50] * 1000,
+        "tick_p99_ms": p[99] * 1000,
+        "overruns": scheduler.overruns,
+        "late": scheduler.late_ticks,
+        "skipped": scheduler.skipped_ticks,
+        "commands_waiting": len(game_state.commands),
+    }
+    report["lock"] = game_state.lock.stats()
+    report["last_tick"] = dict(tick_stats)
+    return report
+
+def start_metrics():
+    """Serve and log the metrics as configured; the game runs on without them"""
+    if METRICS_PORT:
+        try:
+            serve_metrics(metrics_report, METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            print(f"Metrics not served on {METRICS_HOST}:{METRICS_PORT}: {e}")
+    if METRICS_LOG_FILE:
+        try:
+            log_metrics(metrics_report, METRICS_LOG_FILE, METRICS_LOG_INTERVAL,
+                        METRICS_LOG_SIZE, METRICS_LOG_BACKUPS)
+        except OSError as e:
+            print(f"Metrics not logged to {METRICS_LOG_FILE}: {e}")
 
 def update_loop():
     while True:
-        game_state.update_enemies()
-        game_state.update_effects()
-        state = game_state.get_state()
-        message = json.dumps({"type": "update_state", "data": state})
-        broadcast(message)
-        time.sleep(UPDATE_INTERVAL)
\ No newline at end of file
+        time.sleep(scheduler.step())
\ No newline at end of file
@@ -0,0 +1,92 @@
+# server/outbox.py
+
+import threading
+import time
+from collections import deque
+
+from .config import OUTBOX_LIMIT, SLOW_CLIENT_TIMEOUT
+
+class SlowConsumer(ConnectionError):
+    """A client that stopped keeping up with what it is sent"""
+
+class Outbox:
+    """Bytes waiting to be written to one client by its writer.
+
+    The tick only ever adds to the outbox, so it never waits on a socket.
+    An update_state is only worth sending while it is the newest, so at
+    most one waits here: a newer one drops the older and joins the back of
+    the queue, so it never goes out ahead of messages queued after the one
+    it replaces. Everything else is kept, in order. A client whose
+    kept messages pass `limit` bytes, or whose writer hasn't caught up for
+    `timeout` seconds, raises SlowConsumer so it can be disconnected.
+    """
+    def __init__(self, limit=OUTBOX_LIMIT, timeout=SLOW_CLIENT_TIMEOUT, clock=time.monotonic):
+        self.limit = limit
+        self.timeout = timeout
+        self.clock = clock
+        self.entries = deque()  # [reliable, payload] in the order they go out
+        self.update = None  # the entry holding the waiting update_state, if any
+        self.size = 0  # bytes in the entries
+        self.behind_since = None  # when the writer last had nothing left to write
+        self.dropped = 0
+        self.closed = False
+        self.ready = threading.Condition()
+
+    def put(self, payload, reliable=True):
+        """Queue a payload; returns True if it replaced an update that never went out"""
+        with self.ready:
+            if self.closed:
+                raise ConnectionError("Connection closed")
+            now = self.clock()
+            if self.behind_since is None:
+                self.behind_since = now
+            elif now - self.behind_since > self.timeout:
+                raise SlowConsumer(f"Client has been behind for {now - self.behind_since:.1f} s")
+
+            replaced = False
+            if not reliable and self.update is not None:
+                stale = self.update
+                if self.entries[-1] is stale:
+                    self.entries.pop()
+                else:
+                    for index, entry in enumerate(self.entries):
+                        if entry is stale:
+                            del self.entries[index]
+                            break
+                self.size -= len(stale[1])
+                self.dropped += 1
+                replaced = True
+            entry = [reliable, payload]
+            self.entries.append(entry)
+            self.size += len(payload)
+            if not reliable:
+                self.update = entry
+            if self.size - (len(self.update[1]) if self.update else 0) > self.limit:
+                raise SlowConsumer(f"Client has {self.size} bytes waiting")
+            self.ready.notify()
+            return replaced
+
+    def take(self, wait=False):
+        """Everything queued as one write, b"" if nothing is, or None once closed.
+
+        With wait it blocks until there is something to write instead.
+        """
+        with self.ready:
+            while wait and not self.entries and not self.closed:
+                self.behind_since = None
+                self.ready.wait()
+            if self.closed:
+                return None
+            if not self.entries:
+                self.behind_since = None
+                return b""
+            data = b"".join(payload for _, payload in self.entries)
+            self.entries.clear()
+            self.update = None
+            self.size = 0
+            return data
+
+    def close(self):
+        with self.ready:
+            self.closed = True
+            self.ready.notify_all()
@@ -0,0 +1,99 @@
+# server/pathfinding.py
+
+import heapq
+from collections import OrderedDict
+
+STRAIGHT_COST = 10
+DIAGONAL_COST = 14
+NEIGHBOURS = [
+    (1, 0, STRAIGHT_COST), (-1, 0, STRAIGHT_COST),
+    (0, 1, STRAIGHT_COST), (0, -1, STRAIGHT_COST),
+    (1, 1, DIAGONAL_COST), (1, -1, DIAGONAL_COST),
+    (-1, 1, DIAGONAL_COST), (-1, -1, DIAGONAL_COST),
+]
+
+class FlowField:
+    """Shortest ways to one goal tile from every passable tile near it.
+
+    A Dijkstra search runs outwards from the goal over passable tiles no
+    more than radius tiles away along either axis. Each tile it reaches
+    remembers the neighbour it was reached from, which is the next step
+    towards the goal, so following the field costs one lookup per step.
+    Diagonal steps are only taken when both tiles beside them are
+    passable, so nothing cuts a corner.
+    """
+
+    def __init__(self, goal, is_passable, width, height, radius):
+        self.goal = goal
+        self.radius = radius
+        self.cost = {goal: 0}
+        self.next_tile = {goal: goal}
+
+        goal_x, goal_y = goal
+        min_x = max(0, goal_x - radius)
+        max_x = min(width - 1, goal_x + radius)
+        min_y = max(0, goal_y - radius)
+        max_y = min(height - 1, goal_y + radius)
+
+        def open_tile(x, y):
+            return min_x <= x <= max_x and min_y <= y <= max_y and is_passable(x, y)
+
+        queue = [(0, goal)]
+        while queue:
+            cost, tile = heapq.heappop(queue)
+            if cost > self.cost[tile]:
+                continue
+            x, y = tile
+            for dx, dy, step in NEIGHBOURS:
+                nx = x + dx
+                ny = y + dy
+                if not open_tile(nx, ny):
+                    continue
+                if dx and dy and not (open_tile(nx, y) and open_tile(x, ny)):
+                    continue
+                neighbour = (nx, ny)
+                new_cost = cost + step
+                if new_cost < self.cost.get(neighbour, new_cost + 1):
+                    self.cost[neighbour] = new_cost
+                    self.next_tile[neighbour] = tile
+                    heapq.heappush(queue, (new_cost, neighbour))
+
+class FlowFields:
+    """Flow fields keyed by goal tile, shared by everyone chasing it.
+
+    A field is built the first time its goal is asked for and kept until
+    it is among the least recently used beyond max_fields, so a player
+    standing still costs nothing and one moving costs a field per tile
+    entered.
+    """
+
+    def __init__(self, is_passable, width, height, radius, max_fields):
+        self.is_passable = is_passable  # is_passable(tile_x, tile_y)
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.max_fields = max_fields
+        self.fields = OrderedDict()  # goal tile -> FlowField
+        self.built = 0
+
+    def field(self, goal):
+        flow = self.fields.get(goal)
+        if flow is None:
+            flow = self.fields[goal] = FlowField(
+                goal, self.is_passable, self.width, self.height, self.radius)
+            self.built += 1
+            if len(self.fields) > self.max_fields:
+                self.fields.popitem(last=False)
+        else:
+            self.fields.move_to_end(goal)
+        return flow
+
+    def invalidate(self, tile_x, tile_y):
+        """Forget every field whose search area holds this tile"""
+        radius = self.radius
+        stale = [
+            goal for goal in self.fields
+            if abs(goal[0] - tile_x) <= radius and abs(goal[1] - tile_y) <= radius
+        ]
+        for goal in stale:
+            del self.fields[goal]
@@ -0,0 +1,88 @@
+# server/replication.py
+
+from collections import OrderedDict
+
+from .config import KEYFRAME_INTERVAL, REPLICATION_HISTORY
+
+CATEGORIES = ("players", "enemies", "items")
+
+def diff_entities(old, new):
+    """Compare two id -> entity dicts.
+
+    Returns the entities that were added, the fields that changed on the
+    ones that already existed and the ids that were removed.
+    """
+    added = {}
+    changed = {}
+    for entity_id, entity in new.items():
+        previous = old.get(entity_id)
+        if previous is None:
+            added[entity_id] = entity
+            continue
+        fields = {key: value for key, value in entity.items() if previous.get(key) != value}
+        if fields:
+            changed[entity_id] = fields
+
+    removed = [entity_id for entity_id in old if entity_id not in new]
+    return added, changed, removed
+
+def make_keyframe(seq, snapshot, server_time):
+    """Full state in the original update_state layout"""
+    return {
+        "seq": seq,
+        "time": server_time,
+        "keyframe": True,
+        "players": snapshot["players"],
+        "enemies": list(snapshot["enemies"].values()),
+        "items": list(snapshot["items"].values())
+    }
+
+def make_delta(seq, baseline_seq, baseline, snapshot, server_time):
+    """Changes needed to turn the baseline snapshot into this one"""
+    data = {"seq": seq, "time": server_time, "baseline": baseline_seq}
+    for category in CATEGORIES:
+        added, changed, removed = diff_entities(baseline[category], snapshot[category])
+        entry = {}
+        if added:
+            entry["added"] = added
+        if changed:
+            entry["changed"] = changed
+        if removed:
+            entry["removed"] = removed
+        if entry:
+            data[category] = entry
+    return data
+
+class ReplicationState:
+    """Snapshots sent to one client and the latest one it acknowledged"""
+    def __init__(self):
+        self.history = OrderedDict()  # seq -> snapshot sent with that seq
+        self.acked_seq = None
+        self.last_keyframe_seq = None
+        # Written by the connection's reader, consumed by the update loop
+        self.pending_ack = None
+
+    def acknowledge(self, seq):
+        self.pending_ack = seq
+
+    def baseline(self, seq):
+        """Return (baseline_seq, baseline) for the next update, or (None, None)
+        when the client should get a keyframe instead"""
+        ack = self.pending_ack
+        if ack in self.history and (self.acked_seq is None or ack > self.acked_seq):
+            self.acked_seq = ack
+            # The client will never go back to anything older than its ack
+            for old_seq in [s for s in self.history if s < ack]:
+                del self.history[old_seq]
+
+        if (self.acked_seq not in self.history or self.last_keyframe_seq is None
+                or seq - self.last_keyframe_seq >= KEYFRAME_INTERVAL):
+            return None, None
+        return self.acked_seq, self.history[self.acked_seq]
+
+    def record(self, seq, snapshot, keyframe):
+        self.history[seq] = snapshot
+        if keyframe:
+            self.last_keyframe_seq = seq
+        while len(self.history) > REPLICATION_HISTORY:
+            self.history.popitem(last=False)
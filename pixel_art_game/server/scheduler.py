@@ -0,0 +1,85 @@
+# server/scheduler.py
+
+import time
+from collections import deque
+
+from .config import SIM_TICK_INTERVAL, UPDATE_INTERVAL, MAX_CATCH_UP_TICKS, TICK_SAMPLE_SIZE
+
+class TickScheduler:
+    """Runs the simulation at a fixed timestep and sends updates at their own rate.
+
+    Ticks are scheduled against absolute deadlines, so the time spent
+    simulating does not stretch the period. When the loop falls behind it
+    runs up to max_catch_up ticks back to back; anything beyond that is
+    dropped (and counted) rather than letting the backlog grow forever.
+    """
+    def __init__(self, simulate, send, tick_interval=SIM_TICK_INTERVAL,
+                 send_interval=UPDATE_INTERVAL, max_catch_up=MAX_CATCH_UP_TICKS,
+                 clock=time.perf_counter):
+        self.simulate = simulate  # called with the fixed dt in seconds
+        self.send = send
+        self.tick_interval = tick_interval
+        self.send_interval = send_interval
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.next_tick = None
+        self.next_send = None
+
+        self.ticks = 0
+        self.sends = 0
+        self.overruns = 0       # ticks whose work took longer than the timestep
+        self.late_ticks = 0     # ticks run late to catch up
+        self.skipped_ticks = 0  # ticks dropped because we were too far behind
+        self.tick_durations = deque(maxlen=TICK_SAMPLE_SIZE)
+        self.send_durations = deque(maxlen=TICK_SAMPLE_SIZE)
+
+    def step(self):
+        """Run whatever ticks and sends are due; returns seconds until the next one"""
+        now = self.clock()
+        if self.next_tick is None:
+            self.next_tick = now
+            self.next_send = now
+
+        ticks_run = 0
+        while now >= self.next_tick:
+            if ticks_run >= self.max_catch_up:
+                missed = int((now - self.next_tick) // self.tick_interval) + 1
+                self.skipped_ticks += missed
+                self.next_tick += missed * self.tick_interval
+                break
+            if ticks_run:
+                self.late_ticks += 1
+
+            start = self.clock()
+            self.simulate(self.tick_interval)
+            duration = self.clock() - start
+            self.tick_durations.append(duration)
+            if duration > self.tick_interval:
+                self.overruns += 1
+
+            self.ticks += 1
+            ticks_run += 1
+            self.next_tick += self.tick_interval
+            now = self.clock()
+
+        if now >= self.next_send:
+            start = self.clock()
+            self.send()
+            self.send_durations.append(self.clock() - start)
+            self.sends += 1
+            self.next_send += self.send_interval
+            if self.next_send <= now:
+                # Never send a burst of updates to make up for a stall
+                self.next_send = now + self.send_interval
+
+        return max(0.0, min(self.next_tick, self.next_send) - self.clock())
+
+    def percentiles(self, points=(50, 90, 99), durations=None):
+        """Tick duration percentiles in seconds, e.g. {50: 0.0004, 90: ...}"""
+        samples = sorted(self.tick_durations if durations is None else durations)
+        if not samples:
+            return {point: 0.0 for point in points}
+        return {
+            point: samples[min(len(samples) - 1, int(len(samples) * point / 100))]
+            for point in points
+        }
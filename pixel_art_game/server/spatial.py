@@ -0,0 +1,147 @@
+# server/spatial.py
+
+import math
+
+class SpatialHash:
+    """Entities bucketed into a uniform grid by position, with an id index.
+
+    Iterating yields the entities in the order they were added, so the
+    grid can be used wherever GameState used to keep a plain list.
+    Entities are dicts with "id", "x" and "y"; call update() after moving
+    one so it is re-bucketed.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.by_id = {}
+        self.cells = {}         # (cell_x, cell_y) -> {id: entity}
+        self.entity_cells = {}  # id -> (cell_x, cell_y)
+        # Cell range that has ever held an entity; only grows, so it is
+        # always a safe limit for how far nearest() has to search
+        self.bounds = None
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, entity_id):
+        return entity_id in self.by_id
+
+    def _cell(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def _place(self, entity_id, entity, cell):
+        self.entity_cells[entity_id] = cell
+        self.cells.setdefault(cell, {})[entity_id] = entity
+        cell_x, cell_y = cell
+        if self.bounds is None:
+            self.bounds = (cell_x, cell_y, cell_x, cell_y)
+        else:
+            min_x, min_y, max_x, max_y = self.bounds
+            if not (min_x <= cell_x <= max_x and min_y <= cell_y <= max_y):
+                self.bounds = (min(min_x, cell_x), min(min_y, cell_y),
+                               max(max_x, cell_x), max(max_y, cell_y))
+
+    def get(self, entity_id):
+        return self.by_id.get(entity_id)
+
+    def add(self, entity):
+        entity_id = entity["id"]
+        if entity_id in self.by_id:
+            self.remove(entity_id)
+        self.by_id[entity_id] = entity
+        self._place(entity_id, entity, self._cell(entity["x"], entity["y"]))
+
+    def remove(self, entity_id):
+        """Remove an entity by id; returns it, or None if it was not indexed"""
+        entity = self.by_id.pop(entity_id, None)
+        if entity is None:
+            return None
+        cell = self.entity_cells.pop(entity_id)
+        bucket = self.cells[cell]
+        del bucket[entity_id]
+        if not bucket:
+            del self.cells[cell]
+        return entity
+
+    def update(self, entity):
+        """Move an entity to the cell matching its current position"""
+        entity_id = entity["id"]
+        old_cell = self.entity_cells.get(entity_id)
+        if old_cell is None:
+            return
+        cell = self._cell(entity["x"], entity["y"])
+        if cell == old_cell:
+            return
+        bucket = self.cells[old_cell]
+        del bucket[entity_id]
+        if not bucket:
+            del self.cells[old_cell]
+        self._place(entity_id, entity, cell)
+
+    def query_radius(self, x, y, radius):
+        """All entities within radius of (x, y)"""
+        min_x, min_y = self._cell(x - radius, y - radius)
+        max_x, max_y = self._cell(x + radius, y + radius)
+        radius_sq = radius * radius
+        cells = self.cells
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(cells):
+            # More cells in the box than hold anything: go through the occupied
+            # ones instead, so a huge radius costs no more than a full scan
+            return [entity for (cell_x, cell_y), bucket in cells.items()
+                    if min_x <= cell_x <= max_x and min_y <= cell_y <= max_y
+                    for entity in bucket.values()
+                    if (entity["x"] - x) ** 2 + (entity["y"] - y) ** 2 <= radius_sq]
+        found = []
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if not bucket:
+                    continue
+                for entity in bucket.values():
+                    dx = entity["x"] - x
+                    dy = entity["y"] - y
+                    if dx * dx + dy * dy <= radius_sq:
+                        found.append(entity)
+        return found
+
+    def nearest(self, x, y, max_distance=None, predicate=None):
+        """Closest entity to (x, y) accepted by predicate, or None.
+
+        Searches rings of cells outwards and stops as soon as no unvisited
+        cell can hold anything closer than the best match so far.
+        """
+        if not self.by_id:
+            return None
+        center_x, center_y = self._cell(x, y)
+        if max_distance is None:
+            min_x, min_y, max_x, max_y = self.bounds
+            max_ring = max(center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y)
+            best_sq = math.inf
+        else:
+            max_ring = int(max_distance // self.cell_size) + 1
+            best_sq = max_distance * max_distance
+
+        best = None
+        cells = self.cells
+        for ring in range(max_ring + 1):
+            for cell_x in range(center_x - ring, center_x + ring + 1):
+                on_edge = cell_x in (center_x - ring, center_x + ring)
+                step = 1 if on_edge else 2 * ring
+                for cell_y in range(center_y - ring, center_y + ring + 1, step):
+                    bucket = cells.get((cell_x, cell_y))
+                    if not bucket:
+                        continue
+                    for entity in bucket.values():
+                        dx = entity["x"] - x
+                        dy = entity["y"] - y
+                        distance_sq = dx * dx + dy * dy
+                        if distance_sq <= best_sq and (predicate is None or predicate(entity)):
+                            best = entity
+                            best_sq = distance_sq
+            # Anything in a later ring is more than ring * cell_size away
+            reach = ring * self.cell_size
+            if best is not None and best_sq <= reach * reach:
+                break
+        return best
@@ -0,0 +1,117 @@
+# server/visibility.py
+
+import sys
+from collections import OrderedDict
+
+def trace_line_of_sight(is_passable, width, height, tile_x0, tile_y0, tile_x1, tile_y1):
+    """Bresenham's line from one tile towards another.
+
+    True when every tile on the way is on the map and passable, counting
+    the starting tile but not the last one.
+    """
+    dx = abs(tile_x1 - tile_x0)
+    dy = abs(tile_y1 - tile_y0)
+    sx = 1 if tile_x0 < tile_x1 else -1
+    sy = 1 if tile_y0 < tile_y1 else -1
+    err = dx - dy
+
+    while tile_x0 != tile_x1 or tile_y0 != tile_y1:
+        if not (0 <= tile_x0 < width and 0 <= tile_y0 < height) or not is_passable(tile_x0, tile_y0):
+            return False
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            tile_x0 += sx
+        if e2 < dx:
+            err += dx
+            tile_y0 += sy
+
+    return True
+
+class VisibilityCache:
+    """Line of sight between tiles, remembered per source tile.
+
+    Each source tile gets a bitset (an int) with one bit for every tile in
+    the square of the given radius around it, set when that tile can be
+    seen from the source. A bitset is built the first time its source is
+    asked about, and beyond max_sources the least recently used one is
+    dropped, so large maps only hold the areas in play. Tiles further
+    apart than the radius are traced directly.
+    """
+
+    def __init__(self, is_passable, width, height, radius, max_sources):
+        self.is_passable = is_passable  # is_passable(tile_x, tile_y)
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.side = 2 * radius + 1
+        self.max_sources = max_sources
+        self.bitsets = OrderedDict()  # (tile_x, tile_y) -> bitset
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def visible(self, tile_x0, tile_y0, tile_x1, tile_y1):
+        dx = tile_x1 - tile_x0
+        dy = tile_y1 - tile_y0
+        radius = self.radius
+        if not (-radius <= dx <= radius and -radius <= dy <= radius):
+            return trace_line_of_sight(self.is_passable, self.width, self.height,
+                                       tile_x0, tile_y0, tile_x1, tile_y1)
+
+        source = (tile_x0, tile_y0)
+        bits = self.bitsets.get(source)
+        if bits is None:
+            self.misses += 1
+            bits = self.bitsets[source] = self._build(tile_x0, tile_y0)
+            if len(self.bitsets) > self.max_sources:
+                self.bitsets.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self.bitsets.move_to_end(source)
+        return (bits >> ((dy + radius) * self.side + dx + radius)) & 1 == 1
+
+    def _build(self, tile_x, tile_y):
+        bits = 0
+        bit = 1
+        radius = self.radius
+        for y in range(tile_y - radius, tile_y + radius + 1):
+            for x in range(tile_x - radius, tile_x + radius + 1):
+                if trace_line_of_sight(self.is_passable, self.width, self.height,
+                                       tile_x, tile_y, x, y):
+                    bits |= bit
+                bit <<= 1
+        return bits
+
+    def invalidate(self, tile_x, tile_y):
+        """Forget every bitset a change to this tile could affect.
+
+        A line only crosses tiles inside the box around its two ends, so
+        only sources within the radius of the tile can have changed.
+        """
+        radius = self.radius
+        stale = [
+            source for source in self.bitsets
+            if abs(source[0] - tile_x) <= radius and abs(source[1] - tile_y) <= radius
+        ]
+        for source in stale:
+            del self.bitsets[source]
+
+    def clear(self):
+        self.bitsets.clear()
+
+    def memory_bytes(self):
+        """Rough size of the cache: its table plus every key and bitset"""
+        return sys.getsizeof(self.bitsets) + sum(
+            sys.getsizeof(source) + sys.getsizeof(bits)
+            for source, bits in self.bitsets.items())
+
+    def stats(self):
+        return {
+            "sources": len(self.bitsets),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self.memory_bytes(),
+        }
@@ -0,0 +1,3 @@
+# tests/__init__.py
+
+# Run from pixel_art_game with: python -m unittest
@@ -0,0 +1,67 @@
+# tests/test_codec.py
+
+import time
+import types
+import unittest
+import uuid
+
+from common.codec import FRAME_HEADER, encode_message, decode_message
+from server import network
+
+MESSAGE = {"type": "update_state", "data": {
+    "seq": 12, "baseline": 10, "time": 1760000000.123456,
+    "players": {"added": {}, "removed": [],
+                "changed": {str(uuid.UUID(int=7)): {"x": 10.25, "y": -3, "name": "Ünïcode"}}},
+    "enemies": {"added": {"enemy_4": {"id": "enemy_4", "type": "orc", "x": 1e-3, "y": None}},
+                "changed": {}, "removed": ["enemy_9"]},
+    "items": {"added": {}, "changed": {}, "removed": ["item_2", "not an id"]},
+}}
+
+def binary_frame(message):
+    return bytearray(encode_message(message, "binary")[FRAME_HEADER.size:])
+
+class CodecTest(unittest.TestCase):
+    def test_round_trip(self):
+        self.assertEqual(decode_message(binary_frame(MESSAGE), True), MESSAGE)
+
+    def test_floats_keep_their_precision(self):
+        now = time.time()
+        message = {"type": "move", "data": {"time": now, "dx": 0.1}}
+        self.assertEqual(decode_message(binary_frame(message), True)["data"], {"time": now, "dx": 0.1})
+
+    def test_every_truncation_is_a_value_error(self):
+        frame = binary_frame(MESSAGE)
+        for end in range(len(frame)):
+            with self.assertRaises(ValueError, msg=f"cut at {end}"):
+                decode_message(frame[:end], True)
+
+    def test_truncated_float(self):
+        with self.assertRaises(ValueError):
+            decode_message(bytearray(b"\x01\x04"), True)
+
+    def test_truncated_string(self):
+        with self.assertRaises(ValueError):
+            decode_message(bytearray(b"\x01\x05\x05abc"), True)
+
+    def test_malformed_frames(self):
+        for frame in (b"\x63\x00",        # unknown message code
+                      b"\x01\x08\xff",    # unknown symbol
+                      b"\x01\x63",        # unknown tag
+                      b"\x01\x07\x01\x03\x02\x00",  # dict key that is not a string
+                      b"\x01\x00\x00",    # bytes after the message
+                      b"\x01" + b"\x06\x01" * 100000):  # nested too deeply
+            with self.assertRaises(ValueError, msg=frame[:8]):
+                decode_message(bytearray(frame), True)
+
+    def test_json_must_be_an_object(self):
+        with self.assertRaises(ValueError):
+            decode_message(bytearray(b"[1, 2]"), False)
+
+    def test_server_skips_bad_frames(self):
+        good = binary_frame({"type": "move", "data": {"dx": 1, "dy": 0, "seq": 1}})
+        frames = [(True, bytearray(b"\x01\x04")), (True, good), (False, bytearray(b"{"))]
+        self.assertEqual(network.decode_frames(types.SimpleNamespace(player_id="bad"), frames),
+                         [{"type": "move", "data": {"dx": 1, "dy": 0, "seq": 1}}])
+
+if __name__ == "__main__":
+    unittest.main()
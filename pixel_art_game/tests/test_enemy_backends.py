@@ -0,0 +1,21 @@
+# tests/test_enemy_backends.py
+
+import unittest
+
+from benchmarks.enemy_backend_bench import build_state, largest_difference, outcome, run_ticks
+from server.enemy_arrays import np
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class EnemyBackendTest(unittest.TestCase):
+    def test_numpy_backend_matches_python(self):
+        states = [build_state(backend, 400, 10, 40, walls=0.15, damage=5) for backend in ("python", "numpy")]
+        for state in states:
+            run_ticks(state, 200)
+        python, numpy = (outcome(state) for state in states)
+        self.assertEqual(largest_difference(python, numpy), 0.0)
+        # Enemies did chase and hit someone, so there was something to compare
+        self.assertTrue(any(last_hit for _, _, last_hit in python[0].values()))
+        self.assertTrue(any(health < 10 ** 9 for health in python[1].values()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# tests/test_framing.py
+
+import socket
+import unittest
+
+from common.codec import FRAME_HEADER, FRAME_MARKER, encode_message, decode_message
+from common.framing import FrameDecoder, MAX_FRAME_SIZE
+
+MESSAGES = [
+    {"type": "move", "data": {"dx": 5, "dy": -5, "seq": 1}},
+    {"type": "pickup_result", "data": {"success": True, "item_type": "coin"}},
+    {"type": "update_state", "data": {"seq": 7, "keyframe": True, "players": {},
+                                      "enemies": [{"id": "enemy_3", "x": 1.5, "y": 2}], "items": []}},
+    {"type": "join_ack", "data": {"player_id": "p", "codec": "binary"}},
+]
+
+def stream():
+    return b"".join(encode_message(message, codec)
+                    for codec in ("binary", "json") for message in MESSAGES)
+
+def decoded(frames):
+    return [decode_message(frame, binary) for binary, frame in frames]
+
+EXPECTED = [message for _ in ("binary", "json") for message in MESSAGES]
+
+class FrameDecoderTest(unittest.TestCase):
+    def test_several_frames_in_one_read(self):
+        self.assertEqual(decoded(FrameDecoder().feed(stream())), EXPECTED)
+
+    def test_split_at_every_byte(self):
+        data = stream()
+        for split in range(1, len(data)):
+            decoder = FrameDecoder()
+            frames = decoder.feed(data[:split]) + decoder.feed(data[split:])
+            self.assertEqual(decoded(frames), EXPECTED, f"split at {split}")
+            self.assertEqual(len(decoder.buffer), 0)
+
+    def test_one_byte_at_a_time(self):
+        decoder = FrameDecoder()
+        frames = []
+        for byte in stream():
+            frames += decoder.feed(bytes([byte]))
+        self.assertEqual(decoded(frames), EXPECTED)
+
+    def test_frame_of_the_largest_size(self):
+        payload = b"\x01" + bytes(MAX_FRAME_SIZE - 1)
+        frames = FrameDecoder().feed(FRAME_HEADER.pack(FRAME_MARKER, MAX_FRAME_SIZE) + payload)
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(len(frames[0][1]), MAX_FRAME_SIZE)
+
+    def test_frame_over_the_largest_size(self):
+        with self.assertRaises(ValueError):
+            FrameDecoder().feed(FRAME_HEADER.pack(FRAME_MARKER, MAX_FRAME_SIZE + 1))
+
+    def test_line_over_the_largest_size(self):
+        with self.assertRaises(ValueError):
+            FrameDecoder().feed(b"x" * (MAX_FRAME_SIZE + 1))
+
+    def test_recv_from_a_socket(self):
+        ours, theirs = socket.socketpair()
+        with ours, theirs:
+            theirs.sendall(stream())
+            theirs.shutdown(socket.SHUT_WR)
+            decoder = FrameDecoder()
+            frames = []
+            while True:
+                received = decoder.recv_from(ours)
+                if received is None:
+                    break
+                frames += received
+        self.assertEqual(decoded(frames), EXPECTED)
+        self.assertEqual(decoder.received, len(stream()))
+
+if __name__ == "__main__":
+    unittest.main()
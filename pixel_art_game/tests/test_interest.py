@@ -0,0 +1,85 @@
+# tests/test_interest.py
+
+import random
+import unittest
+
+from server.config import AOI_RADIUS, AOI_HYSTERESIS
+from server.interest import InterestSet, SnapshotGrid
+from server.replication import CATEGORIES
+
+def make_snapshot(rng, count=300, size=4000):
+    snapshot = {category: {} for category in CATEGORIES}
+    for index in range(count):
+        category = CATEGORIES[index % len(CATEGORIES)]
+        entity_id = f"p{index}" if category == "players" else index
+        entity = {"x": rng.uniform(0, size), "y": rng.uniform(0, size)}
+        if category != "players":
+            entity["id"] = entity_id
+        snapshot[category][entity_id] = entity
+    return snapshot
+
+def scan(snapshot, center, previous):
+    """What every entity in the snapshot would need checking for, one by one"""
+    visible = set()
+    for category in CATEGORIES:
+        for entity_id, entity in snapshot[category].items():
+            distance_sq = (entity["x"] - center[0]) ** 2 + (entity["y"] - center[1]) ** 2
+            if (distance_sq <= AOI_RADIUS ** 2 or
+                    ((category, entity_id) in previous and distance_sq <= (AOI_RADIUS + AOI_HYSTERESIS) ** 2)):
+                visible.add((category, entity_id))
+    return visible
+
+def view_keys(view):
+    return {(category, entity_id) for category in CATEGORIES for entity_id in view[category]}
+
+class InterestSetTest(unittest.TestCase):
+    def test_matches_a_scan_of_every_entity(self):
+        rng = random.Random(4)
+        interest = InterestSet()
+        previous = set()
+        snapshot = make_snapshot(rng)
+        for _ in range(50):
+            # Everything drifts, so entities cross the edges of the view
+            for category in CATEGORIES:
+                for entity in snapshot[category].values():
+                    entity["x"] += rng.uniform(-60, 60)
+                    entity["y"] += rng.uniform(-60, 60)
+            view = interest.filter_snapshot(SnapshotGrid(snapshot), "p0")
+            player = snapshot["players"]["p0"]
+            previous = scan(snapshot, (player["x"], player["y"]), previous)
+            self.assertEqual(view_keys(view), previous)
+            self.assertIn("p0", view["players"])
+
+    def test_whole_snapshot_until_there_is_a_player(self):
+        snapshot = make_snapshot(random.Random(1))
+        self.assertIs(InterestSet().filter_snapshot(SnapshotGrid(snapshot), "nobody"), snapshot)
+
+    def test_clients_seeing_the_same_entities_share_a_view(self):
+        snapshot = {"players": {"a": {"x": 100, "y": 100}, "b": {"x": 120, "y": 100},
+                                "far": {"x": 5000, "y": 5000}},
+                    "enemies": {1: {"id": 1, "x": 300, "y": 300}}, "items": {}}
+        grid = SnapshotGrid(snapshot)
+        view_a = InterestSet().filter_snapshot(grid, "a")
+        view_b = InterestSet().filter_snapshot(grid, "b")
+        view_far = InterestSet().filter_snapshot(grid, "far")
+        self.assertIs(view_a, view_b)
+        self.assertIsNot(view_a, view_far)
+        self.assertEqual(set(view_far["players"]), {"far"})
+
+    def test_clients_on_the_same_spot_keep_their_own_history(self):
+        snapshot = {"players": {"a": {"x": 100, "y": 100}, "b": {"x": 100, "y": 100},
+                                "c": {"x": 100, "y": 100}},
+                    "enemies": {1: {"id": 1, "x": 200, "y": 100}}, "items": {}}
+        seen_before = InterestSet()
+        seen_before.filter_snapshot(SnapshotGrid(snapshot), "a")
+        # Now in the hysteresis band: kept by the client that saw it, not entered by others
+        snapshot["enemies"][1]["x"] = 100 + AOI_RADIUS + AOI_HYSTERESIS / 2
+        grid = SnapshotGrid(snapshot)
+        new_b, new_c = InterestSet(), InterestSet()
+        self.assertIn(1, seen_before.filter_snapshot(grid, "a")["enemies"])
+        self.assertNotIn(1, new_b.filter_snapshot(grid, "b")["enemies"])
+        self.assertIs(new_c.filter_snapshot(grid, "c"), grid.filtered[(100, 100, frozenset())][1])
+        self.assertIs(new_b.visible, new_c.visible)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+# tests/test_metrics.py
+
+import socket
+import unittest
+from unittest import mock
+
+from server import network
+from server.metrics import metrics
+
+class Recorder:
+    """Stands in for a connection and keeps what it is sent"""
+    def __init__(self):
+        self.sent = []
+
+    def send(self, payload):
+        self.sent.append(payload)
+
+class MessageCountTest(unittest.TestCase):
+    def test_unknown_types_are_counted_together(self):
+        before = dict(metrics.received)
+        for message_type in ("made_up", "another", None, ["list"]):
+            network.handle_message(None, "player", {"type": message_type})
+        self.assertEqual(metrics.received["unknown"], before.get("unknown", 0) + 4)
+        self.assertNotIn("made_up", metrics.received)
+        self.assertNotIn(None, metrics.received)
+
+    def test_broadcast_counts_its_message_type(self):
+        before = metrics.sent["player_death"]
+        recorder = Recorder()
+        network.clients.append(recorder)
+        try:
+            network.broadcast('{"type": "player_death", "data": {}}', "player_death")
+        finally:
+            network.clients.remove(recorder)
+        self.assertEqual(recorder.sent, [b'{"type": "player_death", "data": {}}\n'])
+        self.assertEqual(metrics.sent["player_death"], before + 1)
+        self.assertNotIn("broadcast", metrics.sent)
+
+class StartMetricsTest(unittest.TestCase):
+    def test_port_in_use_is_not_fatal(self):
+        with socket.create_server(("127.0.0.1", 0)) as taken:
+            with mock.patch.object(network, "METRICS_HOST", "127.0.0.1"), \
+                    mock.patch.object(network, "METRICS_PORT", taken.getsockname()[1]):
+                network.start_metrics()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# tests/test_moves.py
+
+import math
+import time
+import unittest
+
+from server.game_state import GameState, MAX_MOVE_PER_TICK
+from server import network
+
+class QueueMoveTest(unittest.TestCase):
+    def setUp(self):
+        self.game_state = GameState()
+        self.game_state.add_player("p1", "one", "Warrior")
+        self.start = (self.game_state.players["p1"]["x"], self.game_state.players["p1"]["y"])
+
+    def position(self, player_id="p1"):
+        player = self.game_state.players[player_id]
+        return player["x"], player["y"]
+
+    def test_malformed_moves_are_ignored(self):
+        for dx, dy, seq in (("abc", 0, 1), (0, None, 1), (math.nan, 0, 1), (math.inf, 0, 1),
+                            (True, 0, 1), ([1], 0, 1), (5, 0, "1"), (5, 0, 1.5)):
+            self.assertFalse(self.game_state.queue_move("p1", dx, dy, seq))
+        self.game_state.apply_moves()
+        self.assertEqual(self.position(), self.start)
+        self.assertNotIn("move_seq", self.game_state.players["p1"])
+
+    def test_oversized_move_is_clamped(self):
+        self.assertTrue(self.game_state.queue_move("p1", 10 ** 12, -10 ** 12, 1))
+        start = time.perf_counter()
+        self.game_state.apply_moves()
+        self.assertLess(time.perf_counter() - start, 0.1)
+        x, y = self.position()
+        self.assertLessEqual(abs(x - self.start[0]), MAX_MOVE_PER_TICK)
+        self.assertLessEqual(abs(y - self.start[1]), MAX_MOVE_PER_TICK)
+        self.assertEqual(self.game_state.players["p1"]["move_seq"], 1)
+
+    def test_summed_moves_are_clamped(self):
+        for seq in range(1, 21):
+            self.game_state.queue_move("p1", 10, 0, seq)
+        self.assertEqual(self.game_state.move_intents["p1"], [MAX_MOVE_PER_TICK, 0, 20])
+
+    def test_one_failing_move_does_not_stop_the_others(self):
+        self.game_state.add_player("p2", "two", "Warrior")
+        self.game_state.players["p1"]["x"] = "broken"
+        self.game_state.queue_move("p1", 5, 0, 1)
+        self.game_state.queue_move("p2", 5, 0, 1)
+        self.game_state.apply_moves()
+        self.assertEqual(self.position("p2"), (self.start[0] + 5, self.start[1]))
+        self.assertEqual(self.game_state.move_intents, {})
+
+class MoveCommandTest(unittest.TestCase):
+    def test_malformed_move_message_keeps_the_tick_running(self):
+        game_state = network.game_state
+        game_state.add_player("bad", "bad", "Warrior")
+        try:
+            network.run_command(None, "bad", {"type": "move", "data": {"dx": "abc", "dy": 0, "seq": 1}})
+            network.simulate(1 / 30)  # raised TypeError before moves were checked
+        finally:
+            game_state.remove_player("bad")
+
+if __name__ == "__main__":
+    unittest.main()
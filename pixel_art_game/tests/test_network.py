@@ -0,0 +1,56 @@
+# tests/test_network.py
+
+import socket
+import unittest
+
+from server import network
+from server.metrics import metrics
+from server.network import ClientConnection, clients, game_state
+
+class SendUpdatesTest(unittest.TestCase):
+    def setUp(self):
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.others = []
+
+    def tearDown(self):
+        for client in list(clients):
+            if client.address[0] == "test":
+                clients.remove(client)
+                client.close()
+        for other in self.others:
+            other.close()
+        self.listener.close()
+
+    def connect(self, index):
+        other = socket.create_connection(self.listener.getsockname())
+        sock, _ = self.listener.accept()
+        self.others.append(other)
+        client = ClientConnection(sock, ("test", index))
+        clients.append(client)
+        game_state.add_player(client.player_id, f"test{index}", "Warrior")
+        self.addCleanup(game_state.remove_player, client.player_id)
+        return client
+
+    def test_malformed_ack_is_dropped(self):
+        client = self.connect(0)
+        network.send_updates()
+        before = metrics.events["invalid_acks"]
+        for seq in ([1], {"a": 1}, "1", 1.0, True, None):
+            network.handle_message(client, client.player_id,
+                                   {"type": "state_ack", "data": {"seq": seq}})
+        self.assertEqual(metrics.events["invalid_acks"], before + 6)
+        network.send_updates()
+        self.assertIn(client, clients)
+
+    def test_broken_client_is_dropped_alone(self):
+        broken = self.connect(0)
+        healthy = self.connect(1)
+        # As an unchecked ack used to leave it
+        broken.replication.pending_ack = [1]
+        network.send_updates()
+        self.assertNotIn(broken, clients)
+        self.assertIn(healthy, clients)
+        self.assertTrue(healthy.outbox.take())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# tests/test_outbox.py
+
+import unittest
+
+from server.outbox import Outbox, SlowConsumer
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class OutboxTest(unittest.TestCase):
+    def test_newer_update_goes_after_what_was_queued_since(self):
+        outbox = Outbox()
+        self.assertFalse(outbox.put(b"U1", reliable=False))
+        outbox.put(b"R")
+        self.assertTrue(outbox.put(b"U2", reliable=False))
+        self.assertEqual(outbox.take(), b"RU2")
+        self.assertEqual(outbox.dropped, 1)
+        self.assertEqual(outbox.size, 0)
+
+    def test_only_the_newest_update_waits(self):
+        outbox = Outbox()
+        outbox.put(b"A")
+        for update in (b"U1", b"U22", b"U333"):
+            outbox.put(update, reliable=False)
+        outbox.put(b"B")
+        self.assertEqual(outbox.size, len(b"AU333B"))
+        self.assertEqual(outbox.take(), b"AU333B")
+        self.assertEqual(outbox.dropped, 2)
+
+    def test_too_much_kept_is_a_slow_consumer(self):
+        outbox = Outbox(limit=10)
+        outbox.put(b"x" * 100, reliable=False)  # updates don't count, they are replaced
+        outbox.put(b"y" * 10)
+        with self.assertRaises(SlowConsumer):
+            outbox.put(b"z")
+
+    def test_behind_for_too_long_is_a_slow_consumer(self):
+        clock = Clock()
+        outbox = Outbox(timeout=5, clock=clock)
+        outbox.put(b"a")
+        clock.now = 4
+        outbox.take()  # caught up, but only empty outboxes reset the clock
+        outbox.put(b"b")
+        clock.now = 6
+        with self.assertRaises(SlowConsumer):
+            outbox.put(b"c")
+
+    def test_emptied_outbox_resets_the_clock(self):
+        clock = Clock()
+        outbox = Outbox(timeout=5, clock=clock)
+        outbox.put(b"a")
+        clock.now = 4
+        outbox.take()
+        self.assertEqual(outbox.take(), b"")
+        clock.now = 8
+        outbox.put(b"b")
+        self.assertEqual(outbox.take(), b"b")
+
+    def test_closed(self):
+        outbox = Outbox()
+        outbox.close()
+        self.assertIsNone(outbox.take())
+        with self.assertRaises(ConnectionError):
+            outbox.put(b"a")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# tests/test_spatial.py
+
+import random
+import time
+import unittest
+
+from server.game_state import GameState, MAX_FIREBALL_RADIUS
+from server.spatial import SpatialHash
+
+class QueryRadiusTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.grid = SpatialHash(cell_size=64)
+        for index in range(500):
+            self.grid.add({"id": index, "x": rng.uniform(-2000, 2000), "y": rng.uniform(-2000, 2000)})
+
+    def brute_force(self, x, y, radius):
+        return sorted(entity["id"] for entity in self.grid
+                      if (entity["x"] - x) ** 2 + (entity["y"] - y) ** 2 <= radius * radius)
+
+    def query(self, x, y, radius):
+        return sorted(entity["id"] for entity in self.grid.query_radius(x, y, radius))
+
+    def test_matches_a_brute_force_scan(self):
+        for x, y, radius in ((0, 0, 100), (500, -300, 250), (-1900, 1900, 700), (0, 0, 3000)):
+            self.assertEqual(self.query(x, y, radius), self.brute_force(x, y, radius))
+
+    def test_huge_radius_is_quick(self):
+        start = time.perf_counter()
+        found = self.query(10, 10, 1e6)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(found, self.brute_force(10, 10, 1e6))
+        self.assertEqual(len(found), 500)
+
+class FireballTest(unittest.TestCase):
+    def setUp(self):
+        self.game_state = GameState()
+        self.game_state.add_player("p1", "one", "Mage")
+        self.game_state.add_enemy({"id": "far", "type": "goblin", "x": 1000, "y": 0,
+                                   "speed": 1.0, "health": 100, "damage": 5, "last_hit_time": 0})
+
+    def cast(self, **data):
+        self.game_state.players["p1"]["mana"] = 100
+        return self.game_state.use_special_ability("p1", dict(type="fireball", **data))
+
+    def test_radius_is_clamped(self):
+        start = time.perf_counter()
+        result = self.cast(target_x=0, target_y=0, radius=1e6)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertTrue(result["success"])
+        self.assertGreater(1000, MAX_FIREBALL_RADIUS)
+        self.assertEqual(self.game_state.enemies.get("far")["health"], 100)
+
+    def test_malformed_fireballs_are_refused(self):
+        for data in ({"radius": 0}, {"radius": -5}, {"radius": "big"}, {"radius": float("inf")},
+                     {"radius": True}, {"target_x": None}, {"target_y": [1]}):
+            self.assertFalse(self.cast(**data)["success"], data)
+        self.assertEqual(self.game_state.enemies.get("far")["health"], 100)
+
+if __name__ == "__main__":
+    unittest.main()